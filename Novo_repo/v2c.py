@@ -6,6 +6,10 @@ import subprocess
 import sys
 from pathlib import Path
 
+# discovery.py is shared with the other entry points at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from discovery import DEFAULT_IGNORE, find_files
+
 MODULE_RE = re.compile(r"\bmodule\s+([a-zA-Z_][a-zA-Z0-9_]*)\b")
 
 
@@ -39,16 +43,10 @@ def main():
         help="Command template with {in}, {out}, and optional {top}",
     )
     ap.add_argument("--by-module", action="store_true", help="Emit one C file per module")
+    ap.add_argument("--ignore", action="append", default=[], help="Extra fnmatch pattern to skip while scanning")
     args = ap.parse_args()
 
-    v_files = []
-    for raw in args.paths:
-        p = Path(raw)
-        if p.is_dir():
-            v_files.extend(sorted(p.rglob("*.v")))
-        elif p.is_file() and p.suffix.lower() == ".v":
-            v_files.append(p)
-    v_files = sorted(set(v_files))
+    v_files = find_files(args.paths, (".v",), ignore=DEFAULT_IGNORE + tuple(args.ignore))
 
     if not v_files:
         print("No .v files found.", file=sys.stderr)
@@ -5,6 +5,10 @@ import subprocess
 import sys
 from pathlib import Path
 
+# discovery.py is shared with the other entry points at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from discovery import DEFAULT_IGNORE, find_files
+
 ENTITY_RE = re.compile(r"\bentity\s+([a-zA-Z_][a-zA-Z0-9_]*)\s+is\b", re.IGNORECASE)
 
 
@@ -28,16 +32,10 @@ def main():
     ap.add_argument("--outdir", default="verilog_out", help="Output directory for .v files")
     ap.add_argument("--std", default="08", help="VHDL standard for GHDL (default: 08)")
     ap.add_argument("--skip-tb", action="store_true", help="Skip entities starting with tb_")
+    ap.add_argument("--ignore", action="append", default=[], help="Extra fnmatch pattern to skip while scanning")
     args = ap.parse_args()
 
-    vhd_files = []
-    for raw in args.paths:
-        p = Path(raw)
-        if p.is_dir():
-            vhd_files.extend(sorted(p.rglob("*.vhd")))
-        elif p.is_file() and p.suffix.lower() == ".vhd":
-            vhd_files.append(p)
-    vhd_files = sorted(set(vhd_files))
+    vhd_files = find_files(args.paths, (".vhd",), ignore=DEFAULT_IGNORE + tuple(args.ignore))
 
     if not vhd_files:
         print("No .vhd files found.", file=sys.stderr)
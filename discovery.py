@@ -0,0 +1,190 @@
+"""
+Shared source discovery for the entry points (inicio_auto.py, Novo_repo/vhd2v.py,
+Novo_repo/v2c.py, task-04/run_task04.py).
+
+- a single os.scandir-based walk that visits each directory once and lists
+  sibling directories in parallel (helps a lot on network filesystems)
+- ignore patterns (fnmatch on the entry name) for VCS/tool/output folders
+- a persistent snapshot {path: [mtime_ns, size]} and change detection
+  against it, so callers can restrict work to added/modified files
+- design units: a VHDL file split into one text per entity (its declaration
+  and architectures), so every entry point handles several entities per file
+- write_if_changed(): atomic writes that leave identical outputs untouched,
+  keeping their mtimes for the snapshot/incremental steps downstream
+"""
+
+from __future__ import annotations
+import fnmatch
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_IGNORE = (".*", "__pycache__", "node_modules", "venv", "*.egg-info")
+
+# primary/secondary VHDL units at the start of a line (not in comments or instantiations)
+UNIT_RE = re.compile(r'^[ \t]*(entity|architecture|package|configuration)\s+(?:body\s+)?(\w+)'
+                     r'(?:\s+of\s+(\w+))?\s+is\b', re.IGNORECASE | re.MULTILINE)
+
+@dataclass(frozen=True)
+class FileInfo:
+    path: str
+    mtime_ns: int
+    size: int
+
+@dataclass
+class Changes:
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+def _ignored(name: str, ignore: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pat) for pat in ignore)
+
+def _scan_dir(path: str, suffixes: Tuple[str, ...], ignore: Sequence[str]):
+    """List one directory: (matching files, subdirectories). Errors yield nothing."""
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                if _ignored(e.name, ignore):
+                    continue
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        dirs.append(e.path)
+                    elif e.is_file() and (not suffixes or e.name.lower().endswith(suffixes)):
+                        st = e.stat()
+                        files.append(FileInfo(e.path, st.st_mtime_ns, st.st_size))
+                except OSError:
+                    continue
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        pass
+    return files, dirs
+
+def walk(roots: Iterable, suffixes: Iterable[str] = (), ignore: Sequence[str] = DEFAULT_IGNORE,
+         max_depth: Optional[int] = None, workers: int = 8) -> List[FileInfo]:
+    """Find files under `roots` whose name ends with one of `suffixes` (case-insensitive).
+
+    A root that is a file is returned as-is if it matches. max_depth=0 lists only
+    the root itself, 1 adds its immediate subdirectories, None means unlimited.
+    Each file is reported once, sorted by path.
+    """
+    suffixes = tuple(s.lower() for s in suffixes)
+    found: Dict[str, FileInfo] = {}
+    start = []
+    for r in roots:
+        r = os.fspath(r)
+        if os.path.isfile(r):
+            if not suffixes or r.lower().endswith(suffixes):
+                st = os.stat(r)
+                found[os.path.normpath(r)] = FileInfo(r, st.st_mtime_ns, st.st_size)
+        elif os.path.isdir(r):
+            start.append(r)
+
+    seen_dirs = set()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {}
+        for r in start:
+            key = os.path.realpath(r)
+            if key not in seen_dirs:
+                seen_dirs.add(key)
+                pending[pool.submit(_scan_dir, r, suffixes, ignore)] = 0
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                depth = pending.pop(fut)
+                files, dirs = fut.result()
+                for fi in files:
+                    found.setdefault(os.path.normpath(fi.path), fi)
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for d in dirs:
+                    key = os.path.realpath(d)
+                    if key in seen_dirs:
+                        continue
+                    seen_dirs.add(key)
+                    pending[pool.submit(_scan_dir, d, suffixes, ignore)] = depth + 1
+    return [found[k] for k in sorted(found)]
+
+def find_files(roots: Iterable, suffixes: Iterable[str], **kw) -> List[Path]:
+    return [Path(fi.path) for fi in walk(roots, suffixes, **kw)]
+
+def load_snapshot(path: Path) -> Dict[str, Tuple[int, int]]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {k: (int(v[0]), int(v[1])) for k, v in (data.get("files") or {}).items()}
+
+def save_snapshot(path: Path, files: Iterable[FileInfo]):
+    data = {"version": 1, "files": {fi.path: [fi.mtime_ns, fi.size] for fi in files}}
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+def diff_snapshot(old: Dict[str, Tuple[int, int]], files: Iterable[FileInfo]) -> Changes:
+    ch = Changes()
+    current = set()
+    for fi in files:
+        current.add(fi.path)
+        prev = old.get(fi.path)
+        if prev is None:
+            ch.added.append(fi.path)
+        elif prev != (fi.mtime_ns, fi.size):
+            ch.modified.append(fi.path)
+        else:
+            ch.unchanged.append(fi.path)
+    ch.removed = sorted(p for p in old if p not in current)
+    return ch
+
+def vhdl_units(text: str) -> List[Tuple[str, str]]:
+    """[(entity name, unit text)] for each entity of a VHDL file, in file order.
+
+    A unit text is the file with the declarations and architectures of the
+    other entities blanked out (newlines kept, so line numbers stay valid);
+    the context clauses before the first unit and packages are shared by all.
+    A file with a single entity is returned unchanged.
+    """
+    marks = list(UNIT_RE.finditer(text))
+    entities = [m.group(2) for m in marks if m.group(1).lower() == "entity"]
+    if len(entities) <= 1:
+        return [(entities[0], text)] if entities else []
+    segments = [(None, text[:marks[0].start()])]  # (owning entity or None = shared, text)
+    for i, m in enumerate(marks):
+        end = marks[i + 1].start() if i + 1 < len(marks) else len(text)
+        kind = m.group(1).lower()
+        owner = m.group(2) if kind == "entity" else m.group(3) if kind == "architecture" else None
+        segments.append((owner.lower() if owner else None, text[m.start():end]))
+    return [(name, "".join(seg if owner in (None, name.lower()) else "\n" * seg.count("\n")
+                           for owner, seg in segments))
+            for name in entities]
+
+def write_if_changed(path, text: str, encoding: str = "utf-8") -> bool:
+    """Write `text` atomically unless the file already holds exactly it.
+
+    Returns True when the file was (re)written; an unchanged file keeps its
+    mtime. The comparison reads the old file only when the sizes match.
+    """
+    path = Path(path)
+    data = text.encode(encoding)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
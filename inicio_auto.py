@@ -1,13 +1,37 @@
 import re
-import math
+import json
 import os
 import subprocess
 import sys
+from pathlib import Path
+from string import Template
+
+if __name__ == "__main__":
+    # Cliente fino: com --daemon/TASK04_DAEMON o job roda no pipeline_daemon.py
+    from pipeline_daemon import maybe_forward
+    maybe_forward("inicio_auto")
+
+from discovery import walk, vhdl_units, write_if_changed
+import vcd_trace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "task-04"))
+from ast_frontend.value_ranges import (ValueRange, bits_for, enum_types, enum_width, is_trivial,
+                                       verilog_constraint)
 
 def parse_vhdl(file_path):
+    """Informações da primeira entidade do arquivo."""
+    with open(file_path, 'r') as f:
+        content = f.read()
+    unidades = vhdl_units(content)
+    return parse_vhdl_text(unidades[0][1] if unidades else content)
+
+def parse_vhdl_entities(file_path):
+    """Uma leitura do arquivo, uma entrada por entidade (vários entity por arquivo)."""
     with open(file_path, 'r') as f:
         content = f.read()
+    return [parse_vhdl_text(texto) for _, texto in vhdl_units(content)]
 
+def parse_vhdl_text(content):
     info = {
         "entity_name": "",
         "ports": [],
@@ -22,8 +46,11 @@ def parse_vhdl(file_path):
     if entity_match:
         info["entity_name"] = entity_match.group(1)
 
+    # Tipos enumerados: codificação sequencial (0, 1, 2, ...) como no GHDL
+    enums = enum_types(content)
+
     # 2. Portas
-    port_regex = re.compile(r'^\s*(\w+)\s*:\s*(in|out)\s+([\w\s\(\)]+);', re.MULTILINE | re.IGNORECASE)
+    port_regex = re.compile(r'^\s*(\w+)\s*:\s*(in|out)\s+([\w\s\(\)-]+);', re.MULTILINE | re.IGNORECASE)
     for match in port_regex.finditer(content):
         name = match.group(1)
         direction = match.group(2).lower()
@@ -31,17 +58,24 @@ def parse_vhdl(file_path):
         
         width = 1
         msb = 0
+        faixa = None  # (lo, hi) perdido na tradução para Verilog
         
         if "integer" in tipo_bruto:
-            range_match = re.search(r'range\s+(\d+)\s+to\s+(\d+)', tipo_bruto)
+            range_match = re.search(r'range\s+(-?\d+)\s+(to|downto)\s+(-?\d+)', tipo_bruto)
             if range_match:
-                end = int(range_match.group(2))
-                width = math.ceil(math.log2(end + 1))
-                if width == 0: width = 1
+                a, b = int(range_match.group(1)), int(range_match.group(3))
+                lo, hi = min(a, b), max(a, b)
+                faixa = (lo, hi)
+                width = bits_for(lo, hi)
                 msb = width - 1
             else:
                 width = 32
                 msb = 31
+        elif tipo_bruto.strip() in enums:
+            n = len(enums[tipo_bruto.strip()])
+            faixa = (0, n - 1)
+            width = enum_width(n)
+            msb = width - 1
         elif "vector" in tipo_bruto:
             vec_match = re.search(r'\((\d+)\s+(downto|to)\s+(\d+)\)', tipo_bruto)
             if vec_match:
@@ -58,7 +92,8 @@ def parse_vhdl(file_path):
             "name": name,
             "dir": "input" if direction == "in" else "output",
             "width": width,
-            "msb": msb
+            "msb": msb,
+            "range": faixa
         })
 
     # 3. Tags
@@ -76,9 +111,32 @@ def parse_vhdl(file_path):
             elif tag_type == "ASSERT":
                 info["asserts"].append(rule)
 
+    # 4. Faixas (integer range / enum): o Verilog só tem o vetor, então o solver
+    #    exploraria valores impossíveis. Entradas viram assume; saídas viram
+    #    assert (fora da faixa seria erro de bound-check no VHDL).
+    info["range_assumes"] = []
+    info["range_asserts"] = []
+    for p in info["ports"]:
+        expr = range_expr(p["name"], p["range"], p["width"])
+        if expr:
+            (info["range_assumes"] if p["dir"] == "input" else info["range_asserts"]).append(expr)
+
     return info
 
+def range_expr(name, faixa, width):
+    """Restrição Verilog para a faixa VHDL (None se o vetor já cobre só a faixa)."""
+    if faixa is None:
+        return None
+    r = ValueRange(signal=name, lo=faixa[0], hi=faixa[1])
+    return None if is_trivial(r, width) else verilog_constraint(r, name, width)
+
 def generate_verification_wrapper(info, output_path):
+    wrapper_name, text = render_verification_wrapper(info)
+    write_if_changed(output_path, text)
+    return wrapper_name
+
+def render_verification_wrapper(info):
+    """(nome do módulo wrapper, texto SystemVerilog); não toca no disco."""
     lines = []
     wrapper_name = f"verify_{info['entity_name']}"
     
@@ -108,8 +166,12 @@ def generate_verification_wrapper(info, output_path):
             combinational_asserts.append(rule)
 
     lines.append("    always @(*) begin")
+    for rule in info.get("range_assumes", []):
+        lines.append(f"        assume ({rule});  // faixa VHDL")
     for rule in info["assumes"]:
         lines.append(f"        assume ({rule});")
+    for rule in info.get("range_asserts", []):
+        lines.append(f"        assert ({rule});  // faixa VHDL")
     for rule in combinational_asserts:
         lines.append(f"        assert ({rule});")
     lines.append("    end")
@@ -123,37 +185,36 @@ def generate_verification_wrapper(info, output_path):
     
     lines.append("endmodule")
 
-    with open(output_path, "w") as f:
-        f.write("\n".join(lines))
-    return wrapper_name
+    return wrapper_name, "\n".join(lines)
 
-def generate_sby_config(vhdl_filename, sv_filename, wrapper_module, sby_path, info):
-    entity_name = info["entity_name"]
-    
-    if info["has_clock"]:
-        mode_block = "mode bmc\ndepth 20"
-    else:
-        mode_block = "mode prove"
-
-    config = f"""[options]
-{mode_block}
+# Compilado uma vez; o script usa o nome do arquivo (o sby copia [files] para src/)
+SBY_TEMPLATE = Template("""[options]
+$mode_block
 
 [engines]
 smtbmc
 
 [script]
 plugin -i ghdl
-read_verilog -sv {sv_filename}
-ghdl --std=08 {vhdl_filename} -e {entity_name}
-prep -top {wrapper_module}
-write_verilog -noattr traducao_{entity_name}.v
+read_verilog -sv $sv_name
+ghdl --std=08 $vhdl_name -e $entity_name
+prep -top $wrapper_module
+write_verilog -noattr traducao_$entity_name.v
 
 [files]
-{sv_filename}
-{vhdl_filename}
-"""
-    with open(sby_path, "w") as f:
-        f.write(config)
+$sv_filename
+$vhdl_filename
+""")
+
+def render_sby_config(vhdl_filename, sv_filename, wrapper_module, info):
+    return SBY_TEMPLATE.substitute(
+        mode_block="mode bmc\ndepth 20" if info["has_clock"] else "mode prove",
+        sv_name=os.path.basename(sv_filename), vhdl_name=os.path.basename(vhdl_filename),
+        entity_name=info["entity_name"], wrapper_module=wrapper_module,
+        sv_filename=sv_filename, vhdl_filename=vhdl_filename)
+
+def generate_sby_config(vhdl_filename, sv_filename, wrapper_module, sby_path, info):
+    write_if_changed(sby_path, render_sby_config(vhdl_filename, sv_filename, wrapper_module, info))
 
 def main():
     print("- -Buscando arquivos .vhd - -")
@@ -161,27 +222,11 @@ def main():
     targets = []
     root_dir = "." 
 
-    # 1. Procura na raiz
+    # Raiz + pastas imediatas (pastas ocultas são ignoradas), cada arquivo uma vez
     try:
-        for file in os.listdir(root_dir):
-            if file.endswith(".vhd"):
-                targets.append((root_dir, file))
-    except Exception as e:
-        print(f"Erro ao ler raiz: {e}")
-
-    # 2. Procura nas pastas imediatas
-    try:
-        with os.scandir(root_dir) as entries:
-            for entry in entries:
-                if entry.is_dir():
-                    if entry.name.startswith("."): continue
-                    try:
-                        sub_files = os.listdir(entry.path)
-                        for file in sub_files:
-                            if file.endswith(".vhd"):
-                                targets.append((entry.path, file))
-                    except PermissionError:
-                        continue
+        for fi in walk([root_dir], (".vhd",), max_depth=1):
+            folder, file = os.path.split(fi.path)
+            targets.append((folder, file))
     except Exception as e:
         print(f"Erro ao escanear pastas: {e}")
 
@@ -192,30 +237,56 @@ def main():
     print(f"Encontrados {len(targets)} arquivos únicos.")
     print("-" * 60)
 
+    # 1. Análise: uma leitura por arquivo, todas as entidades de cada um
+    jobs = []
+    vistos = set()
     for folder, filename in targets:
-        print(f" Processando na pasta: {folder}")
-        print(f" Arquivo: {filename}")
-        
         vhdl_path = os.path.join(folder, filename)
-        
         try:
-            # 1. Análise
-            info = parse_vhdl(vhdl_path)
-            
-            if not info["entity_name"]:
-                print("  Entidade não detectada. Pulando.")
+            infos = parse_vhdl_entities(vhdl_path)
+        except Exception as e:
+            print(f" {vhdl_path}: erro na análise: {e}")
+            continue
+        if not infos:
+            print(f" {vhdl_path}: entidade não detectada. Pulando.")
+        for info in infos:
+            chave = (folder, info["entity_name"].lower())
+            if chave in vistos:
+                print(f" {vhdl_path}: entidade {info['entity_name']} repetida na pasta. Pulando.")
                 continue
+            vistos.add(chave)
+            jobs.append((folder, filename, info))
 
-            sv_filename = f"verif_{info['entity_name']}.sv"
-            sby_filename = f"{info['entity_name']}.sby"
-            
-            sv_path = os.path.join(folder, sv_filename)
-            sby_path = os.path.join(folder, sby_filename)
+    # 2. Gerar todos os wrappers e .sby de uma vez; arquivos idênticos não são
+    #    reescritos (mantêm o mtime, o sby/make não refaz o que não mudou)
+    atualizados = 0
+    gerados = []
+    for folder, filename, info in jobs:
+        sv_filename = f"verif_{info['entity_name']}.sv"
+        sby_filename = f"{info['entity_name']}.sby"
+        try:
+            wrapper_name, sv_text = render_verification_wrapper(info)
+            atualizados += write_if_changed(os.path.join(folder, sv_filename), sv_text)
+            atualizados += write_if_changed(os.path.join(folder, sby_filename),
+                                            render_sby_config(filename, sv_filename, wrapper_name, info))
+        except Exception as e:
+            print(f" {info['entity_name']}: erro ao gerar wrapper/.sby: {e}")
+            continue
+        gerados.append((folder, filename, info))
+    print(f"{len(gerados)} entidades: {atualizados} de {2 * len(gerados)} arquivos gerados atualizados.")
+    print("-" * 60)
 
-            # 2. Gerar arquivos
-            wrapper_name = generate_verification_wrapper(info, sv_path)
-            generate_sby_config(filename, sv_filename, wrapper_name, sby_path, info)
+    for folder, filename, info in gerados:
+        print(f" Processando na pasta: {folder}")
+        print(f" Arquivo: {filename}")
+        print(f" Entidade: {info['entity_name']}")
+
+        sv_filename = f"verif_{info['entity_name']}.sv"
+        sby_filename = f"{info['entity_name']}.sby"
+        sv_path = os.path.join(folder, sv_filename)
+        sby_path = os.path.join(folder, sby_filename)
 
+        try:
             # 3. Executar SymbiYosys
             print("    Executando SBY (Logs abaixo)")
             print("   " + "-"*40) 
@@ -246,6 +317,17 @@ def main():
                     trace_match = re.search(r'Writing trace to ([^\s]+)', output_log)
                     if trace_match:
                         print(f"      Rastro salvo em: {trace_match.group(1)}")
+
+                    # Resume o VCD: só o prefixo até a falha e os sinais do assert
+                    vcd = vcd_trace.find_trace(Path(sby_path), output_log)
+                    if vcd is not None:
+                        expr = vcd_trace.failed_assert(output_log, [Path(sv_path)])
+                        entradas = [p["name"] for p in info["ports"] if p["dir"] == "input"]
+                        trace = vcd_trace.summarize(vcd, expr, entradas, info["clock_port"])
+                        trace_path = os.path.join(folder, f"{info['entity_name']}.trace.json")
+                        with open(trace_path, "w", encoding="utf-8") as f:
+                            json.dump(trace, f, indent=2)
+                        print(f"      Contraexemplo resumido: {trace_path} (falha no passo {trace['fail_step']})")
                 else:
                     print(f"    ERRO: Falha na ferramenta ou sintaxe (Verifique o log).\n")
 
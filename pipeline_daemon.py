@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Resident pipeline daemon and thin-client forwarding for the CLIs.
+
+Each run of task-04/run_task04.py, task-04/unify_ast.py or inicio_auto.py
+pays interpreter startup, module imports, tools.json loading and tool
+probing before doing any work. The daemon imports the three entry points
+once and keeps between jobs (see run_task04.enable_resident_caches):
+- tools.json contents and `which` probes of the tool templates
+- parsed VHDL / Verilog-netlist ASTs, keyed by path + mtime + size
+- the persistent yosys pools (--yosys-pool)
+
+Protocol: one JSON request line per connection on a Unix socket,
+
+    {"op": "run", "tool": "run_task04", "argv": [...], "cwd": "...", "path": "$PATH"}
+
+answered by a stream of {"out": text} / {"err": text} lines and a final
+{"rc": code, "seconds": s}. Other ops: "ping", "stats", "reload" (drop the
+caches) and "stop". Jobs run one at a time (they chdir and redirect
+stdout/stderr), in the client's directory and with the client's PATH.
+
+The CLIs forward themselves when `--daemon SOCKET` is given or TASK04_DAEMON
+is set; if nothing answers on the socket they print a note and run locally.
+This module only imports the standard library at load time, so the client
+side stays cheap.
+
+Usage:
+  python3 pipeline_daemon.py --socket /tmp/task04.sock &          # server
+  python3 task-04/run_task04.py --daemon /tmp/task04.sock --in ... --out ...
+  TASK04_DAEMON=/tmp/task04.sock python3 inicio_auto.py
+  python3 pipeline_daemon.py --socket /tmp/task04.sock --stop
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ENV_VAR = "TASK04_DAEMON"
+ROOT = Path(__file__).resolve().parent
+TOOLS = {"run_task04": "task-04", "unify_ast": "task-04", "inicio_auto": "."}
+
+# ----------------------------------------------------------------------------
+# Client side
+
+def _send(sock_path: str, request: Dict[str, Any], timeout: Optional[float] = 2.0):
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    s.connect(sock_path)
+    s.sendall((json.dumps(request) + "\n").encode("utf-8"))
+    s.settimeout(None)  # jobs take as long as the tools do
+    return s
+
+def request(sock_path: str, op: str, **fields) -> Dict[str, Any]:
+    """One-shot control request (ping/stats/reload/stop)."""
+    with contextlib.closing(_send(sock_path, dict(fields, op=op))) as s:
+        line = s.makefile("r", encoding="utf-8").readline()
+    return json.loads(line) if line else {}
+
+def daemon_socket(argv: List[str]) -> Optional[str]:
+    """Socket from `--daemon PATH` / `--daemon=PATH` (removed from argv) or TASK04_DAEMON."""
+    for i, a in enumerate(argv):
+        if a == "--daemon" and i + 1 < len(argv):
+            path = argv[i + 1]
+            del argv[i:i + 2]
+            return path
+        if a.startswith("--daemon="):
+            del argv[i]
+            return a.split("=", 1)[1]
+    return os.environ.get(ENV_VAR) or None
+
+def maybe_forward(tool: str):
+    """Called first thing by a CLI: run the job on the daemon and exit with its code.
+
+    Returns (and the CLI runs locally) when no daemon is configured or reachable.
+    """
+    path = daemon_socket(sys.argv)
+    if not path:
+        return
+    try:
+        s = _send(path, {"op": "run", "tool": tool, "argv": sys.argv[1:], "cwd": os.getcwd(),
+                         "path": os.environ.get("PATH", "")})
+    except OSError as e:
+        print(f"[daemon] {path} not reachable ({e}); running locally", file=sys.stderr)
+        return
+    rc = 1
+    with contextlib.closing(s):
+        for line in s.makefile("r", encoding="utf-8"):
+            msg = json.loads(line)
+            if "out" in msg:
+                sys.stdout.write(msg["out"])
+                sys.stdout.flush()
+            elif "err" in msg:
+                sys.stderr.write(msg["err"])
+                sys.stderr.flush()
+            elif "rc" in msg:
+                rc = msg["rc"]
+    raise SystemExit(rc)
+
+# ----------------------------------------------------------------------------
+# Server side
+
+class _Stream(io.TextIOBase):
+    """stdout/stderr replacement that forwards each write to the client."""
+
+    def __init__(self, wfile, key: str):
+        self.wfile, self.key = wfile, key
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            try:
+                self.wfile.write((json.dumps({self.key: text}) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                pass  # client went away; the job still finishes
+        return len(text)
+
+class Daemon:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.modules: Dict[str, Any] = {}
+        self.started = time.time()
+        self.jobs = 0
+        self.job_seconds = 0.0
+        for tool, sub in TOOLS.items():
+            d = str((ROOT / sub).resolve())
+            if d not in sys.path:
+                sys.path.insert(0, d)
+        import run_task04, unify_ast, inicio_auto
+        self.modules = {"run_task04": run_task04, "unify_ast": unify_ast, "inicio_auto": inicio_auto}
+        run_task04.enable_resident_caches()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1), "jobs": self.jobs,
+                "job_seconds": round(self.job_seconds, 3),
+                "caches": self.modules["run_task04"].resident_stats()}
+
+    def run(self, req: Dict[str, Any], wfile) -> Dict[str, Any]:
+        mod = self.modules.get(req.get("tool"))
+        if mod is None:
+            return {"rc": 2, "error": f"unknown tool {req.get('tool')!r}"}
+        out, err = _Stream(wfile, "out"), _Stream(wfile, "err")
+        # jobs run one at a time; TASK04_DAEMON is unset meanwhile so processes the
+        # job spawns (coordinator --local-workers) run locally instead of
+        # forwarding back here and waiting on this lock forever
+        with self.lock:
+            saved = (os.getcwd(), list(sys.argv), os.environ.get("PATH"), os.environ.pop(ENV_VAR, None))
+            t0 = time.perf_counter()
+            rc = 0
+            try:
+                os.chdir(req.get("cwd") or saved[0])
+                sys.argv = [f"{req['tool']}.py"] + list(req.get("argv") or [])
+                if req.get("path"):
+                    os.environ["PATH"] = req["path"]
+                with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    try:
+                        mod.main()
+                    except SystemExit as e:
+                        rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                        if e.code is not None and not isinstance(e.code, int):
+                            print(e.code, file=sys.stderr)
+                    except Exception:
+                        traceback.print_exc()
+                        rc = 1
+            finally:
+                os.chdir(saved[0])
+                sys.argv = saved[1]
+                if saved[2] is not None:
+                    os.environ["PATH"] = saved[2]
+                if saved[3] is not None:
+                    os.environ[ENV_VAR] = saved[3]
+                elapsed = time.perf_counter() - t0
+                self.jobs += 1
+                self.job_seconds += elapsed
+        return {"rc": rc, "seconds": round(elapsed, 4)}
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            req = json.loads(line)
+        except json.JSONDecodeError:
+            self._reply({"rc": 2, "error": "bad request"})
+            return
+        d: Daemon = self.server.pipeline
+        op = req.get("op")
+        if op == "run":
+            self._reply(d.run(req, self.wfile))
+        elif op == "ping":
+            self._reply({"ok": True, "pid": os.getpid()})
+        elif op == "stats":
+            self._reply(d.stats())
+        elif op == "reload":
+            with d.lock:
+                d.modules["run_task04"].enable_resident_caches()
+            self._reply({"ok": True})
+        elif op == "stop":
+            self._reply({"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self._reply({"rc": 2, "error": f"unknown op {op!r}"})
+
+    def _reply(self, msg: Dict[str, Any]):
+        try:
+            self.wfile.write((json.dumps(msg) + "\n").encode("utf-8"))
+        except OSError:
+            pass
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(sock_path: str):
+    p = Path(sock_path)
+    if p.exists():
+        try:
+            request(sock_path, "ping")
+            raise SystemExit(f"A daemon is already listening on {sock_path}")
+        except OSError:
+            p.unlink()  # stale socket from a killed daemon
+    d = Daemon()
+    # owner-only from the moment it is bound, before any client can connect
+    old_umask = os.umask(0o177)
+    try:
+        srv = _Server(sock_path, _Handler)
+    finally:
+        os.umask(old_umask)
+    with srv:
+        srv.pipeline = d
+        print(f"[daemon] pid {os.getpid()} listening on {sock_path}", flush=True)
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            d.modules["run_task04"].release_resident_caches()
+            with contextlib.suppress(OSError):
+                p.unlink()
+
+def main():
+    ap = argparse.ArgumentParser(description="Resident TASK 04 pipeline daemon.")
+    ap.add_argument("--socket", default=os.environ.get(ENV_VAR) or "/tmp/task04.sock")
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--stop", action="store_true", help="Stop a running daemon")
+    g.add_argument("--stats", action="store_true", help="Print a running daemon's counters and caches")
+    g.add_argument("--reload", action="store_true", help="Drop a running daemon's caches")
+    args = ap.parse_args()
+    if args.stop or args.stats or args.reload:
+        op = "stop" if args.stop else "stats" if args.stats else "reload"
+        print(json.dumps(request(args.socket, op), indent=2))
+        return
+    serve(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Resource-aware admission of design jobs (coordinator/worker mode).
+
+sby (yosys-smtbmc + z3) and ESBMC on large designs take tens of GB each, so N
+workers leasing blindly get processes OOM-killed, while one worker leaves the
+node idle. Jobs instead carry a demand {"mem_mb", "cores"} and each worker
+only leases a job that fits the free part of its host's budget; the ledger is
+the queue itself (leased jobs of the same host), so the budget holds across
+all workers of a host without any extra daemon.
+
+Demand of a job (estimate()):
+- measured: the largest peak RSS of the design in past runs (summary.jsonl,
+  results.sqlite) x PEAK_MARGIN, and its CPU/wall ratio for the cores
+- model, when nothing was measured: BASE_MB plus MB_PER_UNIT per weighted
+  netlist cell (netlist_stats weights) per unrolled step, with the sby BMC
+  depth and the ESBMC --unwind bound; the VHDL size stands in for the cells
+  of designs never synthesised
+
+Packing (pick()): queued jobs come largest first; a worker takes the first
+one that fits, so small jobs fill the space around a large one. A job that
+was passed over for RESERVE_AFTER seconds reserves the host: nothing else is
+admitted there until it fits. A job larger than the whole budget runs alone
+on an idle host. The host's MemAvailable is also checked, so memory used
+outside the pipeline is respected.
+
+A step killed by the OOM killer (SIGKILL / rc -9 or 137) or failing to
+allocate (an allocator message in its stderr, see OOM_RE) makes the worker
+requeue the job with oom_demand() (at least twice the old estimate) and back
+off before leasing again.
+
+ru_maxrss (os.wait4) is the peak of the largest process of a step's tree,
+not the sum of the tree; PEAK_MARGIN covers smtbmc + z3 running together.
+"""
+
+from __future__ import annotations
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+BASE_MB = 512           # yosys + smtbmc/z3 (or esbmc) on a tiny design
+MB_PER_UNIT = 0.02      # per weighted cell per BMC step / unwinding
+VHDL_BYTES_PER_CELL = 8 # designs never synthesised: cells from the VHDL size
+PEAK_MARGIN = 1.3
+RESERVE_AFTER = 300.0   # seconds a bypassed job waits before reserving a host
+OOM_BACKOFF = 5.0       # first back-off after an OOM, doubled up to OOM_BACKOFF_MAX
+OOM_BACKOFF_MAX = 120.0
+MIN_FREE_MB = 2048      # MemAvailable kept free for the OS and the workers
+
+BMC_DEPTH = 20          # depth of the generated .sby files
+UNWIND_RE = re.compile(r'--unwind\s+(\d+)')
+# allocator failures as the tools print them (case-sensitive, at a line start,
+# after a "prefix: " or in a C++ terminate message); a kill by the OOM killer
+# is only trusted from the rc
+OOM_RE = re.compile(r"(?:^|:\s+|instance of ')(?:std::bad_alloc|MemoryError"
+                    r"|Out of memory|out of memory|Cannot allocate memory)\b", re.MULTILINE)
+
+def host_budget(mem_gb: Optional[float] = None, cores: Optional[int] = None) -> Dict[str, int]:
+    """Budget of this host: 90% of the physical memory and all cores unless given."""
+    if mem_gb is None:
+        try:
+            mem_mb = int(os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2**20 * 0.9)
+        except (ValueError, OSError, AttributeError):
+            mem_mb = 8192
+    else:
+        mem_mb = int(mem_gb * 1024)
+    return {"mem_mb": mem_mb, "cores": cores or os.cpu_count() or 1}
+
+def available_mb() -> Optional[int]:
+    """MemAvailable from /proc/meminfo (None where there is none)."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def unwind_of(cmd: str) -> int:
+    m = UNWIND_RE.search(cmd or "")
+    return int(m.group(1)) if m else BMC_DEPTH
+
+def weighted_cells(stats: Dict[str, Any]) -> int:
+    """Cells weighted like netlist_stats.solver_cost, without the logic depth factor."""
+    mux_bits = sum(int(w) * c for w, c in (stats.get("mux_widths") or {}).items())
+    arith_bits = sum(int(w) * c for w, c in (stats.get("adder_widths") or {}).items())
+    return (int(stats.get("cell_count") or 0) + mux_bits + 3 * arith_bits
+            + 2 * int(stats.get("register_bits") or 0))
+
+def estimate(steps: Dict[str, Any], tools: Dict[str, str], stats: Optional[Dict[str, Any]] = None,
+             measured: Optional[Dict[str, Any]] = None, vhdl_bytes: int = 0) -> Dict[str, int]:
+    """{"mem_mb", "cores"} of one design job with the selected steps."""
+    measured = measured or {}
+    cores = max(1, round(measured.get("cores") or 1))
+    if measured.get("peak_mb"):
+        # a peak cut short by an OOM kill is only a lower bound
+        peak = measured["peak_mb"] * (2 if measured.get("oom") else 1)
+        return {"mem_mb": int(peak * PEAK_MARGIN), "cores": cores}
+    units = weighted_cells(stats) if stats else vhdl_bytes // VHDL_BYTES_PER_CELL
+    bound = 1
+    if steps.get("run_sby"):
+        bound = max(bound, BMC_DEPTH)
+    if steps.get("run_esbmc"):
+        bound = max(bound, unwind_of(tools.get("esbmc", "")))
+    return {"mem_mb": int(BASE_MB + MB_PER_UNIT * units * bound), "cores": cores}
+
+def free(running: List[Dict[str, Any]], budget: Dict[str, int],
+         avail_mb: Optional[int] = None) -> Dict[str, int]:
+    """{"mem_mb", "cores"} of the budget left by the running jobs, capped by MemAvailable."""
+    mem = budget["mem_mb"] - sum(j["mem_mb"] for j in running)
+    if avail_mb is not None:
+        mem = min(mem, avail_mb - MIN_FREE_MB)
+    return {"mem_mb": mem, "cores": budget["cores"] - sum(j["cores"] for j in running)}
+
+def pick(queued: List[Dict[str, Any]], running: List[Dict[str, Any]], budget: Dict[str, int],
+         avail_mb: Optional[int] = None, now: Optional[float] = None) -> Optional[int]:
+    """Id of the queued job this host may start now, or None to wait.
+
+    queued: {"id", "mem_mb", "cores", "held_since"} in lease order (largest first),
+    the head first even when only the jobs that fit follow it;
+    running: the same for the jobs currently leased on this host.
+    """
+    if not queued:
+        return None
+    if not running:
+        return queued[0]["id"]  # idle host: the head runs even if larger than the budget
+    now = time.time() if now is None else now
+    left = free(running, budget, avail_mb)
+
+    def fits(j):
+        return j["mem_mb"] <= left["mem_mb"] and j["cores"] <= left["cores"]
+
+    head = queued[0]
+    if (head["held_since"] is not None and now - head["held_since"] > RESERVE_AFTER
+            and head["mem_mb"] <= budget["mem_mb"] and head["cores"] <= budget["cores"]):
+        return head["id"] if fits(head) else None
+    for j in queued:
+        if fits(j):
+            return j["id"]
+    return None
+
+def is_oom(result: Dict[str, Any]) -> bool:
+    """True when a sh() result looks like the step ran out of memory."""
+    if result.get("ok"):
+        return False
+    if result.get("returncode") in (-9, 137):
+        return True
+    return bool(OOM_RE.search(result.get("stderr") or ""))
+
+def oom_demand(demand: Dict[str, int], peak_mb: float, budget: Dict[str, int]) -> Dict[str, int]:
+    """Demand for the retry of a job that ran out of memory."""
+    mem = max(2 * demand.get("mem_mb", BASE_MB), int(peak_mb * 2 * PEAK_MARGIN))
+    return {"mem_mb": min(mem, budget["mem_mb"]), "cores": demand.get("cores", 1)}
@@ -0,0 +1,273 @@
+"""
+AST differ for property-level incremental re-verification.
+
+signatures() summarises a Common AST (structural view + properties) as hashed
+signatures, so two versions of a design are compared signature by signature
+instead of cell by cell:
+- ports:      {name: "direction/width"}
+- cells:      order-independent hash of every cell signature (any change)
+- properties: {"assert:<expr>": hash of the property text, the assumptions
+              and the cone of influence of every port it references}
+
+Cell signatures are computed in a few Weisfeiler-Lehman style rounds: a cell
+hashes its type (or the structural hash of the submodule it instantiates),
+its parameters (reset value, signedness, ...) and the signatures of the cells driving its inputs, in topological order; primary
+inputs hash their port name/bit and register outputs feed the previous round.
+Net ids/names never enter a signature, so re-running Yosys or renaming
+internal wires keeps them. A cone signature is the sum of the signatures of
+the cells reached backwards from the port bits, so everything is linear in
+the netlist size (one pass per round, one traversal per referenced port).
+
+Properties referencing a name that is not a port get the whole-design cone.
+"""
+
+from __future__ import annotations
+import hashlib
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .netlist_stats import OUTPUT_PORTS, CONST_BITS, is_register
+from .structural_hash import library_hashes
+
+MASK = (1 << 64) - 1
+ROUNDS = 2
+
+IDENT_RE = re.compile(r'\b[A-Za-z_]\w*\b')
+# sized Verilog literals (8'd1, 4'hF), VHDL character/string literals
+LITERAL_RE = re.compile(r"\d*'[sS]?[bBoOdDhH][0-9a-fA-FxXzZ_]+|'[01xXzZuUwWlLhH-]'|\"[^\"]*\"")
+# operators/functions that may appear in @c2vhdl expressions
+EXPR_WORDS = {"and", "or", "not", "xor", "nand", "nor", "xnor", "mod", "rem", "abs",
+              "past", "rose", "fell", "stable", "true", "false", "to_integer",
+              "unsigned", "signed", "std_logic_vector", "to_unsigned", "to_signed"}
+
+def _h(*parts: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest(), "big")
+
+def _mix(a: int, b: int) -> int:
+    return ((a ^ b) * 0x100000001B3 + 0x9E3779B97F4A7C15) & MASK
+
+def _bits(conn) -> List[Any]:
+    return conn if isinstance(conn, list) else [conn]
+
+def _is_input(p) -> bool:
+    return p.direction in ("in", "input")
+
+FREE = _h("free")
+
+class _Graph:
+    """Driver map and per-cell inputs of one module, in evaluation order.
+
+    Cell inputs are resolved once to either a fixed signature (primary input,
+    constant, undriven) or a (driver cell, output port hash, bit index) triple,
+    so the signature rounds only do integer mixing.
+    """
+
+    def __init__(self, ast, child_hashes: Dict[str, str]):
+        lib = ast.library or {}
+        self.cells = ast.cells or []
+        n = len(self.cells)
+        names: Dict[str, int] = {}   # _h() cache for types and port names
+
+        def name_h(x: str) -> int:
+            v = names.get(x)
+            if v is None:
+                v = names[x] = _h(x)
+            return v
+
+        self.type_sig: List[int] = [0] * n
+        self.comb: List[bool] = [False] * n
+        self.driver: Dict[Any, tuple] = {}   # net -> (cell, port hash, bit index)
+        self.leaf: Dict[Any, int] = {}       # primary input bit / constant -> signature
+        raw: List[List[tuple]] = [[] for _ in range(n)]
+
+        for p in ast.ports or []:
+            if _is_input(p):
+                for k, b in enumerate(p.bits or []):
+                    self.leaf[b] = _h("in", p.name, k)
+        for b in CONST_BITS:
+            self.leaf[b] = _h("const", b)
+
+        for i, c in enumerate(self.cells):
+            conns = c.connections or {}
+            child = lib.get(c.type)
+            if child is not None:
+                outs = {p.name for p in child.ports or [] if not _is_input(p)}
+            elif c.type.startswith("$"):
+                outs = OUTPUT_PORTS
+            else:
+                outs = ()  # unknown instance: all pins are sinks
+            tsig = name_h(child_hashes.get(c.type, c.type))
+            if c.parameters:
+                tsig = _mix(tsig, _h(sorted((k, str(v)) for k, v in c.parameters.items())))
+            self.type_sig[i] = tsig
+            self.comb[i] = c.type.startswith("$") and not is_register(c.type)
+            for port in sorted(conns):
+                bits = _bits(conns[port])
+                if port in outs:
+                    ph = name_h(port)
+                    for k, b in enumerate(bits):
+                        if b not in CONST_BITS:
+                            self.driver[b] = (i, ph, k)
+                else:
+                    raw[i].append((name_h(port), bits))
+
+        leaf, driver = self.leaf, self.driver
+        self.inputs: List[List[tuple]] = [
+            [(ph, [driver.get(b) or leaf.get(b, FREE) for b in bits]) for ph, bits in ins] for ins in raw]
+
+        # combinational cells in topological order (loops appended last), then the rest
+        comb = self.comb
+        indeg = [0] * n
+        fanout: List[List[int]] = [[] for _ in range(n)]
+        for i in range(n):
+            if not comb[i]:
+                continue
+            preds = {x[0] for _, xs in self.inputs[i] for x in xs if x.__class__ is tuple}
+            for d in preds:
+                if comb[d] and d != i:
+                    indeg[i] += 1
+                    fanout[d].append(i)
+        ready = deque(i for i in range(n) if comb[i] and indeg[i] == 0)
+        order: List[int] = []
+        while ready:
+            i = ready.popleft()
+            order.append(i)
+            for j in fanout[i]:
+                indeg[j] -= 1
+                if indeg[j] == 0:
+                    ready.append(j)
+        placed = set(order)
+        order.extend(i for i in range(n) if comb[i] and i not in placed)
+        order.extend(i for i in range(n) if not comb[i])
+        self.order = order
+
+    def bit_sig(self, b, sig: List[int]) -> int:
+        d = self.driver.get(b)
+        if d is None:
+            return self.leaf.get(b, FREE)
+        i, ph, k = d
+        return _mix(_mix(sig[i], ph), k)
+
+    def cell_signatures(self, rounds: int = ROUNDS) -> List[int]:
+        sig = list(self.type_sig)
+        comb, inputs, type_sig = self.comb, self.inputs, self.type_sig
+        for _ in range(rounds):
+            prev = sig
+            cur = list(prev)
+            for i in self.order:
+                acc = type_sig[i]
+                for ph, xs in inputs[i]:
+                    acc = ((acc ^ ph) * 0x100000001B3 + 0x9E3779B97F4A7C15) & MASK
+                    for x in xs:
+                        if x.__class__ is tuple:
+                            j, oph, k = x
+                            # sequential drivers contribute their previous-round signature
+                            v = cur[j] if comb[j] else prev[j]
+                            v = ((((v ^ oph) * 0x100000001B3 + 0x9E3779B97F4A7C15) & MASK ^ k)
+                                 * 0x100000001B3 + 0x9E3779B97F4A7C15) & MASK
+                        else:
+                            v = x
+                        acc = ((acc ^ v) * 0x100000001B3 + 0x9E3779B97F4A7C15) & MASK
+                cur[i] = acc
+            sig = cur
+        return sig
+
+    def cone(self, bits: List[Any]) -> List[int]:
+        """Cells in the transitive fan-in of bits (through registers too)."""
+        seen = set()
+        todo = [self.driver[b][0] for b in bits if b in self.driver]
+        inputs = self.inputs
+        while todo:
+            i = todo.pop()
+            if i in seen:
+                continue
+            seen.add(i)
+            for _, xs in inputs[i]:
+                for x in xs:
+                    if x.__class__ is tuple and x[0] not in seen:
+                        todo.append(x[0])
+        return list(seen)
+
+def expr_names(expr: str) -> List[str]:
+    """Signal names referenced by a property expression (lower case)."""
+    names = []
+    for w in IDENT_RE.findall(LITERAL_RE.sub(" ", expr)):
+        w = w.lower()
+        if w not in EXPR_WORDS and w not in names:
+            names.append(w)
+    return names
+
+def signatures(ast, assumes: List[Dict[str, Any]], asserts: List[Dict[str, Any]],
+               rounds: int = ROUNDS, env: List[str] = ()) -> Dict[str, Any]:
+    """Hashed summary of a design used by diff() (JSON-serialisable).
+
+    env: extra environment facts (e.g. VHDL value ranges) hashed into every
+    property along with the assumptions.
+    """
+    g = _Graph(ast, library_hashes(ast) if ast.library else {})
+    sig = g.cell_signatures(rounds)
+    design_sig = sum(sig) & MASK
+
+    ports = {p.name.lower(): p for p in ast.ports or []}
+    cones: Dict[str, int] = {}
+
+    def port_cone(name: str) -> int:
+        if name not in cones:
+            p = ports[name]
+            acc = sum(sig[i] for i in g.cone(p.bits or [])) & MASK
+            for b in p.bits or []:
+                acc = _mix(acc, g.bit_sig(b, sig))
+            cones[name] = acc
+        return cones[name]
+
+    def expr_cone(expr: str) -> int:
+        names = expr_names(expr)
+        if any(n not in ports or ports[n].bits is None for n in names):
+            return design_sig  # internal signal or unknown port: be conservative
+        return _h(tuple(port_cone(n) for n in sorted(names)))
+
+    env_exprs = sorted((a.get("expr") or "").strip() for a in assumes)
+    env_sig = _h(tuple(env_exprs), tuple(expr_cone(e) for e in env_exprs), tuple(sorted(env)))
+    props = {}
+    for a in asserts:
+        expr = (a.get("expr") or "").strip()
+        props[f"assert:{expr}"] = format(_h(expr, env_sig, expr_cone(expr)), "016x")
+
+    return {
+        "ports": {p.name: f"{p.direction}/{p.width}" for p in ast.ports or []},
+        "cells": format(design_sig, "016x"),
+        "cell_count": len(sig),
+        "properties": props,
+    }
+
+def cone_inputs(ast, expr: str) -> Optional[List[str]]:
+    """Input ports in the cone of influence of a property, or None if unknown."""
+    ports = {p.name.lower(): p for p in ast.ports or []}
+    names = expr_names(expr)
+    if any(n not in ports or ports[n].bits is None for n in names):
+        return None
+    g = _Graph(ast, {})
+    bits = set()
+    for n in names:
+        bits.update(ports[n].bits)
+        for i in g.cone(ports[n].bits):
+            for _, ins in g.cells[i].connections.items():
+                bits.update(_bits(ins))
+    return [p.name for p in ast.ports or [] if _is_input(p) and bits.intersection(p.bits or [])]
+
+def diff(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare two signatures(); properties are split by whether their cone changed."""
+    old = old or {"ports": {}, "cells": None, "properties": {}}
+    op, np_ = old.get("ports") or {}, new.get("ports") or {}
+    oprops, nprops = old.get("properties") or {}, new.get("properties") or {}
+    return {
+        "ports_added": sorted(set(np_) - set(op)),
+        "ports_removed": sorted(set(op) - set(np_)),
+        "ports_changed": sorted(n for n in set(op) & set(np_) if op[n] != np_[n]),
+        "cells_changed": old.get("cells") != new.get("cells"),
+        "unchanged": sorted(k for k in nprops if oprops.get(k) == nprops[k]),
+        "changed": sorted(k for k in nprops if k in oprops and oprops[k] != nprops[k]),
+        "added": sorted(k for k in nprops if k not in oprops),
+        "removed": sorted(k for k in oprops if k not in nprops),
+    }
@@ -1,6 +1,6 @@
 """
 Common AST schema for TASK 04 (Objective 5) - AOC.
-Version: aoc-task04-common-ast-v1
+Version: aoc-task04-common-ast-v1 (flat), aoc-task04-common-ast-v2 (hierarchical)
 
 This is intentionally lightweight: it is a unifying IR that can be built from:
   (a) VHDL (entity/ports + property tags)
@@ -11,12 +11,34 @@ The goal is to keep a stable schema that supports:
   - IO discovery (for auxiliary spec + harness generation)
   - Property discovery (assume/assert tags)
   - Structural stats (cell counts) when Yosys is available
+
+Hierarchical form (v2): the top ModuleAST keeps its own ports/wires/cells and
+adds
+  - library:   {module name: ModuleAST} with each submodule definition once
+  - hierarchy: {module name: {submodule name: instance count}}
+Cells whose type is a library module are instances of it. The instance tree
+is implicit in `hierarchy`, so memory grows with unique modules, not with
+instances (see hierarchy.py for counts and flattened stats).
+
+Ports built from a netlist also carry `bits` (the net ids/names of the port,
+LSB first) so cones of influence can start from them (see ast_diff.py); it is
+omitted from the dict when unknown (VHDL-only ports). Cells from a Yosys
+netlist likewise carry their `parameters` (reset values, signedness, clock
+polarity, ...), omitted when there are none.
+
+`ranges` keeps the VHDL value ranges that the Verilog translation loses
+(`integer range 0 to 3` becomes a plain [1:0] vector, an enum becomes its
+binary encoding): one ValueRange per constrained port or internal signal.
+It is omitted from the dict when empty.
 """
 
 from __future__ import annotations
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from typing import Any, Dict, List, Literal, Optional
 
+SCHEMA_V1 = "aoc-task04-common-ast-v1"
+SCHEMA_V2 = "aoc-task04-common-ast-v2"
+
 Direction = Literal["in", "out", "inout"]
 PropKind = Literal["assume", "assert"]
 
@@ -26,6 +48,7 @@ class Port:
     direction: Direction
     vhdl_type: str = ""
     width: int = 1
+    bits: Optional[List[Any]] = None
 
 @dataclass
 class Property:
@@ -34,11 +57,22 @@ class Property:
     msg: str = ""
     source_line: Optional[int] = None
 
+@dataclass
+class ValueRange:
+    signal: str
+    lo: int
+    hi: int
+    kind: Literal["integer", "enum"] = "integer"
+    encoding: Optional[Dict[str, int]] = None  # enum literal -> code
+    port: bool = True                          # False: internal signal
+    netlist_wire: str = ""                     # matching wire in the structural view
+
 @dataclass
 class Cell:
     name: str
     type: str
     connections: Dict[str, Any]  # keep generic
+    parameters: Optional[Dict[str, Any]] = None  # Yosys cell parameters (WIDTH, ARST_VALUE, ...)
 
 @dataclass
 class Wire:
@@ -57,20 +91,36 @@ class ModuleAST:
     cells: List[Cell] = None
     stats: Dict[str, Any] = None
     notes: List[str] = None
+    library: Dict[str, "ModuleAST"] = None
+    hierarchy: Dict[str, Dict[str, int]] = None
+    ranges: List[ValueRange] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
+        d = asdict(replace(self, library=None, hierarchy=None, ranges=None))
         # dataclasses default None lists – normalize
         for k in ["ports", "properties", "wires", "cells", "notes"]:
             if d.get(k) is None:
                 d[k] = []
         if d.get("stats") is None:
             d["stats"] = {}
+        for p in d["ports"]:
+            if p.get("bits") is None:
+                p.pop("bits", None)
+        for c in d["cells"]:
+            if c.get("parameters") is None:
+                c.pop("parameters", None)
+        # flat ASTs keep the v1 layout
+        del d["library"], d["hierarchy"], d["ranges"]
+        if self.ranges:
+            d["ranges"] = [asdict(r) for r in self.ranges]
+        if self.library:
+            d["library"] = {name: m.to_dict() for name, m in self.library.items()}
+            d["hierarchy"] = {name: dict(h) for name, h in (self.hierarchy or {}).items()}
         return d
 
 def new_module_ast(design_name: str) -> ModuleAST:
     return ModuleAST(
-        schema="aoc-task04-common-ast-v1",
+        schema=SCHEMA_V1,
         design_name=design_name,
         ports=[],
         properties=[],
@@ -78,4 +128,5 @@ def new_module_ast(design_name: str) -> ModuleAST:
         cells=[],
         stats={},
         notes=[],
+        ranges=[],
     )
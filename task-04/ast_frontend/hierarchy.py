@@ -0,0 +1,98 @@
+"""
+Hierarchical Common AST helpers (schema v2).
+
+build_hierarchical_ast() takes one ModuleAST per module definition and returns
+the top module with a deduplicated `library` and a `hierarchy` map
+{module: {submodule: instances}}. Design-wide statistics are obtained by
+multiplying each definition's local netlist stats by how many times it is
+instantiated, so nothing is flattened:
+- stats["instance_counts"]: {module: instances in the flattened design}
+- stats["netlist"]:         design-wide totals (same keys as netlist_stats)
+- stats["netlist_local"]:   the top module's own cells only
+logic_depth of the totals is the deepest single module, i.e. a lower bound.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Dict, List
+
+from .common_ast import ModuleAST, SCHEMA_V2
+from .netlist_stats import solver_cost
+
+def instance_counts(top: str, hierarchy: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    """How many times each module reachable from `top` appears once flattened."""
+    # topological order (parents before children) by iterative post-order DFS
+    order: List[str] = []
+    seen = {top}
+    stack = [(top, iter((hierarchy.get(top) or {}).keys()))]
+    while stack:
+        mod, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            order.append(mod)
+            stack.pop()
+        elif child not in seen:
+            seen.add(child)
+            stack.append((child, iter((hierarchy.get(child) or {}).keys())))
+    counts: Dict[str, int] = {m: 0 for m in order}
+    counts[top] = 1
+    for mod in reversed(order):
+        for child, k in (hierarchy.get(mod) or {}).items():
+            counts[child] += counts[mod] * k
+    return counts
+
+def flatten_stats(defs: Dict[str, ModuleAST], counts: Dict[str, int]) -> Dict[str, Any]:
+    types: Counter = Counter()
+    mux: Counter = Counter()
+    adders: Counter = Counter()
+    reg_bits = cells = depth = 0
+    for name, k in counts.items():
+        local = (defs[name].stats or {}).get("netlist") or {}
+        for t, c in (local.get("cell_types") or {}).items():
+            if t in defs:
+                continue  # instance: replaced by the submodule's own cells
+            types[t] += c * k
+            cells += c * k
+        for w, c in (local.get("mux_widths") or {}).items():
+            mux[w] += c * k
+        for w, c in (local.get("adder_widths") or {}).items():
+            adders[w] += c * k
+        reg_bits += local.get("register_bits", 0) * k
+        depth = max(depth, local.get("logic_depth", 0))
+    mux_bits = sum(int(w) * c for w, c in mux.items())
+    arith_bits = sum(int(w) * c for w, c in adders.items())
+    return {
+        "cell_types": dict(sorted(types.items())),
+        "register_bits": reg_bits,
+        "mux_widths": dict(sorted(mux.items(), key=lambda kv: int(kv[0]))),
+        "adder_widths": dict(sorted(adders.items(), key=lambda kv: int(kv[0]))),
+        "logic_depth": depth,
+        "cell_count": cells,
+        "est_solver_cost": solver_cost(cells, mux_bits, arith_bits, reg_bits, depth),
+    }
+
+def build_hierarchical_ast(defs: Dict[str, ModuleAST], top: str) -> ModuleAST:
+    hierarchy = {}
+    for name, m in defs.items():
+        h = Counter(c.type for c in (m.cells or []) if c.type in defs and c.type != name)
+        if h:
+            hierarchy[name] = dict(h)
+
+    top_ast = defs[top]
+    counts = instance_counts(top, hierarchy)
+    if len(counts) == 1:
+        return top_ast  # no submodules: stay v1
+
+    top_ast.schema = SCHEMA_V2
+    top_ast.library = {n: defs[n] for n in counts if n != top}
+    top_ast.hierarchy = {n: h for n, h in hierarchy.items() if n in counts}
+    top_ast.stats["instance_counts"] = {n: c for n, c in counts.items() if n != top}
+    top_ast.stats["netlist_local"] = top_ast.stats.get("netlist", {})
+    top_ast.stats["netlist"] = flatten_stats(defs, counts)
+    return top_ast
+
+def iter_modules(ast: ModuleAST):
+    """Yield (name, ModuleAST) for the top and every library definition."""
+    yield ast.design_name, ast
+    for name, m in (ast.library or {}).items():
+        yield name, m
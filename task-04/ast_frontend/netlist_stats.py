@@ -0,0 +1,128 @@
+"""
+Structural statistics over the Common AST (capacity planning).
+
+Computed from the cells of a ModuleAST (Yosys netlist) with plain counters:
+- cell_types:      histogram {cell type: count}
+- register_bits:   total flip-flop/latch output bits
+- mux_widths:      histogram {output width: count} for $mux/$pmux/$_MUX_
+- adder_widths:    histogram {output width: count} for $add/$sub/$alu/...
+- logic_depth:     longest combinational path in cells (inputs/FF outputs = 0)
+- est_solver_cost: rough relative cost used to schedule the biggest jobs first
+
+Widths come from the length of the output bit lists in the connections, so
+no Yosys parameters are needed. Bits are Yosys ids (ints) or symbolic names
+from the lightweight Verilog parser; "0"/"1"/"x"/"z" are constants. Only
+Yosys internal cells ($...) have known output ports; other instances count
+as sequential boundaries for the depth.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+# output port names of Yosys internal cells
+OUTPUT_PORTS = {"Y", "Q", "CO", "X", "RD_DATA", "CTRL_OUT"}
+MUX_TYPES = {"$mux", "$pmux", "$bmux", "$_MUX_", "$_MUX4_", "$_MUX8_", "$_MUX16_"}
+ARITH_TYPES = {"$add", "$sub", "$alu", "$macc", "$neg", "$mul", "$lcu", "$fa"}
+
+def is_register(cell_type: str) -> bool:
+    t = cell_type.lower()
+    return t == "$ff" or "dff" in t or "latch" in t
+
+CONST_BITS = {"0", "1", "x", "z"}
+
+def _is_net(b) -> bool:
+    return isinstance(b, int) or (isinstance(b, str) and b not in CONST_BITS)
+
+def _bits(conn) -> List[Any]:
+    return conn if isinstance(conn, list) else [conn]
+
+def _out_width(conns: Dict[str, Any]) -> int:
+    for port in ("Y", "Q", "X"):
+        if port in conns:
+            return len(_bits(conns[port]))
+    return 0
+
+def compute_stats(cells: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Statistics for an iterable of (cell type, connections) pairs."""
+    types: Counter = Counter()
+    mux_widths: Counter = Counter()
+    adder_widths: Counter = Counter()
+    reg_bits = 0
+    n = 0
+
+    # combinational graph, indexed by cell position
+    comb: List[bool] = []
+    inputs: List[List[Any]] = []
+    driver: Dict[Any, int] = {}
+
+    for i, (ctype, conns) in enumerate(cells):
+        n += 1
+        conns = conns or {}
+        types[ctype] += 1
+        width = _out_width(conns)
+        seq = is_register(ctype) or not ctype.startswith("$")
+        if is_register(ctype):
+            reg_bits += len(_bits(conns.get("Q", [])))
+        elif ctype in MUX_TYPES:
+            mux_widths[str(width)] += 1
+        elif ctype in ARITH_TYPES:
+            adder_widths[str(width)] += 1
+
+        ins: List[Any] = []
+        for port, bits in conns.items():
+            if port in OUTPUT_PORTS:
+                for b in _bits(bits):
+                    if _is_net(b):
+                        driver[b] = i
+            elif not seq:
+                ins.extend(b for b in _bits(bits) if _is_net(b))
+        comb.append(not seq)
+        inputs.append(ins)
+
+    depth = _logic_depth(comb, inputs, driver)
+    mux_bits = sum(int(w) * c for w, c in mux_widths.items())
+    arith_bits = sum(int(w) * c for w, c in adder_widths.items())
+    return {
+        "cell_types": dict(sorted(types.items())),
+        "register_bits": reg_bits,
+        "mux_widths": dict(sorted(mux_widths.items(), key=lambda kv: int(kv[0]))),
+        "adder_widths": dict(sorted(adder_widths.items(), key=lambda kv: int(kv[0]))),
+        "logic_depth": depth,
+        "cell_count": n,
+        "est_solver_cost": solver_cost(n, mux_bits, arith_bits, reg_bits, depth),
+    }
+
+def solver_cost(cells: int, mux_bits: int, arith_bits: int, reg_bits: int, depth: int) -> int:
+    return (cells + mux_bits + 3 * arith_bits + 2 * reg_bits) * max(1, depth)
+
+def _logic_depth(comb: List[bool], inputs: List[List[Any]], driver: Dict[Any, int]) -> int:
+    """Longest path through combinational cells (Kahn order; loops are ignored)."""
+    n = len(comb)
+    fanin: List[List[int]] = [[] for _ in range(n)]
+    fanout: List[List[int]] = [[] for _ in range(n)]
+    for i in range(n):
+        if not comb[i]:
+            continue
+        preds = {driver[b] for b in inputs[i] if b in driver}
+        for d in preds:
+            if comb[d] and d != i:
+                fanin[i].append(d)
+                fanout[d].append(i)
+
+    indeg = [len(f) for f in fanin]
+    depth = [1 if comb[i] else 0 for i in range(n)]
+    ready = [i for i in range(n) if comb[i] and indeg[i] == 0]
+    best = 0
+    while ready:
+        i = ready.pop()
+        best = max(best, depth[i])
+        for j in fanout[i]:
+            depth[j] = max(depth[j], depth[i] + 1)
+            indeg[j] -= 1
+            if indeg[j] == 0:
+                ready.append(j)
+    return best
+
+def ast_netlist_stats(ast) -> Dict[str, Any]:
+    return compute_stats((c.type, c.connections) for c in (ast.cells or []))
@@ -0,0 +1,80 @@
+"""
+Structural hashes over the Common AST.
+
+module_hash() fingerprints one module definition: its ports (and the nets
+they bind), its cells (type, parameters and connection shape) and,
+Merkle-style, the hashes of the submodules it instantiates; proof_key()
+combines it with a property set. Net ids/names are renumbered, ports first
+and then in a canonical cell order, so renaming internal wires or re-running
+Yosys (new $auto$ names) keeps the hash; any change in cell types, parameters,
+widths, port binding or wiring shape changes it. This is not a full
+graph canonical form: two different but symmetric netlists can collide only
+if they have the same cell multiset and the same connection shape.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+def _bits(conn) -> List[Any]:
+    return conn if isinstance(conn, list) else [conn]
+
+def _cell_key(cell) -> tuple:
+    conns = cell.connections or {}
+    return (cell.type, tuple(sorted((k, str(v)) for k, v in (cell.parameters or {}).items())),
+            tuple(sorted((p, len(_bits(b))) for p, b in conns.items())))
+
+def canonical_module(ast, child_hashes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Name-independent description of a module definition (JSON-serialisable)."""
+    child_hashes = child_hashes or {}
+    net_ids: Dict[Any, int] = {}
+
+    def net(b):
+        if isinstance(b, str) and b in ("0", "1", "x", "z"):
+            return b
+        if b not in net_ids:
+            net_ids[b] = len(net_ids)
+        return net_ids[b]
+
+    # ports first: their bits fix which net is which input/output
+    ports = []
+    for p in ast.ports or []:
+        ports.append([p.name, p.direction, p.width, [net(b) for b in p.bits or []]])
+    cells = []
+    for c in sorted(ast.cells or [], key=_cell_key):
+        ctype = child_hashes.get(c.type, c.type)
+        conns = c.connections or {}
+        params = sorted((k, str(v)) for k, v in (c.parameters or {}).items())
+        cells.append([ctype, params, [[p, [net(b) for b in _bits(conns[p])]] for p in sorted(conns)]])
+    return {"ports": ports, "cells": cells}
+
+def digest(obj: Any) -> str:
+    data = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def module_hash(ast, child_hashes: Optional[Dict[str, str]] = None) -> str:
+    return digest(canonical_module(ast, child_hashes))
+
+def proof_key(struct_hash: str, properties: Iterable[str]) -> str:
+    """Key of a proof: module structure (children included) + its property set."""
+    return digest({"struct": struct_hash, "properties": sorted(properties)})
+
+def library_hashes(top_ast) -> Dict[str, str]:
+    """Structural hash of every module in a (possibly hierarchical) AST, children first."""
+    lib = dict(top_ast.library or {})
+    lib[top_ast.design_name] = top_ast
+    hier = top_ast.hierarchy or {}
+    hashes: Dict[str, str] = {}
+
+    def visit(name: str, stack: tuple):
+        if name in hashes or name in stack:
+            return
+        for child in (hier.get(name) or {}):
+            if child in lib:
+                visit(child, stack + (name,))
+        hashes[name] = module_hash(lib[name], hashes)
+
+    for name in lib:
+        visit(name, ())
+    return hashes
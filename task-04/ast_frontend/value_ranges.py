@@ -0,0 +1,155 @@
+"""
+VHDL value ranges (integer ranges and enum encodings) for the Common AST.
+
+The Verilog translation (GHDL, vhd2vl) keeps only a bit width: `integer range
+0 to 3` becomes [1:0] and `type state_t is (IDLE, RUN, DONE)` becomes a 2-bit
+code, so a solver also explores 4 / 3 on them. This module recovers the
+ranges from the VHDL source and turns them into constraints:
+- verilog_constraint(): SVA-style expression for the SBY wrapper / netlist
+- c_constraint():       C expression for __VERIFIER_assume in the harness
+- map_to_netlist():     binds internal signals to wires of the structural view
+- input_assumes() / internal_assumes(): the Verilog assumes of a spec's ranges
+- inject_assumes():     adds an `always @(*) assume(...)` block to a module
+
+Enum codes follow the declaration order (0, 1, 2, ...), which is what GHDL
+and vhd2vl emit by default.
+"""
+
+from __future__ import annotations
+import re
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+from .common_ast import ValueRange
+
+RANGE_RE = re.compile(r'\brange\s+(-?\d+)\s+(to|downto)\s+(-?\d+)', re.IGNORECASE)
+ENUM_TYPE_RE = re.compile(r'\btype\s+(\w+)\s+is\s*\(([^;]*?)\)\s*;', re.IGNORECASE | re.DOTALL)
+SIGNAL_RE = re.compile(r'^\s*signal\s+([\w\s,]+?)\s*:\s*([^;:=]+)', re.IGNORECASE | re.MULTILINE)
+
+# integer subtypes without an explicit range (GHDL keeps them 32-bit)
+SUBTYPE_RANGES = {"natural": (0, 2**31 - 1), "positive": (1, 2**31 - 1)}
+
+def enum_types(vhdl_text: str) -> Dict[str, List[str]]:
+    """{type name (lower case): [literals]} for every enumeration type declared."""
+    out = {}
+    for m in ENUM_TYPE_RE.finditer(vhdl_text):
+        lits = [x.strip() for x in m.group(2).split(",") if x.strip()]
+        if lits and all(re.fullmatch(r"\w+|'.'", x) for x in lits):
+            out[m.group(1).lower()] = lits
+    return out
+
+def bits_for(lo: int, hi: int) -> int:
+    """Vector width GHDL uses for an integer range (signed when lo < 0)."""
+    if lo < 0:
+        return max((-lo - 1).bit_length(), hi.bit_length()) + 1
+    return max(1, hi.bit_length())
+
+def enum_width(n: int) -> int:
+    return max(1, (n - 1).bit_length())
+
+def value_range(signal: str, vhdl_type: str, enums: Dict[str, List[str]], port: bool = True) -> Optional[ValueRange]:
+    t = vhdl_type.strip().lower()
+    m = RANGE_RE.search(t)
+    if m and ("integer" in t or "natural" in t or "positive" in t or t.startswith("range")):
+        a, b = int(m.group(1)), int(m.group(3))
+        return ValueRange(signal=signal, lo=min(a, b), hi=max(a, b), port=port)
+    if t in SUBTYPE_RANGES:
+        lo, hi = SUBTYPE_RANGES[t]
+        return ValueRange(signal=signal, lo=lo, hi=hi, port=port)
+    lits = enums.get(t)
+    if lits:
+        return ValueRange(signal=signal, lo=0, hi=len(lits) - 1, kind="enum",
+                          encoding={lit: i for i, lit in enumerate(lits)}, port=port)
+    return None
+
+def internal_ranges(vhdl_text: str, enums: Dict[str, List[str]]) -> List[ValueRange]:
+    """Ranges of architecture signals (signal a, b : integer range 0 to 9;)."""
+    out = []
+    for m in SIGNAL_RE.finditer(vhdl_text):
+        for name in m.group(1).split(","):
+            name = name.strip()
+            r = value_range(name, m.group(2), enums, port=False) if name else None
+            if r is not None:
+                out.append(r)
+    return out
+
+def is_trivial(r: ValueRange, width: int) -> bool:
+    """True when the range already covers every value of the vector."""
+    if r.lo < 0:
+        return r.lo <= -(1 << (width - 1)) and r.hi >= (1 << (width - 1)) - 1
+    return r.lo <= 0 and r.hi >= (1 << width) - 1
+
+def verilog_constraint(r: ValueRange, name: str, width: int) -> str:
+    if r.lo < 0:
+        return f"$signed({name}) >= {r.lo} && $signed({name}) <= {r.hi}"
+    if r.lo > 0:
+        return f"{name} >= {r.lo} && {name} <= {r.hi}"
+    return f"{name} <= {r.hi}"
+
+def c_constraint(r: ValueRange, name: str, width: int) -> str:
+    if r.lo < 0:
+        # sign-extend the width-bit pattern held in an unsigned C variable
+        sx = f"((long long)(({name}) ^ (1ULL << {width - 1})) - (1LL << {width - 1}))"
+        return f"{sx} >= {r.lo}LL && {sx} <= {r.hi}LL"
+    if r.lo > 0:
+        return f"{name} >= {r.lo}ULL && {name} <= {r.hi}ULL"
+    return f"{name} <= {r.hi}ULL"
+
+def map_to_netlist(ranges: List[ValueRange], ast) -> List[ValueRange]:
+    """Bind internal-signal ranges to same-named wires of the structural view.
+
+    Port ranges are always kept (the wrapper/harness use the port names);
+    internal ranges with no matching wire are dropped (the signal was
+    optimised away or renamed by the translation).
+    """
+    wires = {w.name.lower(): w for w in (ast.wires or []) if not w.name.startswith("$")}
+    ports = {p.name.lower(): p for p in (ast.ports or [])}
+    out = []
+    for r in ranges:
+        hit = ports.get(r.signal.lower()) if r.port else wires.get(r.signal.lower())
+        if hit is not None:
+            r = replace(r, netlist_wire=hit.name)
+        if hit is not None or r.port:
+            out.append(r)
+    return out
+
+def width_of(ast, name: str) -> int:
+    for p in ast.ports or []:
+        if p.name == name:
+            return p.width
+    for w in ast.wires or []:
+        if w.name == name:
+            return w.width
+    return 1
+
+def internal_assumes(ranges: List[Dict], ast) -> List[str]:
+    """Verilog assumes for internal-signal ranges (spec dicts) found in ast's wires."""
+    internal = [ValueRange(**r) for r in ranges if not r.get("port", True)]
+    out = []
+    for r in map_to_netlist(internal, ast):
+        width = width_of(ast, r.netlist_wire)
+        if not is_trivial(r, width):
+            out.append(verilog_constraint(r, r.netlist_wire, width))
+    return out
+
+def input_assumes(ranges: List[Dict], inputs: List[Dict]) -> List[str]:
+    """Verilog assumes for input-port ranges (spec dicts) of the spec's input ports."""
+    widths = {p["name"].lower(): (p["name"], int(p.get("width", 1))) for p in inputs}
+    out = []
+    for r in (ValueRange(**d) for d in ranges if d.get("port", True)):
+        hit = widths.get(r.signal.lower())
+        if hit is not None and not is_trivial(r, hit[1]):
+            out.append(verilog_constraint(r, hit[0], hit[1]))
+    return out
+
+def inject_assumes(verilog_text: str, module: str, exprs: List[str]) -> str:
+    """Add `always @(*) assume(...)` for exprs before the endmodule of `module`."""
+    if not exprs:
+        return verilog_text
+    m = re.search(r'\bmodule\s+' + re.escape(module) + r'\b.*?\bendmodule\b', verilog_text, re.DOTALL)
+    if not m:
+        return verilog_text
+    block = "  // VHDL value ranges lost in translation\n  always @(*) begin\n" + \
+            "".join(f"    assume ({e});\n" for e in exprs) + "  end\n"
+    end = m.end() - len("endmodule")
+    return verilog_text[:end] + block + verilog_text[end:]
@@ -0,0 +1,326 @@
+"""
+Lightweight Verilog netlist parser -> Common AST (no Yosys needed).
+
+Meant for the netlists already in the tree (Yosys `write_verilog` output such
+as inputs_verilog/elaborado*.v and GHDL `--out=verilog` output such as
+Novo_repo/verilog_out*). This is NOT a full Verilog parser; in one pass over
+the statements of each module it extracts:
+- module header and ports (ANSI or non-ANSI, [msb:lsb] widths)
+- wire/reg declarations (memories are skipped)
+- continuous assigns and combinational always assignments, as cells typed
+  after the main operator of the right-hand side ($mux, $add, $sub, ... or
+  $pos for a copy of constants/concatenations); a plain `assign a = b` copy
+  of one signal is a net alias instead, as in Yosys: a's bits are merged
+  into b's
+- clocked always assignments, as $dff cells (Q = left-hand side)
+- module instances with named connections
+
+The result has the same shape as yosys_json_to_ast(), including the
+hierarchical module library when a file defines submodules. Cell connections
+use symbolic bit names ("sig[3]") instead of Yosys bit ids, which is enough
+for widths, counts and the netlist statistics.
+"""
+
+from __future__ import annotations
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .common_ast import new_module_ast, Port, Wire, Cell
+from .netlist_stats import ast_netlist_stats
+from .hierarchy import build_hierarchical_ast
+
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/|\(\*.*?\*\)', re.DOTALL)
+MODULE_RE = re.compile(r'\bmodule\s+(\w+)\s*(?:#\s*\((?:[^()]|\([^()]*\))*\)\s*)?(?:\((.*?)\))?\s*;(.*?)\bendmodule\b', re.DOTALL)
+RANGE_RE = re.compile(r'\[\s*(-?\d+)\s*:\s*(-?\d+)\s*\]')
+DECL_RE = re.compile(r'^(input|output|inout|wire|reg|logic|integer)\b\s*(.*)$', re.DOTALL)
+ASSIGN_RE = re.compile(r'^assign\s+(.+?)\s*=\s*(.+)$', re.DOTALL)
+PROC_ASSIGN_RE = re.compile(r'^([\w\[\]:\s.{},]+?)\s*(<=|=)\s*(.+)$', re.DOTALL)
+INSTANCE_RE = re.compile(r'^(\w+)\s*(?:#\s*\((?:[^()]|\([^()]*\))*\)\s*)?(\w+)\s*\((.*)\)$', re.DOTALL)
+NAMED_CONN_RE = re.compile(r'\.(\w+)\s*\(\s*(.*?)\s*\)\s*(?:,|$)', re.DOTALL)
+LABEL_RE = re.compile(r"^(?:default|[\w'\s,]+?)\s*:(?!=)\s*")
+SIGNAL_RE = re.compile(r'^[A-Za-z_]\w*(?:\s*\[\s*-?\d+\s*(?::\s*-?\d+\s*)?\])?$')
+
+KEYWORDS = {"begin", "end", "if", "else", "case", "casez", "casex", "endcase", "posedge",
+            "negedge", "or", "and", "not", "signed", "default"}
+
+# first matching operator wins; the order roughly follows what Yosys would keep
+OPERATORS = [
+    ("?", "$mux"), ("+", "$add"), ("*", "$mul"), ("==", "$eq"), ("!=", "$ne"),
+    ("<<", "$shl"), (">>", "$shr"), ("<=", "$le"), (">=", "$ge"), ("<", "$lt"),
+    (">", "$gt"), ("-", "$sub"), ("&&", "$logic_and"), ("||", "$logic_or"),
+    ("&", "$and"), ("|", "$or"), ("^", "$xor"), ("~", "$not"), ("!", "$logic_not"),
+]
+
+def _skip_parens(s: str, i: int) -> int:
+    """Index just past the parenthesised group starting at s[i] == '('."""
+    depth = 0
+    for j in range(i, len(s)):
+        if s[j] == "(":
+            depth += 1
+        elif s[j] == ")":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(s)
+
+def _strip_word(s: str, word: str) -> Optional[str]:
+    if s.startswith(word) and (len(s) == len(word) or not (s[len(word)].isalnum() or s[len(word)] == "_")):
+        return s[len(word):].lstrip()
+    return None
+
+def _op_type(rhs: str) -> str:
+    # ignore operators inside sized constants / indices, e.g. 8'h12, a[3:0]
+    body = re.sub(r"\d+'[sS]?[bodhBODH][0-9a-fA-FxXzZ_?]+|\[[^\]]*\]", " ", rhs)
+    for op, ctype in OPERATORS:
+        if op == "-" and not re.search(r'\w\s*-', body):
+            continue  # unary minus
+        if op in body:
+            return ctype
+    return "$pos"
+
+class _Module:
+    def __init__(self, name: str):
+        self.name = name
+        self.ports: Dict[str, str] = {}        # name -> direction
+        self.port_order: List[str] = []
+        self.widths: Dict[str, Tuple[int, int]] = {}  # name -> (msb, lsb)
+        self.wire_order: List[str] = []
+        self.cells: List[Cell] = []
+        self.regs: Dict[str, Cell] = {}        # lhs -> $dff cell (if/else branches share one)
+        self.alias: Dict[str, str] = {}        # bit -> bit it was merged into (plain assigns)
+
+    def declare(self, kind: str, rest: str):
+        m = RANGE_RE.search(rest)
+        msb, lsb = (int(m.group(1)), int(m.group(2))) if m else ((31, 0) if kind == "integer" else (0, 0))
+        rest = RANGE_RE.sub(" ", rest, count=1) if m else rest
+        rest = re.sub(r'\b(wire|reg|logic|signed|unsigned)\b', " ", rest)
+        for item in rest.split(","):
+            item = item.split("=", 1)[0].strip()
+            if not item:
+                continue
+            if "[" in item:
+                continue  # memory: reg [3:0] mem [0:7]
+            name = item.split()[0]
+            if kind in ("input", "output", "inout"):
+                if name not in self.port_order:
+                    self.port_order.append(name)
+                self.ports[name] = kind
+                self.widths[name] = (msb, lsb)
+            elif name not in self.ports:
+                self.widths[name] = (msb, lsb)
+            if name not in self.wire_order:
+                self.wire_order.append(name)
+
+    def width(self, name: str) -> int:
+        msb, lsb = self.widths.get(name, (0, 0))
+        return abs(msb - lsb) + 1
+
+    def bits(self, expr: str) -> List[str]:
+        """Symbolic bits of every signal referenced in expr (constants dropped)."""
+        out: List[str] = []
+        for m in re.finditer(r'\b([A-Za-z_]\w*)\b(\s*\[\s*(-?\d+)\s*(?::\s*(-?\d+)\s*)?\])?', expr):
+            name = m.group(1)
+            if name in KEYWORDS or name not in self.widths:
+                continue
+            if m.group(3) is not None:
+                a = int(m.group(3))
+                b = int(m.group(4)) if m.group(4) is not None else a
+                lo, hi = min(a, b), max(a, b)
+                out.extend(f"{name}[{i}]" for i in range(lo, hi + 1))
+            else:
+                msb, lsb = self.widths[name]
+                lo, hi = min(msb, lsb), max(msb, lsb)
+                out.extend(f"{name}[{i}]" for i in range(lo, hi + 1))
+        return out
+
+    def net(self, bit: str) -> str:
+        while bit in self.alias:
+            bit = self.alias[bit]
+        return bit
+
+    def add_alias(self, lhs: str, rhs: str) -> bool:
+        """Merge the bits of a plain `assign lhs = rhs` copy; False when it is not one."""
+        if not (SIGNAL_RE.match(lhs.strip()) and SIGNAL_RE.match(rhs.strip())):
+            return False
+        dst, src = self.bits(lhs), self.bits(rhs)
+        if not dst or len(dst) != len(src):
+            return False
+        for d, s in zip(dst, src):
+            d, s = self.net(d), self.net(s)
+            if d != s:
+                self.alias[d] = s
+        return True
+
+    def add_cell(self, ctype: str, lhs: str, rhs: str):
+        if ctype == "$dff":
+            key = re.sub(r'\s+', "", lhs)
+            reg = self.regs.get(key)
+            if reg is not None:
+                reg.connections["D"].extend(b for b in self.bits(rhs) if b not in reg.connections["D"])
+                return
+        n = len(self.cells)
+        out_port = "Q" if ctype == "$dff" else "Y"
+        in_port = "D" if ctype == "$dff" else "A"
+        cell = Cell(name=f"${ctype[1:]}${n}", type=ctype,
+                    connections={in_port: self.bits(rhs), out_port: self.bits(lhs)})
+        self.cells.append(cell)
+        if ctype == "$dff":
+            self.regs[key] = cell
+
+def _header(mod: _Module, header: str):
+    if not re.search(r'\b(input|output|inout)\b', header):
+        for name in header.split(","):
+            name = name.strip()
+            if name:
+                mod.port_order.append(name)
+        return
+    # ANSI: direction/range carry over to the following names
+    kind, rng = "input", ""
+    for part in header.split(","):
+        part = part.strip()
+        m = re.match(r'^(input|output|inout)\b\s*(.*)$', part, re.DOTALL)
+        if m:
+            kind = m.group(1)
+            rest = m.group(2)
+            r = RANGE_RE.search(rest)
+            rng = r.group(0) if r else ""
+        else:
+            rest = f"{rng} {part}" if not RANGE_RE.search(part) else part
+        mod.declare(kind, rest)
+
+def _body(mod: _Module, body: str):
+    blk = None          # None | "seq" | "comb" | "init"
+    depth = 0
+    blk_used = False
+    for stmt in body.split(";"):
+        s = stmt.strip()
+        if blk and depth == 0 and blk_used and not s.startswith("else"):
+            blk = None
+        while s:
+            if s.startswith("endcase"):
+                s = s[len("endcase"):].lstrip()
+                continue
+            r = _strip_word(s, "end")
+            if r is not None:
+                depth -= 1
+                if depth <= 0:
+                    depth = 0
+                    if blk_used:
+                        blk = None
+                s = r
+                continue
+            r = _strip_word(s, "always") or _strip_word(s, "always_ff") or _strip_word(s, "always_comb")
+            if r is not None:
+                sens = ""
+                if r.startswith("@"):
+                    r = r[1:].lstrip()
+                    if r.startswith("("):
+                        j = _skip_parens(r, 0)
+                        sens, r = r[:j], r[j:].lstrip()
+                    elif r.startswith("*"):
+                        r = r[1:].lstrip()
+                blk = "seq" if ("posedge" in sens or "negedge" in sens or s.startswith("always_ff")) else "comb"
+                depth, blk_used, s = 0, False, r
+                continue
+            r = _strip_word(s, "initial")
+            if r is not None:
+                blk, depth, blk_used, s = "init", 0, False, r
+                continue
+            r = _strip_word(s, "begin")
+            if r is not None:
+                depth += 1
+                s = re.sub(r'^:\s*\w+', "", r).lstrip()
+                continue
+            r = _strip_word(s, "else")
+            if r is not None:
+                s = r
+                continue
+            matched = False
+            for kw in ("if", "case", "casez", "casex"):
+                r = _strip_word(s, kw)
+                if r is not None and r.startswith("("):
+                    s = r[_skip_parens(r, 0):].lstrip()
+                    matched = True
+                    break
+            if matched:
+                continue
+            if blk and LABEL_RE.match(s) and not ASSIGN_RE.match(s):
+                lm = LABEL_RE.match(s)
+                if "?" not in s[:lm.end()]:
+                    s = s[lm.end():]
+                    continue
+            break
+        if not s or s == "endmodule":
+            continue
+
+        m = DECL_RE.match(s)
+        if m:
+            mod.declare(m.group(1), m.group(2))
+            continue
+        m = ASSIGN_RE.match(s)
+        if m:
+            ctype = _op_type(m.group(2))
+            if ctype != "$pos" or not mod.add_alias(m.group(1), m.group(2)):
+                mod.add_cell(ctype, m.group(1), m.group(2))
+            continue
+        if blk:
+            m = PROC_ASSIGN_RE.match(s)
+            if m:
+                blk_used = True
+                if blk == "seq":
+                    mod.add_cell("$dff", m.group(1), m.group(3))
+                elif blk == "comb":
+                    mod.add_cell(_op_type(m.group(3)), m.group(1), m.group(3))
+                continue
+        m = INSTANCE_RE.match(s)
+        if m and m.group(1) not in KEYWORDS:
+            conns = {pm.group(1): mod.bits(pm.group(2)) for pm in NAMED_CONN_RE.finditer(m.group(3))}
+            mod.cells.append(Cell(name=m.group(2), type=m.group(1), connections=conns))
+
+def parse_verilog_modules(txt: str) -> List[_Module]:
+    txt = COMMENT_RE.sub(" ", txt)
+    mods = []
+    for m in MODULE_RE.finditer(txt):
+        mod = _Module(m.group(1))
+        _header(mod, m.group(2) or "")
+        _body(mod, m.group(3))
+        mods.append(mod)
+    return mods
+
+def _module_to_ast(mod: _Module, verilog_path: Path):
+    ast = new_module_ast(mod.name)
+    ast.source_verilog = str(verilog_path)
+    for name in mod.port_order:
+        ast.ports.append(Port(name=name, direction=mod.ports.get(name, "input"), width=mod.width(name),
+                              bits=[mod.net(b) for b in mod.bits(name)]))
+    for name in mod.wire_order:
+        ast.wires.append(Wire(name=name, width=mod.width(name)))
+    if mod.alias:
+        for c in mod.cells:
+            c.connections = {p: [mod.net(b) for b in bits] for p, bits in c.connections.items()}
+    ast.cells = mod.cells
+
+    ast.stats["cell_count"] = len(ast.cells)
+    ast.stats["wire_count"] = len(ast.wires)
+    ast.stats["netlist"] = ast_netlist_stats(ast)
+    return ast
+
+def verilog_to_ast(verilog_path: Path, design_name: str | None = None, hierarchical: bool = True):
+    txt = verilog_path.read_text(encoding="utf-8", errors="replace")
+    mods = parse_verilog_modules(txt)
+    if not mods:
+        ast = new_module_ast(design_name or verilog_path.stem)
+        ast.notes.append("No modules found in verilog.")
+        return ast
+
+    by_name = {m.name: m for m in mods}
+    top = design_name if design_name in by_name else mods[0].name
+    if not hierarchical:
+        ast = _module_to_ast(by_name[top], verilog_path)
+    else:
+        defs = {m.name: _module_to_ast(m, verilog_path) for m in mods}
+        ast = build_hierarchical_ast(defs, top)
+    ast.stats = {"verilog_top": top, **ast.stats}
+    ast.notes.append("Structural view from the lightweight Verilog parser (no yosys).")
+    return ast
@@ -2,9 +2,10 @@
 Lightweight VHDL parser for TASK 04 Objective 5.
 
 This is NOT a full VHDL parser. It intentionally focuses on:
-- entity name
+- entity name (several entities per file: parse_vhdl_entities, one AST each)
 - port declarations (name : in/out type)
 - detection of clocked processes (rising_edge/falling_edge or sensitivity list 'clk')
+- value ranges of integer/enum ports and signals (see value_ranges.py)
 - property tags in comments:
     -- @c2vhdl:ASSUME <expr>;
     -- @c2vhdl:ASSERT <expr>;
@@ -13,9 +14,11 @@ This is NOT a full VHDL parser. It intentionally focuses on:
 from __future__ import annotations
 import re
 from pathlib import Path
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
 
+from discovery import vhdl_units
 from .common_ast import new_module_ast, Port, Property
+from .value_ranges import enum_types, value_range, internal_ranges, bits_for, enum_width
 
 ENTITY_RE = re.compile(r'\bentity\s+(\w+)\s+is\b', re.IGNORECASE)
 PORT_BLOCK_RE = re.compile(r'\bport\s*\((.*?)\)\s*;', re.IGNORECASE | re.DOTALL)
@@ -23,7 +26,7 @@ PORT_LINE_RE = re.compile(r'^\s*(\w+)\s*:\s*(in|out|inout)\s+([^;]+);', re.IGNOR
 
 TAG_RE = re.compile(r'--\s*@c2vhdl:(ASSUME|ASSERT)\s*(.*?);?\s*$', re.IGNORECASE)
 
-def _width_from_vhdl_type(vhdl_type: str) -> int:
+def _width_from_vhdl_type(vhdl_type: str, enums: Dict[str, List[str]] | None = None) -> int:
     t = vhdl_type.lower()
     # std_logic_vector(7 downto 0) / (0 to 7)
     m = re.search(r'\((\s*\d+)\s*(downto|to)\s*(\d+)\s*\)', t)
@@ -33,25 +36,37 @@ def _width_from_vhdl_type(vhdl_type: str) -> int:
     if "std_logic_vector" in t:
         # unknown range
         return 1
+    r = value_range("", t, enums or {})
+    if r is not None:
+        if r.kind == "enum":
+            return enum_width(len(r.encoding))
+        if "range" in t:
+            return bits_for(r.lo, r.hi)
+        return 32  # natural/positive
     if "integer" in t:
-        # if range present, estimate bits (conservative)
-        rm = re.search(r'range\s+(\d+)\s+to\s+(\d+)', t)
-        if rm:
-            end = int(rm.group(2))
-            bits = 1
-            while (2**bits) <= end:
-                bits += 1
-            return max(1, bits)
         return 32
     return 1
 
 def parse_vhdl_to_ast(vhdl_path: Path):
+    """AST of the first entity of the file (the whole file when it has none)."""
     txt = vhdl_path.read_text(encoding="utf-8", errors="replace")
+    units = vhdl_units(txt)
+    return parse_vhdl_text(units[0][1] if units else txt, vhdl_path)
+
+def parse_vhdl_entities(vhdl_path: Path, txt: Optional[str] = None) -> List[Any]:
+    """One AST per entity of the file, in file order (`txt` if already read)."""
+    if txt is None:
+        txt = vhdl_path.read_text(encoding="utf-8", errors="replace")
+    return [parse_vhdl_text(unit, vhdl_path) for _, unit in vhdl_units(txt)]
+
+def parse_vhdl_text(txt: str, vhdl_path: Path):
+    """AST of one design unit text (see discovery.vhdl_units)."""
     ent = ENTITY_RE.search(txt)
     design = ent.group(1) if ent else vhdl_path.stem
 
     ast = new_module_ast(design)
     ast.source_vhdl = str(vhdl_path)
+    enums = enum_types(txt)
 
     # Ports
     port_block = PORT_BLOCK_RE.search(txt)
@@ -59,15 +74,22 @@ def parse_vhdl_to_ast(vhdl_path: Path):
         block = port_block.group(1)
         for m in PORT_LINE_RE.finditer(block):
             name, direction, vtype = m.group(1), m.group(2).lower(), m.group(3).strip()
-            width = _width_from_vhdl_type(vtype)
+            width = _width_from_vhdl_type(vtype, enums)
             ast.ports.append(Port(name=name, direction=direction, vhdl_type=vtype, width=width))
     else:
         # fallback: scan entire file
         for m in PORT_LINE_RE.finditer(txt):
             name, direction, vtype = m.group(1), m.group(2).lower(), m.group(3).strip()
-            width = _width_from_vhdl_type(vtype)
+            width = _width_from_vhdl_type(vtype, enums)
             ast.ports.append(Port(name=name, direction=direction, vhdl_type=vtype, width=width))
 
+    # Value ranges (ports first, then architecture signals)
+    for p in ast.ports:
+        r = value_range(p.name, p.vhdl_type, enums)
+        if r is not None:
+            ast.ranges.append(r)
+    ast.ranges.extend(internal_ranges(txt, enums))
+
     # Properties (tags)
     for i, line in enumerate(txt.splitlines(), start=1):
         tm = TAG_RE.search(line)
@@ -5,7 +5,12 @@ Input: Yosys write_json output.
 We extract:
 - module ports (direction, width via bits list length)
 - wires (name, width)
-- cells (type, connections)
+- cells (type, connections, parameters)
+- netlist statistics (see netlist_stats.py) under stats["netlist"]
+
+With hierarchical=True (default) every module reachable from the top is kept
+once in a module library (schema v2, see hierarchy.py) instead of dropping
+everything but the top.
 """
 
 from __future__ import annotations
@@ -14,8 +19,20 @@ from pathlib import Path
 from typing import Dict, Any
 
 from .common_ast import new_module_ast, Port, Wire, Cell
+from .netlist_stats import ast_netlist_stats
+from .hierarchy import build_hierarchical_ast
+
+def _pick_top(modules: Dict[str, Any], design_name: str | None) -> str:
+    if design_name in modules:
+        return design_name
+    for name, mod in modules.items():
+        top = (mod.get("attributes") or {}).get("top")
+        if top and str(top).strip("0"):
+            return name
+    # pick first module if top not provided
+    return next(iter(modules.keys()))
 
-def yosys_json_to_ast(yosys_json_path: Path, design_name: str | None = None):
+def yosys_json_to_ast(yosys_json_path: Path, design_name: str | None = None, hierarchical: bool = True):
     data = json.loads(yosys_json_path.read_text(encoding="utf-8", errors="replace"))
     modules = data.get("modules", {})
     if not modules:
@@ -23,11 +40,17 @@ def yosys_json_to_ast(yosys_json_path: Path, design_name: str | None = None):
         ast.notes.append("No modules found in yosys json.")
         return ast
 
-    # pick first module if top not provided
-    top_name = design_name if design_name in modules else next(iter(modules.keys()))
-    mod = modules[top_name]
-    ast = new_module_ast(top_name)
-    ast.stats["yosys_top"] = top_name
+    top_name = _pick_top(modules, design_name)
+    if not hierarchical:
+        ast = _module_to_ast(top_name, modules[top_name], yosys_json_path)
+    else:
+        defs = {name: _module_to_ast(name, mod, yosys_json_path) for name, mod in modules.items()}
+        ast = build_hierarchical_ast(defs, top_name)
+    ast.stats = {"yosys_top": top_name, **ast.stats}
+    return ast
+
+def _module_to_ast(name: str, mod: Dict[str, Any], yosys_json_path: Path):
+    ast = new_module_ast(name)
     ast.source_verilog = str(yosys_json_path)
 
     # Ports
@@ -35,7 +58,8 @@ def yosys_json_to_ast(yosys_json_path: Path, design_name: str | None = None):
         direction = pinfo.get("direction", "in")
         bits = pinfo.get("bits", [])
         width = len(bits) if isinstance(bits, list) else 1
-        ast.ports.append(Port(name=pname, direction=direction, width=max(1, width)))
+        ast.ports.append(Port(name=pname, direction=direction, width=max(1, width),
+                              bits=bits if isinstance(bits, list) else None))
 
     # Wires
     for wname, winfo in (mod.get("netnames") or {}).items():
@@ -48,8 +72,10 @@ def yosys_json_to_ast(yosys_json_path: Path, design_name: str | None = None):
     for cname, cinfo in cells.items():
         ctype = cinfo.get("type", "")
         conn = cinfo.get("connections", {})
-        ast.cells.append(Cell(name=cname, type=ctype, connections=conn))
+        ast.cells.append(Cell(name=cname, type=ctype, connections=conn,
+                              parameters=dict(cinfo.get("parameters") or {}) or None))
 
     ast.stats["cell_count"] = len(ast.cells)
     ast.stats["wire_count"] = len(ast.wires)
+    ast.stats["netlist"] = ast_netlist_stats(ast)
     return ast
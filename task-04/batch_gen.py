@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Batched generation of the per-entity verification artifacts.
+
+run_task04.py and inicio_auto.py generate them inside their per-design loops,
+one entity per VHDL file. This renders, for every entity of a tree (several
+per file are fine, see discovery.vhdl_units), in one pass:
+
+    specs/<E>.json                              run_task04.extract_spec_from_ast
+    generated/harness/<E>_harness.c             run_task04.render_harness_c
+    generated/wrappers/verif_<E>.sv, <E>.sby    inicio_auto renderers (ghdl flow)
+
+Each file is read and split into units once; the Common AST parser and
+inicio_auto's port/tag parser both run on the in-memory unit text. The
+harness uses the design's netlist AST when a previous run left one (same
+lookup as run_task04), so both write the same text. Everything is rendered
+first and then written with discovery.write_if_changed: an unchanged artifact
+keeps its mtime, so --changed-only, the incremental steps, make or sby see
+nothing new downstream.
+
+Usage:
+  python3 task04/batch_gen.py --in task04/inputs_vhdl --out task04
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from discovery import DEFAULT_IGNORE, walk, vhdl_units, write_if_changed
+from ast_frontend.vhdl_light_parser import parse_vhdl_text
+from inicio_auto import parse_vhdl_text as parse_vhdl_info, render_verification_wrapper, render_sby_config
+from run_task04 import extract_spec_from_ast, render_harness_c, netlist_ast
+
+def render_all(vhdl_files: Iterable[Path], out: Path) -> Tuple[List[Tuple[Path, str]], Dict[str, Any]]:
+    """([(path, text)] for every artifact of every entity, report); nothing is written."""
+    files: List[Tuple[Path, str]] = []
+    seen: Dict[str, str] = {}
+    report: Dict[str, Any] = {"entities": [], "duplicates": [], "errors": []}
+    wrappers = out / "generated" / "wrappers"
+    for vf in vhdl_files:
+        try:
+            units = vhdl_units(vf.read_text(encoding="utf-8", errors="replace"))
+        except OSError as e:
+            report["errors"].append({"vhdl": str(vf), "error": str(e)})
+            continue
+        for name, unit in units:
+            if name.lower() in seen:
+                # artifacts are named after the entity: the first one wins
+                report["duplicates"].append({"entity": name, "vhdl": str(vf), "kept": seen[name.lower()]})
+                continue
+            seen[name.lower()] = str(vf)
+            spec = extract_spec_from_ast(parse_vhdl_text(unit, vf))
+            design = spec["design_name"]
+            y_ast, _ = netlist_ast(design, out / "generated" / "yosys_json" / f"{design}.json",
+                                   out / "generated" / "verilog_prep" / f"{design}_prep.v",
+                                   out / "generated" / "verilog" / f"{design}.v")
+            info = parse_vhdl_info(unit)
+            wrapper_name, sv_text = render_verification_wrapper(info)
+            sv_name = f"verif_{design}.sv"
+            files += [
+                (out / "specs" / f"{design}.json", json.dumps(spec, indent=2)),
+                (out / "generated" / "harness" / f"{design}_harness.c", render_harness_c(spec, y_ast)),
+                (wrappers / sv_name, sv_text),
+                (wrappers / f"{design}.sby",
+                 render_sby_config(os.path.relpath(vf.resolve(), wrappers.resolve()), sv_name, wrapper_name, info)),
+            ]
+            report["entities"].append({"entity": design, "vhdl": str(vf)})
+    return files, report
+
+def generate(vhdl_files: Iterable[Path], out: Path) -> Dict[str, Any]:
+    """Render every artifact, then write the ones whose content changed."""
+    (out / "generated" / "wrappers").mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    files, report = render_all(vhdl_files, out)
+    changed = [str(p) for p, text in files if write_if_changed(p, text)]
+    report.update({"files": len(files), "written": changed, "seconds": round(time.perf_counter() - t0, 3)})
+    return report
+
+def main():
+    ap = argparse.ArgumentParser(description="Render specs, harnesses and sby wrappers for every entity.")
+    ap.add_argument("--in", dest="inp", required=True, help="Input folder (VHDL files)")
+    ap.add_argument("--out", dest="out", required=True, help="Output root (task04 folder)")
+    ap.add_argument("--ignore", action="append", default=[], help="Extra fnmatch pattern to skip during discovery")
+    ap.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = ap.parse_args()
+
+    found = walk([Path(args.inp)], (".vhd", ".vhdl"), ignore=tuple(DEFAULT_IGNORE) + tuple(args.ignore))
+    if not found:
+        raise SystemExit(f"No VHDL found under: {args.inp}")
+    report = generate([Path(fi.path) for fi in found], Path(args.out))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{len(report['entities'])} entities in {len(found)} files: "
+          f"{len(report['written'])} of {report['files']} artifacts written ({report['seconds']} s)")
+    for d in report["duplicates"]:
+        print(f"  duplicate entity {d['entity']} in {d['vhdl']} (kept {d['kept']})")
+    for e in report["errors"]:
+        print(f"  {e['vhdl']}: {e['error']}")
+
+if __name__ == "__main__":
+    main()
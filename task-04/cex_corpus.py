@@ -0,0 +1,146 @@
+"""
+Per-design corpus of past counterexamples, replayed before the formal steps.
+
+Every failing sby/ESBMC run leaves a counterexample; this module keeps their
+input sequences in results/corpus/<design>.json so later runs can replay
+them on the natively compiled v2c model (native_sim.py) in milliseconds and
+flag a re-introduced bug before any solver is started.
+
+A case is the sequence of input vectors of one counterexample, one row per
+step (clock cycle for clocked designs). The clock itself is not part of a
+case: vcd_trace samples sby traces on its rising edges, and native_sim holds
+the model's clock input at native_sim.CLOCK_LEVEL on every call, one call per
+step, both for random vectors and for replay:
+
+    {"id": "<hash of the vectors>", "source": "sby" | "esbmc", "assert": ...,
+     "inputs": [port names], "vectors": [[v, ...], ...], "added_at": ...}
+
+- from_trace():  rows from a vcd_trace.py summary (init + change lists)
+- from_esbmc():  rows from the assignments of an ESBMC [Counterexample]
+- replay():      runs every case; a case regresses when the model raises an
+                 assert violation (model assert or combinational spec ASSERT)
+
+The model's internal state is not reset between cases (v2c keeps registers in
+statics); sby traces start with the reset sequence they were found with, so
+a case reproduces its own initial state when it drives the reset input.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import re
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MAX_CASES = 256  # oldest cases are dropped past this, per design
+
+ESBMC_CEX_RE = re.compile(r'^\[Counterexample\]', re.MULTILINE)
+ESBMC_ASSIGN_RE = re.compile(r'^\s*(?:\w+::)*(\w+)(?:@\S*)?\s*=\s*(-?\d+)\b', re.MULTILINE)
+ESBMC_VIOLATED_RE = re.compile(r'Violated property:\s*\n(?:.*\n)?\s*(.+)')
+
+def _case_id(inputs: List[str], vectors: List[List[int]]) -> str:
+    return hashlib.sha256(json.dumps([inputs, vectors]).encode("utf-8")).hexdigest()[:16]
+
+def from_trace(trace: Dict[str, Any], inputs: List[str]) -> Optional[Dict[str, Any]]:
+    """Case from a vcd_trace summary; inputs missing from the trace are held at 0."""
+    steps = int(trace.get("steps") or 0)
+    if steps <= 0:
+        return None
+    inputs = [n for n in inputs if n != trace.get("clock")]  # implicit in the steps
+    signals = trace.get("signals") or {}
+    constant = trace.get("constant") or {}
+    cols = []
+    for name in inputs:
+        s = signals.get(name)
+        col, v = [], (s or {}).get("init") if s else constant.get(name)
+        changes = iter((s or {}).get("changes", []))
+        nxt = next(changes, None)
+        for k in range(steps):
+            while nxt is not None and nxt[0] <= k:
+                v = nxt[1]
+                nxt = next(changes, None)
+            col.append(v or 0)  # x/z inputs: any value reproduces, use 0
+        cols.append(col)
+    vectors = [list(row) for row in zip(*cols)] if cols else [[] for _ in range(steps)]
+    return {"id": _case_id(inputs, vectors), "source": "sby", "assert": trace.get("assert", ""),
+            "inputs": list(inputs), "vectors": vectors}
+
+def from_esbmc(stdout: str, inputs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Case from ESBMC's counterexample: nondet values assigned to the harness inputs.
+
+    A second assignment to an input already set starts the next step (harnesses
+    that call the model in a loop); inputs not assigned in a step keep their
+    previous value.
+    """
+    m = ESBMC_CEX_RE.search(stdout)
+    if not m:
+        return None
+    names = [p["name"] for p in inputs]
+    masks = {p["name"]: (1 << int(p.get("width", 1))) - 1 for p in inputs}
+    vectors: List[List[int]] = []
+    cur: Dict[str, int] = {}
+    assigned = set()
+    for am in ESBMC_ASSIGN_RE.finditer(stdout, m.end()):
+        name, val = am.group(1), int(am.group(2))
+        if name not in masks:
+            continue
+        if name in assigned:
+            vectors.append([cur.get(n, 0) for n in names])
+            assigned = set()
+        cur[name] = val & masks[name]
+        assigned.add(name)
+    if not cur and not vectors:
+        return None
+    vectors.append([cur.get(n, 0) for n in names])
+    vm = ESBMC_VIOLATED_RE.search(stdout, m.end())
+    return {"id": _case_id(names, vectors), "source": "esbmc", "assert": vm.group(1).strip() if vm else "",
+            "inputs": names, "vectors": vectors}
+
+class Corpus:
+    """results/corpus/<design>.json; cases deduplicated by id, oldest dropped first."""
+
+    def __init__(self, corpus_dir: Path, design: str):
+        self.path = Path(corpus_dir) / f"{design}.json"
+        self.cases: List[Dict[str, Any]] = []
+        if self.path.exists():
+            try:
+                self.cases = json.loads(self.path.read_text(encoding="utf-8")).get("cases", [])
+            except (json.JSONDecodeError, AttributeError):
+                self.cases = []
+
+    def add(self, case: Dict[str, Any], design_vhdl: str = "") -> bool:
+        """Store case; False when an identical sequence is already in the corpus."""
+        if any(c["id"] == case["id"] for c in self.cases):
+            return False
+        case = dict(case, added_at=time.time(), vhdl=design_vhdl)
+        self.cases = (self.cases + [case])[-MAX_CASES:]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"cases": self.cases}, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+        return True
+
+def replay(model, model_inputs: List[str], cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run every case on a native_sim.NativeModel; stops at the first regression."""
+    t0 = time.perf_counter()
+    done, vectors = 0, 0
+    for case in cases:
+        col = {n: k for k, n in enumerate(case["inputs"])}
+        buf = array("Q")
+        for row in case["vectors"]:
+            buf.extend(row[col[n]] if n in col else 0 for n in model_inputs)
+        if not model_inputs:
+            buf.extend(0 for _ in case["vectors"])
+        model.lib.c2v_reset()
+        violations = model.run(buf)
+        done += 1
+        vectors += len(case["vectors"])
+        if violations:
+            fv = model.first_violation() or {}
+            return {"ok": False, "replayed": done, "vectors": vectors,
+                    "regression": {"id": case["id"], "source": case.get("source"), "assert": case.get("assert", ""),
+                                   "step": fv.get("cycle"), "check": fv.get("check")},
+                    "seconds": round(time.perf_counter() - t0, 4)}
+    return {"ok": True, "replayed": done, "vectors": vectors, "seconds": round(time.perf_counter() - t0, 4)}
@@ -0,0 +1,137 @@
+"""
+Compositional verification with proof reuse (TASK 04 sby step).
+
+For a design D with a structural AST (Yosys JSON or lightweight Verilog):
+- D's proof key = structural hash of D (submodules included, Merkle-style)
+  + D's @c2vhdl properties. If the proof DB already has it, the sby run is
+  skipped and the stored PASS is reused.
+- every library submodule M whose own properties (specs/M.json, written
+  when M's VHDL was processed) are already proven with the same key is
+  replaced by a black box stub that ASSUMES M's proven asserts and ASSERTS
+  M's input assumptions and input value ranges (assume-guarantee: M's PASS
+  only holds for the inputs its own proof assumed), so M's logic is not
+  re-proven inside D. A module whose properties name internal signals
+  cannot be stubbed (the stub only has ports) and is inlined instead.
+- a PASS is recorded under D's key for later parents.
+
+Stubs leave outputs undriven; the script runs `setundef -undriven -anyseq`
+so the solver treats them as free values constrained only by the assumes.
+"""
+
+from __future__ import annotations
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ast_frontend.common_ast import ValueRange
+from ast_frontend.structural_hash import library_hashes, proof_key
+from ast_frontend.value_ranges import is_trivial, verilog_constraint
+
+SIZED_RE = re.compile(r"\d*'[sS]?[bBoOdDhH][0-9a-fA-FxXzZ_?]+")
+IDENT_RE = re.compile(r"(?<![\w$'])[A-Za-z_]\w*")
+
+def prop_strings(assumes: List[Dict[str, Any]], asserts: List[Dict[str, Any]]) -> List[str]:
+    return [f"assume:{(a.get('expr') or '').strip()}" for a in assumes] + \
+           [f"assert:{(a.get('expr') or '').strip()}" for a in asserts]
+
+def spec_props(spec: Dict[str, Any]) -> List[str]:
+    """Property strings of a spec: @c2vhdl tags plus the VHDL value ranges."""
+    return prop_strings(spec.get("assumes", []), spec.get("asserts", [])) + \
+           [f"range:{r['signal']}:{r['lo']}:{r['hi']}" for r in spec.get("ranges", [])]
+
+def load_spec(out: Path, module: str) -> Optional[Dict[str, Any]]:
+    p = out / "specs" / f"{module}.json"
+    if not p.exists():
+        return None
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _clock_port(mod_ast) -> str:
+    for p in mod_ast.ports or []:
+        if p.direction in ("in", "input") and p.width == 1 and ("clk" in p.name or "clock" in p.name):
+            return p.name
+    return ""
+
+def _input_ports(mod_ast) -> Dict[str, Any]:
+    return {p.name.lower(): p for p in mod_ast.ports or [] if p.direction in ("in", "input")}
+
+def stubbable(mod_ast, spec: Dict[str, Any]) -> bool:
+    """True when every @c2vhdl property of the module only names its ports."""
+    ports = {p.name for p in mod_ast.ports or []}
+    for a in spec.get("assumes", []) + spec.get("asserts", []):
+        names = set(IDENT_RE.findall(SIZED_RE.sub(" ", a.get("expr") or "")))
+        if not names <= ports:
+            return False
+    return True
+
+def blackbox_stub(mod_ast, spec: Dict[str, Any]) -> str:
+    """Verilog stub for a proven module: same ports, outputs free, proven asserts assumed."""
+    name = mod_ast.design_name
+    lines = [f"// Black box for {name}: proven properties used as assumptions",
+             f"module {name} ({', '.join(p.name for p in mod_ast.ports or [])});"]
+    for p in mod_ast.ports or []:
+        d = "input" if p.direction in ("in", "input") else ("inout" if p.direction == "inout" else "output")
+        rng = f" [{p.width - 1}:0]" if p.width > 1 else ""
+        lines.append(f"  {d}{rng} {p.name};")
+
+    comb, seq = [], []
+    for a in spec.get("assumes", []):
+        expr = (a.get("expr") or "").strip()
+        if expr:
+            comb.append(f"    assert ({expr});")  # M's environment must hold in the parent
+    ins = _input_ports(mod_ast)
+    for r in spec.get("ranges", []):
+        r = ValueRange(**r)
+        p = ins.get(r.signal.lower()) if r.port else None
+        if p is not None and not is_trivial(r, p.width):
+            comb.append(f"    assert ({verilog_constraint(r, p.name, p.width)});")  # M's input range
+    for a in spec.get("asserts", []):
+        expr = (a.get("expr") or "").strip()
+        if expr:
+            (seq if "$past" in expr else comb).append(f"    assume ({expr});")
+
+    lines.append("  always @(*) begin")
+    lines.extend(comb)
+    lines.append("  end")
+    clk = _clock_port(mod_ast)
+    if seq and clk:
+        lines.append(f"  always @(posedge {clk}) begin")
+        lines.extend(seq)
+        lines.append("  end")
+    lines.append("endmodule")
+    return "\n".join(lines) + "\n"
+
+def plan(y_ast, spec: Dict[str, Any], out: Path, db) -> Dict[str, Any]:
+    """Proof key of the design and the proven submodules that can be black-boxed."""
+    hashes = library_hashes(y_ast)
+    top = y_ast.design_name
+    key = proof_key(hashes[top], spec_props(spec))
+
+    blackboxes: List[Tuple[str, str]] = []  # (module, proof key)
+    for name, mod in (y_ast.library or {}).items():
+        sub_spec = load_spec(out, name)
+        if not sub_spec or not sub_spec.get("asserts"):
+            continue
+        sub_key = proof_key(hashes[name], spec_props(sub_spec))
+        if db.lookup(sub_key) and stubbable(mod, sub_spec):
+            blackboxes.append((name, sub_key))
+    return {"key": key, "struct_hash": hashes[top], "blackboxes": blackboxes}
+
+def sby_text(design_v: Path, wrapper_sv: Path, wrapper_top: str, stubs: List[Tuple[str, Path]],
+             has_clock: bool) -> str:
+    mode = "mode bmc\ndepth 20" if has_clock else "mode prove"
+    script = [f"read_verilog -formal {design_v.name}"]
+    for module, _ in stubs:
+        script.append(f"delete {module}")
+    for _, stub in stubs:
+        script.append(f"read_verilog -formal {stub.name}")
+    script.append(f"read_verilog -formal {wrapper_sv.name}")
+    script.append(f"prep -top {wrapper_top}")
+    if stubs:
+        script.append("setundef -undriven -anyseq")
+    files = [design_v] + [s for _, s in stubs] + [wrapper_sv]
+    return (f"[options]\n{mode}\n\n[engines]\nsmtbmc z3\n\n[script]\n" + "\n".join(script) +
+            "\n\n[files]\n" + "\n".join(str(f.resolve()) for f in files) + "\n")
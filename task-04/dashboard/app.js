@@ -1,15 +1,47 @@
+const STEPS = ["vhd2vl","yosys_prep","sby","v2c","esbmc"];
+const STATUS_CODE = {OK: 0, FAIL: 1, SKIP: 2};
+const ROW_HEIGHT = 34;   // px, deve bater com .vrow no index.html
+const OVERSCAN = 10;     // linhas extras acima/abaixo da janela visível
+const DEBOUNCE_MS = 60;
+
 async function loadSummary(){
   const res = await fetch("../results/summary.json?cache=" + Date.now());
   if(!res.ok) throw new Error("Não consegui ler summary.json");
   return await res.json();
 }
 
+// Histórico exportado pelo results_store.py (opcional: runs antigas sem o store)
+async function loadHistory(){
+  try{
+    const res = await fetch("../results/history.json?cache=" + Date.now());
+    return res.ok ? await res.json() : {};
+  }catch(err){
+    return {};
+  }
+}
+
+let HISTORY = {};
+
+function historyHtml(design){
+  const h = HISTORY[design];
+  if(!h) return "";
+  const strip = h.runs.slice(-10).map(([, st])=> st === "OK" ? "✓" : "✗").join("");
+  const since = h.failing_since_run
+    ? ` falhando desde a run ${h.failing_since_run} (${new Date(h.failing_since * 1000).toLocaleString()})` : "";
+  return `<span class="small" title="últimas runs${esc(since)}">${strip}</span>`;
+}
+
 function stepStatus(entry, step){
   const s = (entry.steps||{})[step]||{};
   if(s.skipped) return "SKIP";
   return s.ok ? "OK" : "FAIL";
 }
 
+function esc(s){
+  return String(s == null ? "" : s)
+    .replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+}
+
 function tag(status){
   const cls = status==="OK" ? "tag ok" : status==="SKIP" ? "tag skip" : "tag fail";
   return `<span class="${cls}">${status}</span>`;
@@ -18,69 +50,194 @@ function tag(status){
 function link(path, text){
   if(!path) return "";
   const safe = path.replace(/^.*?task04\//, "../"); // normalize
-  return `<a href="${safe}" target="_blank" rel="noreferrer">${text||"abrir"}</a>`;
+  return `<a href="${esc(safe)}" target="_blank" rel="noreferrer">${text||"abrir"}</a>`;
+}
+
+/*
+ * Índice em memória, construído uma vez por carga do summary.json:
+ * - names[i]: nome do design em minúsculas
+ * - byName: posições ordenadas por nome (busca binária por prefixo)
+ * - codes[step]: Uint8Array com o status de cada entrada naquela etapa
+ * - anyStatus[code]: Uint8Array marcando entradas com alguma etapa nesse status
+ */
+function buildIndex(data){
+  const n = data.length;
+  const names = new Array(n);
+  for(let i=0;i<n;i++) names[i] = (data[i].design||"").toLowerCase();
+
+  const byName = new Uint32Array(n);
+  for(let i=0;i<n;i++) byName[i] = i;
+  byName.sort((a,b)=> names[a] < names[b] ? -1 : names[a] > names[b] ? 1 : a-b);
+
+  const codes = {};
+  const anyStatus = [new Uint8Array(n), new Uint8Array(n), new Uint8Array(n)];
+  for(const step of STEPS){
+    const arr = new Uint8Array(n);
+    for(let i=0;i<n;i++){
+      const c = STATUS_CODE[stepStatus(data[i], step)];
+      arr[i] = c;
+      anyStatus[c][i] = 1;
+    }
+    codes[step] = arr;
+  }
+  return {data, names, byName, codes, anyStatus};
+}
+
+function lowerBound(index, q){
+  const {names, byName} = index;
+  let lo = 0, hi = byName.length;
+  while(lo < hi){
+    const mid = (lo + hi) >>> 1;
+    if(names[byName[mid]] < q) lo = mid + 1; else hi = mid;
+  }
+  return lo;
 }
 
-function render(data){
+// Entradas cujo nome começa com q (busca binária) seguidas das que apenas contêm q.
+function matchName(index, q, base){
+  const {names, byName} = index;
+  if(base){
+    // refinamento incremental: q estende a consulta anterior
+    const out = [];
+    for(let k=0;k<base.length;k++){ const i = base[k]; if(names[i].includes(q)) out.push(i); }
+    return out;
+  }
+  const start = lowerBound(index, q);
+  const prefix = [];
+  const seen = new Uint8Array(byName.length);
+  for(let k=start;k<byName.length;k++){
+    const i = byName[k];
+    if(!names[i].startsWith(q)) break;
+    prefix.push(i); seen[i] = 1;
+  }
+  for(let i=0;i<names.length;i++){
+    if(!seen[i] && names[i].includes(q)) prefix.push(i);
+  }
+  return prefix;
+}
+
+function makeState(){
+  return {index: null, visible: [], lastQuery: "", lastNameMatch: null};
+}
+
+function applyFilters(state){
+  const idx = state.index;
+  if(!idx) return;
   const q = document.getElementById("q").value.toLowerCase().trim();
   const step = document.getElementById("step").value;
   const status = document.getElementById("status").value;
 
-  const rows = document.getElementById("rows");
-  rows.innerHTML = "";
+  let candidates;
+  if(q){
+    const base = (state.lastNameMatch && state.lastQuery && q.startsWith(state.lastQuery)) ? state.lastNameMatch : null;
+    candidates = matchName(idx, q, base);
+    state.lastQuery = q;
+    state.lastNameMatch = candidates;
+  } else {
+    state.lastQuery = "";
+    state.lastNameMatch = null;
+    candidates = null;
+  }
 
-  const filtered = data.filter(e => {
-    if(q && !(e.design||"").toLowerCase().includes(q)) return false;
+  let mask = null;
+  if(status){
+    const code = STATUS_CODE[status];
     if(step){
-      const st = stepStatus(e, step);
-      if(status && st!==status) return false;
+      const arr = idx.codes[step];
+      mask = (i)=> arr[i] === code;
     } else {
-      if(status){
-        // any step matches chosen status
-        const steps = ["vhd2vl","yosys_prep","sby","v2c","esbmc"];
-        if(!steps.some(s => stepStatus(e, s)===status)) return false;
-      }
+      // qualquer etapa com o status escolhido
+      const arr = idx.anyStatus[code];
+      mask = (i)=> arr[i] === 1;
     }
-    return true;
-  });
+  }
+
+  const out = [];
+  if(candidates){
+    for(let k=0;k<candidates.length;k++){ const i = candidates[k]; if(!mask || mask(i)) out.push(i); }
+  } else {
+    const n = idx.data.length;
+    for(let i=0;i<n;i++) if(!mask || mask(i)) out.push(i);
+  }
+  state.visible = out;
 
-  document.getElementById("meta").textContent = `Itens: ${filtered.length} (de ${data.length})`;
+  document.getElementById("meta").textContent = `Itens: ${out.length} (de ${idx.data.length})`;
+  const viewport = document.getElementById("viewport");
+  document.getElementById("spacer").style.height = (out.length * ROW_HEIGHT) + "px";
+  viewport.scrollTop = Math.min(viewport.scrollTop, Math.max(0, out.length * ROW_HEIGHT - viewport.clientHeight));
+  renderWindow(state);
+}
 
-  for(const e of filtered){
-    const s = (st)=>tag(stepStatus(e, st));
-    const notes = (e.notes||[]).join(" • ");
-    const ast = (e.generated||{}).common_ast || "";
-    rows.insertAdjacentHTML("beforeend", `
-      <tr>
-        <td><b>${e.design||""}</b></td>
+function rowHtml(e){
+  const s = (st)=>tag(stepStatus(e, st));
+  const notes = esc((e.notes||[]).join(" • "));
+  const ast = (e.generated||{}).common_ast || "";
+  const cex = (e.counterexample||{}).trace || "";
+  return `<tr class="vrow">
+        <td><b>${esc(e.design)}</b> ${historyHtml(e.design)}</td>
         <td>${link(e.vhdl, "VHDL")}</td>
         <td>${link(e.spec, "spec.json")}</td>
         <td>${s("vhd2vl")}</td>
         <td>${s("yosys_prep")}</td>
-        <td>${s("sby")}</td>
+        <td>${s("sby")}${cex ? " " + link(cex, "cex") : ""}</td>
         <td>${s("v2c")}</td>
         <td>${s("esbmc")}</td>
         <td>${ast ? link(ast, "ast.json") : ""}</td>
-        <td>${notes}</td>
-      </tr>
-    `);
-  }
+        <td title="${notes}">${notes}</td>
+      </tr>`;
 }
 
-async function main(){
-  const btn = document.getElementById("reload");
-  const inputs = ["q","step","status"];
-  for(const id of inputs){
-    document.getElementById(id).addEventListener("input", ()=>main());
-    document.getElementById(id).addEventListener("change", ()=>main());
-  }
-  btn.addEventListener("click", ()=>main());
+// Materializa apenas as linhas dentro da janela de rolagem (+ OVERSCAN).
+function renderWindow(state){
+  const viewport = document.getElementById("viewport");
+  const rows = document.getElementById("rows");
+  const total = state.visible.length;
+  const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+  const count = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN;
+  const last = Math.min(total, first + count);
+
+  const data = state.index.data;
+  const parts = new Array(last - first);
+  for(let k=first;k<last;k++) parts[k-first] = rowHtml(data[state.visible[k]]);
+  document.getElementById("body-table").style.transform = `translateY(${first * ROW_HEIGHT}px)`;
+  rows.innerHTML = parts.join("");
+}
 
+function debounce(fn, ms){
+  let t = null;
+  return ()=>{ clearTimeout(t); t = setTimeout(fn, ms); };
+}
+
+async function reload(state){
   try{
-    const data = await loadSummary();
-    render(data);
+    const [data, history] = await Promise.all([loadSummary(), loadHistory()]);
+    HISTORY = history;
+    state.index = buildIndex(data);
+    state.lastQuery = "";
+    state.lastNameMatch = null;
+    applyFilters(state);
   }catch(err){
     document.getElementById("meta").textContent = err.message;
   }
 }
+
+function main(){
+  const state = makeState();
+  const refilter = debounce(()=>applyFilters(state), DEBOUNCE_MS);
+
+  document.getElementById("q").addEventListener("input", refilter);
+  document.getElementById("step").addEventListener("change", ()=>applyFilters(state));
+  document.getElementById("status").addEventListener("change", ()=>applyFilters(state));
+  document.getElementById("reload").addEventListener("click", ()=>reload(state));
+
+  let ticking = false;
+  document.getElementById("viewport").addEventListener("scroll", ()=>{
+    if(ticking) return;
+    ticking = true;
+    requestAnimationFrame(()=>{ ticking = false; if(state.index) renderWindow(state); });
+  });
+  window.addEventListener("resize", ()=>{ if(state.index) renderWindow(state); });
+
+  reload(state);
+}
 main();
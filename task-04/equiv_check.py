@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Differential equivalence check between two translations of the same designs.
+
+The repository keeps parallel Verilog outputs of the same VHDL (GHDL
+`verilog_out_ass` vs Yosys `verilog_out_ass_yosys`, `versão 1/verilog_out` vs
+`verilog_out_yosys`). This tool pairs them by file name and checks each pair
+in increasing cost:
+
+1. interface: same port names, directions and widths (light Verilog parser)
+2. cosim:     both netlists in one Icarus testbench, driven by the same
+              seeded random vectors (reset asserted for the first cycles,
+              then 1 in 16), outputs compared with !== before and after each
+              clock edge; the first mismatch is reported
+3. formal:    only when cosim found nothing, Yosys equivalence checking:
+              equiv_make pairs the signals of both netlists, equiv_simple and
+              equiv_induct (-seq --depth) prove the $equiv cells, and
+              equiv_status -assert passes only when all are proven
+
+The formal stage proves equivalence but never reports a mismatch: induction
+starts from any state where the matched signals agree, so an unproven $equiv
+cell may be unmatched internal state (GHDL and Yosys name registers
+differently) rather than a real difference. A plain SBY miter in prove mode
+is worse: both designs start from independent free register values and fail
+even on identical sequential netlists. Mismatches therefore come only from
+the interface and cosim stages, which are concrete.
+
+Verdicts ("equivalent", "mismatch", and "inconclusive" for cosim agreeing
+while formal leaves cells unproven) are cached in an SQLite file keyed by the
+content hash of both netlists and the check settings, so re-vetting
+thousands of designs after a translator change only re-checks pairs whose
+netlists changed. Results that depend on the machine (tool missing, timeout,
+tool error) are reported but not cached.
+
+Tool templates come from tools.json ("iverilog", "vvp", "yosys"); the
+defaults below are used when absent.
+
+Usage:
+  python3 task04/equiv_check.py ../Novo_repo/verilog_out_ass ../Novo_repo/verilog_out_ass_yosys \\
+      --out equiv --tools tools.json --vectors 2000 -j 8
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import re
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ast_frontend.verilog_light_parser import verilog_to_ast
+
+DEFAULT_IVERILOG = "iverilog -g2012 -s equiv_tb -o {out_vvp} {in_files}"
+DEFAULT_VVP = "vvp -n {in_vvp}"
+DEFAULT_YOSYS = "yosys -q -l {log} -s {script}"
+
+MODULE_RE = re.compile(r'^\s*module\s+(\\?[\w$]+)', re.MULTILINE)
+COSIM_MISMATCH_RE = re.compile(r'COSIM_MISMATCH (\d+) (\w+) (\S+) (\S+)')
+COSIM_OK_RE = re.compile(r'COSIM_OK (\d+)')
+EQUIV_STATUS_RE = re.compile(r'Found (\d+) \$equiv cells.*?Of those cells (\d+) are proven and (\d+) are unproven',
+                             re.DOTALL)
+
+CACHED = ("equivalent", "mismatch", "inconclusive")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS equiv (
+    key        TEXT PRIMARY KEY,
+    design     TEXT NOT NULL,
+    status     TEXT NOT NULL,   -- "equivalent" | "mismatch" | "inconclusive"
+    stage      TEXT NOT NULL,   -- "interface" | "cosim" | "formal"
+    detail     TEXT,            -- JSON
+    checked_at REAL
+);
+"""
+
+class EquivCache:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT design, status, stage, detail, checked_at FROM equiv WHERE key=?",
+                              (key,)).fetchone()
+        if row is None:
+            return None
+        return {"design": row[0], "status": row[1], "stage": row[2], "detail": json.loads(row[3] or "{}"),
+                "checked_at": row[4]}
+
+    def record(self, key: str, design: str, status: str, stage: str, detail: Dict[str, Any]):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO equiv(key, design, status, stage, detail, checked_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (key, design, status, stage, json.dumps(detail), time.time()))
+
+    def close(self):
+        self.db.close()
+
+def pair_key(gold: Path, gate: Path, settings: Dict[str, Any]) -> str:
+    h = hashlib.sha256()
+    for p in (gold, gate):
+        data = p.read_bytes()
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+def pair_files(dir_a: Path, dir_b: Path) -> List[Tuple[Path, Path]]:
+    """Same-named .v/.sv files present in both folders."""
+    b = {p.name: p for p in dir_b.iterdir() if p.suffix in (".v", ".sv")}
+    return [(p, b[p.name]) for p in sorted(dir_a.iterdir()) if p.suffix in (".v", ".sv") and p.name in b]
+
+def _run(cmd: str, cwd: Path, timeout: float) -> Dict[str, Any]:
+    try:
+        p = subprocess.run(cmd, shell=True, cwd=str(cwd), capture_output=True, text=True, timeout=timeout)
+        return {"ok": p.returncode == 0, "stdout": p.stdout, "stderr": p.stderr}
+    except subprocess.TimeoutExpired as e:
+        return {"ok": False, "stdout": e.stdout or "", "stderr": "timeout", "timeout": True}
+
+def _available(cmd: str) -> bool:
+    parts = shlex.split(cmd)
+    return bool(parts) and shutil.which(parts[0]) is not None
+
+def rename_modules(verilog_text: str, suffix: str) -> Tuple[str, Dict[str, str]]:
+    """Suffix every module declared in the file (and its instantiations)."""
+    names = {n: f"{n.lstrip(chr(92))}{suffix}" for n in MODULE_RE.findall(verilog_text)}
+    if not names:
+        return verilog_text, {}
+    pat = re.compile(r'(?<![\w$.])(' + "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True)) +
+                     r')(?![\w$])')
+    return pat.sub(lambda m: names[m.group(1)], verilog_text), names
+
+def interface(path: Path) -> Tuple[str, List[Dict[str, Any]]]:
+    """(top module name, ports) of a netlist; top is the module named like the file, else the first."""
+    ast = verilog_to_ast(path, design_name=path.stem, hierarchical=False)
+    ports = [{"name": p.name, "direction": "input" if p.direction in ("in", "input") else "output",
+              "width": int(p.width or 1)} for p in ast.ports or []]
+    return (ast.stats or {}).get("verilog_top", ast.design_name), ports
+
+def _is_clock(p: Dict[str, Any]) -> bool:
+    n = p["name"].lower()
+    return p["direction"] == "input" and p["width"] == 1 and ("clk" in n or "clock" in n)
+
+def _is_reset(p: Dict[str, Any]) -> bool:
+    n = p["name"].lower()
+    return p["direction"] == "input" and p["width"] == 1 and ("rst" in n or "reset" in n)
+
+def cosim_testbench(gold_top: str, gate_top: str, ports: List[Dict[str, Any]], vectors: int, seed: int) -> str:
+    ins = [p for p in ports if p["direction"] == "input"]
+    outs = [p for p in ports if p["direction"] != "input"]
+    clk = next((p for p in ins if _is_clock(p)), None)
+
+    def rng(w: int) -> str:
+        parts = (w + 31) // 32
+        return "$random(seed)" if parts == 1 else "{" + ", ".join(["$random(seed)"] * parts) + "}"
+
+    def vec(w: int) -> str:
+        return f"[{w - 1}:0] " if w > 1 else ""
+
+    lines = ["`timescale 1ns/1ps", "// Auto-generated by equiv_check.py", "module equiv_tb;",
+             "  integer seed, cycle;"]
+    for p in ins:
+        lines.append(f"  reg {vec(p['width'])}{p['name']} = 0;")
+    for p in outs:
+        lines.append(f"  wire {vec(p['width'])}g_{p['name']}, t_{p['name']};")
+    for top, pre in ((gold_top, "g_"), (gate_top, "t_")):
+        conns = [f".{p['name']}({p['name']})" for p in ins] + [f".{p['name']}({pre}{p['name']})" for p in outs]
+        lines.append(f"  {top} {pre}dut({', '.join(conns)});")
+    lines.append("  task check; begin")
+    for p in outs:
+        lines.append(f"    if (g_{p['name']} !== t_{p['name']}) begin "
+                     f"$display(\"COSIM_MISMATCH %0d {p['name']} %h %h\", cycle, g_{p['name']}, t_{p['name']}); "
+                     f"$finish; end")
+    lines += ["  end endtask", "  initial begin", f"    seed = {seed};",
+              f"    for (cycle = 0; cycle < {vectors}; cycle = cycle + 1) begin"]
+    for p in ins:
+        if p is clk:
+            continue
+        if _is_reset(p):
+            lines.append(f"      {p['name']} = (cycle < 2) ? 1'b1 : (($random(seed) & 15) == 0);")
+        else:
+            lines.append(f"      {p['name']} = {rng(p['width'])};")
+    lines.append("      #1 check;")
+    if clk is not None:
+        lines.append(f"      {clk['name']} = 1; #1 check; {clk['name']} = 0;")
+    lines += ["    end", f"    $display(\"COSIM_OK %0d\", {vectors});", "    $finish;", "  end", "endmodule", ""]
+    return "\n".join(lines)
+
+def equiv_script(gold_v: Path, gate_v: Path, gold_top: str, gate_top: str, depth: int) -> str:
+    script = [f"read_verilog {gold_v.resolve()}", f"read_verilog {gate_v.resolve()}", "prep", "async2sync",
+              "flatten", f"equiv_make {gold_top} {gate_top} equiv_top", "hierarchy -top equiv_top",
+              "equiv_simple", f"equiv_induct -seq {depth}", "equiv_status -assert"]
+    return "\n".join(script) + "\n"
+
+def check_pair(gold: Path, gate: Path, work: Path, tools: Dict[str, str], vectors: int = 1000,
+               seed: int = 1, depth: int = 20, formal: bool = True, timeout: float = 600.0) -> Dict[str, Any]:
+    """Run the interface / cosim / formal ladder on one pair (no caching)."""
+    design = gold.stem
+    work.mkdir(parents=True, exist_ok=True)
+    res: Dict[str, Any] = {"design": design, "gold": str(gold), "gate": str(gate), "stages": {}}
+
+    gold_top, gold_ports = interface(gold)
+    gate_top, gate_ports = interface(gate)
+    norm = lambda ps: sorted((p["name"], p["direction"], p["width"]) for p in ps)
+    if norm(gold_ports) != norm(gate_ports):
+        res["stages"]["interface"] = {"ok": False, "gold": norm(gold_ports), "gate": norm(gate_ports)}
+        return dict(res, status="mismatch", stage="interface")
+    res["stages"]["interface"] = {"ok": True, "ports": len(gold_ports)}
+    if not any(p["direction"] != "input" for p in gold_ports):
+        return dict(res, status="skipped", stage="interface", reason="no outputs (testbench or empty netlist)")
+
+    gold_text, gold_map = rename_modules(gold.read_text(encoding="utf-8", errors="replace"), "__gold")
+    gate_text, gate_map = rename_modules(gate.read_text(encoding="utf-8", errors="replace"), "__gate")
+    gold_v, gate_v = work / f"{design}__gold.v", work / f"{design}__gate.v"
+    gold_v.write_text(gold_text, encoding="utf-8")
+    gate_v.write_text(gate_text, encoding="utf-8")
+    gtop, ttop = gold_map.get(gold_top, gold_top), gate_map.get(gate_top, gate_top)
+
+    iverilog = tools.get("iverilog", DEFAULT_IVERILOG)
+    vvp = tools.get("vvp", DEFAULT_VVP)
+    if _available(iverilog) and _available(vvp):
+        tb = work / "equiv_tb.v"
+        tb.write_text(cosim_testbench(gtop, ttop, gold_ports, vectors, seed), encoding="utf-8")
+        out_vvp = work / "equiv_tb.vvp"
+        files = " ".join(shlex.quote(str(p)) for p in (gold_v, gate_v, tb))
+        r = _run(iverilog.format(out_vvp=shlex.quote(str(out_vvp)), in_files=files), work, timeout)
+        if not r["ok"]:
+            res["stages"]["cosim"] = {"ok": False, "error": (r["stderr"] or r["stdout"])[-2000:]}
+        else:
+            r = _run(vvp.format(in_vvp=shlex.quote(str(out_vvp))), work, timeout)
+            m = COSIM_MISMATCH_RE.search(r["stdout"])
+            if m:
+                res["stages"]["cosim"] = {"ok": False, "cycle": int(m.group(1)), "port": m.group(2),
+                                          "gold": m.group(3), "gate": m.group(4), "seed": seed}
+                return dict(res, status="mismatch", stage="cosim")
+            ok = COSIM_OK_RE.search(r["stdout"])
+            res["stages"]["cosim"] = {"ok": bool(ok), "vectors": int(ok.group(1)) if ok else 0}
+            if not ok:
+                res["stages"]["cosim"]["error"] = (r["stderr"] or r["stdout"])[-2000:]
+    else:
+        res["stages"]["cosim"] = {"ok": False, "skipped": True, "reason": "iverilog/vvp not found"}
+
+    yosys = tools.get("yosys", DEFAULT_YOSYS)
+    if not formal:
+        return dict(res, status="cosim_ok" if res["stages"]["cosim"].get("ok") else "unknown", stage="cosim")
+    if not _available(yosys):
+        res["stages"]["formal"] = {"ok": False, "skipped": True, "reason": "yosys not found"}
+        return dict(res, status="cosim_ok" if res["stages"]["cosim"].get("ok") else "unknown", stage="cosim")
+    script = work / f"{design}_equiv.ys"
+    log = work / f"{design}_equiv.log"
+    script.write_text(equiv_script(gold_v, gate_v, gtop, ttop, depth), encoding="utf-8")
+    log.unlink(missing_ok=True)
+    r = _run(yosys.format(script=shlex.quote(str(script)), log=shlex.quote(str(log))), work, timeout)
+    text = log.read_text(encoding="utf-8", errors="replace") if log.exists() else ""
+    text += "\n" + r["stdout"] + "\n" + r["stderr"]
+    log.write_text(text, encoding="utf-8")
+    m = EQUIV_STATUS_RE.search(text)
+    if r["ok"] and m and m.group(3) == "0":
+        verdict = "PASS"
+    elif m:
+        verdict = "UNKNOWN"  # unproven cells: not a counterexample (see the module docstring)
+    else:
+        verdict = "TIMEOUT" if r.get("timeout") else "ERROR"
+    res["stages"]["formal"] = {"ok": verdict == "PASS", "script": str(script), "result": verdict}
+    if m:
+        res["stages"]["formal"].update({"equiv_cells": int(m.group(1)), "unproven": int(m.group(3))})
+    if verdict == "PASS":
+        return dict(res, status="equivalent", stage="formal")
+    if verdict == "UNKNOWN" and res["stages"]["cosim"].get("ok"):
+        return dict(res, status="inconclusive", stage="formal")
+    return dict(res, status="cosim_ok" if res["stages"]["cosim"].get("ok") else "unknown", stage="formal")
+
+def run(pairs: List[Tuple[Path, Path]], out: Path, tools: Dict[str, str], cache: EquivCache,
+        jobs: int = 1, **settings) -> List[Dict[str, Any]]:
+    """Check all pairs, answering from the cache when both netlists are unchanged."""
+    keyed = [(gold, gate, pair_key(gold, gate, settings)) for gold, gate in pairs]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(keyed)
+    todo = []
+    for i, (gold, gate, key) in enumerate(keyed):
+        hit = cache.lookup(key)
+        if hit is not None:
+            results[i] = {"design": gold.stem, "gold": str(gold), "gate": str(gate), "status": hit["status"],
+                          "stage": hit["stage"], "stages": hit["detail"], "cached": True}
+        else:
+            todo.append(i)
+
+    def one(i):
+        gold, gate, _ = keyed[i]
+        try:
+            return check_pair(gold, gate, out / "work" / f"{gold.stem}-{keyed[i][2][:12]}", tools, **settings)
+        except Exception as e:  # one broken netlist must not stop the batch
+            return {"design": gold.stem, "gold": str(gold), "gate": str(gate), "status": "error",
+                    "stage": "", "stages": {}, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        for i, r in zip(todo, ex.map(one, todo)):
+            results[i] = r
+            if r["status"] in CACHED:
+                cache.record(keyed[i][2], r["design"], r["status"], r["stage"], r["stages"])
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="Random co-simulation then formal equivalence of two netlist folders.")
+    ap.add_argument("gold_dir", help="Reference translation (e.g. GHDL verilog_out_ass)")
+    ap.add_argument("gate_dir", help="Translation under test (e.g. verilog_out_ass_yosys)")
+    ap.add_argument("--out", default="equiv", help="Work/results folder")
+    ap.add_argument("--tools", default=None, help="tools.json with iverilog/vvp/yosys templates")
+    ap.add_argument("--cache", default=None, help="Verdict cache (default: <out>/equiv.sqlite)")
+    ap.add_argument("--vectors", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--depth", type=int, default=20, help="Induction depth of the formal check (equiv_induct -seq)")
+    ap.add_argument("--no-formal", action="store_true", help="Stop after co-simulation")
+    ap.add_argument("--timeout", type=float, default=600.0, help="Seconds per tool run")
+    ap.add_argument("-j", "--jobs", type=int, default=1)
+    args = ap.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    tools = json.loads(Path(args.tools).read_text(encoding="utf-8")) if args.tools else {}
+    pairs = pair_files(Path(args.gold_dir), Path(args.gate_dir))
+    if not pairs:
+        raise SystemExit("No same-named netlists in both folders")
+    cache = EquivCache(Path(args.cache) if args.cache else out / "equiv.sqlite")
+    try:
+        results = run(pairs, out, tools, cache, args.jobs, vectors=args.vectors, seed=args.seed,
+                      depth=args.depth, formal=not args.no_formal, timeout=args.timeout)
+    finally:
+        cache.close()
+
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+        tag = " (cached)" if r.get("cached") else ""
+        print(f"{r['design']:30s} {r['status']:12s} {r['stage']}{tag}")
+    (out / "equiv_summary.json").write_text(json.dumps({"counts": counts, "pairs": results}, indent=2),
+                                            encoding="utf-8")
+    print(f"Wrote: {out / 'equiv_summary.json'}  " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return 1 if counts.get("mismatch") else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Native execution of v2c C models (fast random/vector testing before the formal steps).
+
+The C model written by the v2c step is compiled together with a generated
+glue file into a shared library and loaded with ctypes. The glue exports
+
+    uint64_t c2v_run(const uint64_t *in, uint64_t *out, uint64_t n);
+
+which calls the model's entry function once per vector (one clock cycle for
+clocked designs) and counts assert violations:
+- `assert()` inside the model (a private assert.h comes first on the include
+  path and routes it to the violation counter)
+- the combinational @c2vhdl ASSERTs of the spec ($past ones are skipped)
+Vectors violating an input-only ASSUME or an input value range (see
+ast_frontend/value_ranges.py) are skipped before the call and counted apart.
+
+Vectors are rows of uint64 in a flat array('Q'): NIN words per input row and
+NOUT per output row, handed to C without copies. Inputs are masked to the
+port width in C, so random bytes from os.urandom() are valid vectors.
+
+The entry function is `<design>(...)` in the C model: pointer parameters are
+outputs, the others inputs (the usual v2c layout). Port widths come from the
+spec when known, else from the C type.
+
+The clock is not a stimulus: one call is one clock cycle, so the glue holds
+the clock input (clock_port(), the inicio_auto heuristic) at CLOCK_LEVEL on
+every call and a vector row carries only the other inputs. cex_corpus.py
+replays its cases with the same convention (sby traces are sampled on the
+rising edges and drop the clock too).
+
+Usage (standalone):
+  python3 task04/native_sim.py generated/c/teste_integer.c --spec specs/teste_integer.json --vectors 10000000
+"""
+
+from __future__ import annotations
+import argparse
+import ctypes
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ast_frontend.common_ast import ValueRange
+from ast_frontend.value_ranges import c_constraint, is_trivial
+
+DEFAULT_CC = "cc -O2 -shared -fPIC -I{include_dir} -o {out_so} {in_c} {glue_c}"
+CHUNK = 1 << 20  # vectors per c2v_run call when streaming random inputs
+CLOCK_LEVEL = 1  # value of the clock input on every call (one call = one cycle)
+
+C_WIDTHS = {"_bool": 1, "bool": 1, "char": 8, "short": 16, "int": 32, "long": 64}
+PARAM_RE = re.compile(r'^(.*?)(\**)\s*(\w+)\s*(?:\[\s*\])?$')
+SIZED_RE = re.compile(r"(\d*)'[sS]?([bBoOdDhH])([0-9a-fA-FxXzZ_]+)")
+IDENT_RE = re.compile(r'\b[A-Za-z_]\w*\b')
+
+ASSERT_H = """/* native_sim: model asserts are counted instead of aborting */
+#ifndef C2V_ASSERT_H
+#define C2V_ASSERT_H
+void c2v_violation(int check);
+#endif
+#undef assert
+#define assert(x) ((x) ? (void)0 : c2v_violation(__LINE__))
+"""
+
+def _c_width(ctype: str) -> int:
+    t = ctype.lower().replace("unsigned", "").replace("signed", "").replace("const", "").strip()
+    if "long" in t:
+        return 64
+    for k, w in C_WIDTHS.items():
+        if k in t:
+            return w
+    return 32
+
+def clock_port(spec: Dict[str, Any]) -> str:
+    """Same heuristic as inicio_auto.parse_vhdl: 1-bit input named *clk*/*clock*."""
+    if not spec.get("has_clock"):
+        return ""
+    for p in spec["ports"]["inputs"]:
+        n = p["name"].lower()
+        if p.get("width", 1) == 1 and ("clk" in n or "clock" in n):
+            return p["name"]
+    return ""
+
+def stimuli(spec: Dict[str, Any], entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Entry inputs driven from a vector row, in row order (all but the clock)."""
+    clk = clock_port(spec)
+    return [p for p in entry["params"] if not p["output"] and p["name"] != clk]
+
+def find_entry(c_text: str, design: str) -> Optional[Dict[str, Any]]:
+    """Signature of the model function `design(...)`: inputs/outputs in call order."""
+    m = re.search(r'\bvoid\s+' + re.escape(design) + r'\s*\(([^)]*)\)\s*\{', c_text)
+    if not m:
+        return None
+    params = []
+    for raw in m.group(1).split(","):
+        raw = raw.strip()
+        if not raw or raw == "void":
+            continue
+        pm = PARAM_RE.match(raw)
+        if not pm:
+            return None
+        ctype, stars, name = pm.group(1).strip(), pm.group(2), pm.group(3)
+        params.append({"name": name, "ctype": ctype, "output": bool(stars) or raw.endswith("]"),
+                       "width": _c_width(ctype)})
+    return {"prototype": f"void {design}({m.group(1).strip() or 'void'});", "params": params}
+
+def c_expr(expr: str) -> Optional[str]:
+    """Verilog-ish @c2vhdl expression -> C, or None when it cannot run natively."""
+    if "$" in expr or "'{" in expr:
+        return None
+
+    def lit(m):
+        base = {"b": 2, "o": 8, "d": 10, "h": 16}[m.group(2).lower()]
+        digits = m.group(3).replace("_", "")
+        if re.search(r'[xXzZ]', digits):
+            raise ValueError(digits)
+        return f"{int(digits, base)}ULL"
+    try:
+        return SIZED_RE.sub(lit, expr)
+    except ValueError:
+        return None
+
+def _local(name: str) -> str:
+    """C local holding a port value in the glue: prefixed, so a port named like a
+    glue variable (in, out, n, i, v) or a C keyword cannot clash with it."""
+    return f"p_{name}"
+
+def _locals(e: str, names) -> str:
+    """Port names in a C expression -> their glue locals."""
+    return IDENT_RE.sub(lambda m: _local(m.group(0)) if m.group(0) in names else m.group(0), e)
+
+def _input_filters(spec: Dict[str, Any], ins: List[Dict[str, Any]], widths: Dict[str, int]) -> List[str]:
+    """C conditions a vector must meet: input-only assumes and input value ranges."""
+    names = {p["name"] for p in ins}
+    out = []
+    for a in spec.get("assumes", []):
+        e = c_expr((a.get("expr") or "").strip())
+        if e and set(IDENT_RE.findall(SIZED_RE.sub(" ", a["expr"]))) <= names:
+            out.append(_locals(e, names))
+    for r in spec.get("ranges", []):
+        r = ValueRange(**r)
+        w = widths.get(r.signal)
+        if r.port and r.signal in names and w and not is_trivial(r, w):
+            out.append(c_constraint(r, _local(r.signal), w))
+    return out
+
+def write_glue(spec: Dict[str, Any], entry: Dict[str, Any], out_dir: Path, with_asserts: bool = True) -> Path:
+    """Generate c2v_glue.c (batch driver) and a private assert.h in out_dir."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "assert.h").write_text(ASSERT_H, encoding="utf-8")
+    widths = {p["name"]: int(p.get("width", 1))
+              for p in spec["ports"]["inputs"] + spec["ports"]["outputs"]}
+    ins = stimuli(spec, entry)
+    clocks = [p for p in entry["params"] if not p["output"] and p not in ins]
+    outs = [p for p in entry["params"] if p["output"]]
+
+    lines = ["/* Auto-generated by native_sim.py */",
+             "#include <stdint.h>",
+             '#include "assert.h"',
+             "",
+             entry["prototype"],
+             "",
+             "static uint64_t c2v_fails, c2v_skipped, c2v_cycle, c2v_first_cycle = UINT64_MAX;",
+             "static int c2v_first_check;",
+             "",
+             "void c2v_violation(int check){",
+             "  if(c2v_fails++ == 0){ c2v_first_cycle = c2v_cycle; c2v_first_check = check; }",
+             "}",
+             "__attribute__((weak)) void __VERIFIER_assume(int x){ (void)x; }",
+             "uint64_t c2v_first_violation(int *check){ *check = c2v_first_check; return c2v_first_cycle; }",
+             "uint64_t c2v_skipped_count(void){ return c2v_skipped; }",
+             "void c2v_reset(void){ c2v_fails = c2v_skipped = c2v_cycle = 0; c2v_first_cycle = UINT64_MAX; c2v_first_check = 0; }",
+             "",
+             "uint64_t c2v_run(const uint64_t *in, uint64_t *out, uint64_t n){",
+             "  for(uint64_t i = 0; i < n; i++, c2v_cycle++){",
+             f"    const uint64_t *v = in + i * {max(1, len(ins))};"]
+    for k, p in enumerate(ins):
+        w = min(64, widths.get(p["name"], p["width"]))
+        mask = "~0ULL" if w >= 64 else f"0x{(1 << w) - 1:x}ULL"
+        lines.append(f"    uint64_t {_local(p['name'])} = v[{k}] & {mask};")
+    for p in clocks:
+        lines.append(f"    uint64_t {_local(p['name'])} = {CLOCK_LEVEL};")
+    for e in _input_filters(spec, ins, widths):
+        lines.append(f"    if(!({e})){{ c2v_skipped++; continue; }}")
+    for p in outs:
+        lines.append(f"    {p['ctype']} o_{p['name']} = 0;")
+    args = [f"({p['ctype']}){_local(p['name'])}" if not p["output"] else f"&o_{p['name']}"
+            for p in entry["params"]]
+    lines.append(f"    {spec['design_name']}({', '.join(args)});")
+    for p in outs:
+        lines.append(f"    uint64_t {_local(p['name'])} = (uint64_t)o_{p['name']};")
+    for k, p in enumerate(outs):
+        lines.append(f"    if(out) out[i * {len(outs)} + {k}] = {_local(p['name'])};")
+    if with_asserts:
+        names = {p["name"] for p in ins + outs}
+        for k, a in enumerate(spec.get("asserts", []), start=1):
+            e = c_expr((a.get("expr") or "").strip())
+            if e:
+                lines.append(f"    if(!({_locals(e, names)})) c2v_violation(-{k});  /* ASSERT: {a.get('expr')} */")
+    for p in ins + clocks + outs:
+        lines.append(f"    (void){_local(p['name'])};")
+    lines += ["  }", "  return c2v_fails;", "}", ""]
+    glue = out_dir / "c2v_glue.c"
+    glue.write_text("\n".join(lines), encoding="utf-8")
+    return glue
+
+def library_path(work_dir: Path, design: str, c_model: Path, glue: Path, cc: str) -> Path:
+    """lib<design>-<hash>.so, named after the C model, glue and compiler command.
+
+    dlopen() of a path already loaded in this process returns the loaded
+    library, so a long-lived worker or daemon would keep running the old model
+    if a rebuilt one reused the same file name.
+    """
+    h = hashlib.sha1()
+    for part in (c_model.read_bytes(), glue.read_bytes(), cc.encode("utf-8")):
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return work_dir / f"lib{design}-{h.hexdigest()[:16]}.so"
+
+def build(c_model: Path, glue: Path, out_so: Path, cc: str = DEFAULT_CC) -> Dict[str, Any]:
+    cmd = cc.format(include_dir=shlex.quote(str(glue.parent)), out_so=shlex.quote(str(out_so)),
+                    in_c=shlex.quote(str(c_model)), glue_c=shlex.quote(str(glue)))
+    p = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    return {"ok": p.returncode == 0 and out_so.exists(), "cmd": cmd, "stderr": p.stderr}
+
+class NativeModel:
+    """A compiled model; run() takes flat array('Q') buffers without copying."""
+
+    def __init__(self, so_path: Path, n_in: int, n_out: int):
+        self.lib = ctypes.CDLL(str(so_path))
+        self.n_in, self.n_out = max(1, n_in), n_out
+        self.lib.c2v_run.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint64]
+        self.lib.c2v_run.restype = ctypes.c_uint64
+        self.lib.c2v_first_violation.argtypes = [ctypes.POINTER(ctypes.c_int)]
+        self.lib.c2v_first_violation.restype = ctypes.c_uint64
+        self.lib.c2v_skipped_count.restype = ctypes.c_uint64
+        self.lib.c2v_reset()
+
+    @staticmethod
+    def _addr(buf) -> int:
+        return ctypes.addressof(ctypes.c_char.from_buffer(buf)) if len(buf) else 0
+
+    def run(self, inputs: array, outputs: Optional[array] = None) -> int:
+        """Run len(inputs)/n_in vectors; returns the total violation count so far."""
+        n = len(inputs) // self.n_in
+        if outputs is not None and len(outputs) < n * self.n_out:
+            raise ValueError("outputs buffer too small")
+        out_ptr = self._addr(outputs) if outputs is not None and self.n_out else None
+        return self.lib.c2v_run(self._addr(inputs), out_ptr, n)
+
+    def first_violation(self) -> Optional[Dict[str, int]]:
+        check = ctypes.c_int(0)
+        cycle = self.lib.c2v_first_violation(ctypes.byref(check))
+        if cycle == (1 << 64) - 1:
+            return None
+        return {"cycle": cycle, "check": check.value}
+
+def random_vectors(n: int, n_in: int) -> array:
+    buf = array("Q")
+    buf.frombytes(os.urandom(8 * n * max(1, n_in)))
+    return buf
+
+def compile_model(c_model: Path, spec: Dict[str, Any], work_dir: Path,
+                  cc: str = DEFAULT_CC) -> Dict[str, Any]:
+    """Build and load the model; returns {"ok", "model", "inputs", "cmd", "notes"} or an error."""
+    design = spec["design_name"]
+    entry = find_entry(c_model.read_text(encoding="utf-8", errors="replace"), design)
+    if entry is None:
+        return {"ok": False, "error": f"entry function void {design}(...) not found in {c_model.name}"}
+    glue = write_glue(spec, entry, work_dir)
+    out_so = library_path(work_dir, design, c_model, glue, cc)
+    b = build(c_model, glue, out_so, cc)
+    notes = []
+    if not b["ok"]:
+        # a spec expression that is not valid C must not cost the whole stage
+        glue = write_glue(spec, entry, work_dir, with_asserts=False)
+        out_so = library_path(work_dir, design, c_model, glue, cc)
+        b = build(c_model, glue, out_so, cc)
+        notes.append("spec asserts dropped: glue did not compile with them")
+    if not b["ok"]:
+        return {"ok": False, "cmd": b["cmd"], "error": b["stderr"][-2000:]}
+    for old in work_dir.glob(f"lib{design}-*.so"):
+        if old != out_so:
+            old.unlink(missing_ok=True)  # a loaded copy stays mapped until the process exits
+    ins = stimuli(spec, entry)
+    outs = [p for p in entry["params"] if p["output"]]
+    return {"ok": True, "cmd": b["cmd"], "library": str(out_so), "notes": notes,
+            "inputs": [p["name"] for p in ins],
+            "model": NativeModel(out_so, len(ins), len(outs))}
+
+def simulate(c_model: Path, spec: Dict[str, Any], work_dir: Path, vectors: int,
+             cc: str = DEFAULT_CC) -> Dict[str, Any]:
+    """Compile the model, drive it with random vectors and report violations/throughput."""
+    c = compile_model(c_model, spec, work_dir, cc)
+    if not c["ok"]:
+        return c
+    model = c["model"]
+    done, violations, elapsed = 0, 0, 0.0
+    while done < vectors:
+        n = min(CHUNK, vectors - done)
+        buf = random_vectors(n, len(c["inputs"]))
+        t0 = time.perf_counter()
+        violations = model.run(buf)
+        elapsed += time.perf_counter() - t0
+        done += n
+    return {
+        "ok": violations == 0,
+        "cmd": c["cmd"],
+        "library": c["library"],
+        "vectors": done,
+        "violations": violations,
+        "skipped_by_assumes": model.lib.c2v_skipped_count(),
+        "first_violation": model.first_violation(),
+        "seconds": round(elapsed, 4),
+        "vectors_per_s": int(done / elapsed) if elapsed > 0 else 0,
+        "notes": c["notes"],
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile a v2c C model and run random vectors natively.")
+    ap.add_argument("c_model")
+    ap.add_argument("--spec", required=True, help="specs/<design>.json written by run_task04.py")
+    ap.add_argument("--vectors", type=float, default=1e6)
+    ap.add_argument("--work-dir", default=None, help="Build directory (default: next to the model)")
+    ap.add_argument("--cc", default=DEFAULT_CC, help="Compiler command template")
+    args = ap.parse_args()
+
+    c_model = Path(args.c_model)
+    spec = json.loads(Path(args.spec).read_text(encoding="utf-8"))
+    work = Path(args.work_dir) if args.work_dir else c_model.parent / "native"
+    r = simulate(c_model, spec, work, int(args.vectors), args.cc)
+    print(json.dumps(r, indent=2))
+    return 0 if r["ok"] else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""
+Proof database for compositional verification.
+
+One row per proven (module structure, property set) pair, keyed by
+structural_hash.proof_key(). A parent design that instantiates a module with
+a matching key can replace it by a black box that assumes those properties
+instead of re-proving them (see compositional.py).
+
+The `verified` table keeps, per module, the AST signatures of the last
+verified version and the status of each property, so --incremental can
+carry PASS results forward for properties whose cone did not change
+(see ast_frontend/ast_diff.py).
+"""
+
+from __future__ import annotations
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS proofs (
+    key         TEXT PRIMARY KEY,
+    module      TEXT NOT NULL,
+    struct_hash TEXT NOT NULL,
+    properties  TEXT NOT NULL,   -- JSON list of the proven property dicts
+    design      TEXT,
+    engine      TEXT,
+    proved_at   REAL
+);
+CREATE INDEX IF NOT EXISTS proofs_module ON proofs(module);
+CREATE TABLE IF NOT EXISTS verified (
+    module      TEXT PRIMARY KEY,
+    signatures  TEXT NOT NULL,   -- JSON, ast_diff.signatures()
+    status      TEXT NOT NULL,   -- JSON {property: "PASS" | "FAIL"}
+    verified_at REAL
+);
+"""
+
+class ProofDB:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute(
+            "SELECT module, struct_hash, properties, design, engine, proved_at FROM proofs WHERE key=?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+        module, struct_hash, props, design, engine, proved_at = row
+        return {"key": key, "module": module, "struct_hash": struct_hash,
+                "properties": json.loads(props), "design": design,
+                "engine": engine, "proved_at": proved_at}
+
+    def record(self, key: str, module: str, struct_hash: str, properties: List[Dict[str, Any]],
+               design: str = "", engine: str = "sby"):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO proofs(key, module, struct_hash, properties, design, engine, proved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, module, struct_hash, json.dumps(properties), design, engine, time.time()))
+
+    def last_verified(self, module: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT signatures, status, verified_at FROM verified WHERE module=?",
+                              (module,)).fetchone()
+        if row is None:
+            return None
+        return {"signatures": json.loads(row[0]), "status": json.loads(row[1]), "verified_at": row[2]}
+
+    def save_verified(self, module: str, signatures: Dict[str, Any], status: Dict[str, str]):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO verified(module, signatures, status, verified_at) VALUES (?, ?, ?, ?)",
+                (module, json.dumps(signatures), json.dumps(status), time.time()))
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,161 @@
+"""
+Streaming results sink for the TASK 04 pipeline.
+
+Each finished design is appended as one JSON Lines record to
+results/summary.jsonl and one row to results/summary.csv, so a crash in the
+middle of a large run keeps everything already processed. At the end the
+JSONL is compacted (streamed, not loaded) into the usual results/summary.json.
+
+With resume=True the existing JSONL is kept (minus a half-written last
+record) and `done` holds the VHDL paths already finished, so the caller can
+skip them. Paths in `invalidate` are
+re-run (their newer record wins at compaction) and paths in `drop` are left
+out of the compacted summary (e.g. VHDL files that were deleted).
+
+With a results_store.ResultsStore, every appended entry is also written to
+the run history (one transaction per design) and finalize() closes the run
+and refreshes results/history.json for the dashboard.
+"""
+
+from __future__ import annotations
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Set
+
+STEPS = ["vhd2vl", "yosys_prep", "sby", "v2c", "esbmc"]
+CSV_HEADER = ["design"] + STEPS + ["notes"]
+
+def step_status(entry: Dict[str, Any], step: str) -> str:
+    st = entry["steps"].get(step, {})
+    if st.get("skipped"):
+        return "SKIP"
+    return "OK" if st.get("ok") else "FAIL"
+
+def csv_row(entry: Dict[str, Any]):
+    return [entry["design"]] + [step_status(entry, s) for s in STEPS] + [" | ".join(entry.get("notes", []))]
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield records from a JSONL file, ignoring a truncated last line."""
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # partial write from an interrupted run
+                continue
+
+def trim_partial_line(path: Path):
+    """Cut a JSONL file back to its last newline (a crash can leave half a record)."""
+    if not path.exists():
+        return
+    with path.open("rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(pos, 65536)
+            f.seek(pos - step)
+            i = f.read(step).rfind(b"\n")
+            if i >= 0:
+                pos = pos - step + i + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+
+class SummarySink:
+    def __init__(self, results_dir: Path, resume: bool = False,
+                 invalidate: Iterable[str] = (), drop: Iterable[str] = (), store=None):
+        self.results_dir = results_dir
+        self.store = store
+        self.jsonl_path = results_dir / "summary.jsonl"
+        self.json_path = results_dir / "summary.json"
+        self.csv_path = results_dir / "summary.csv"
+        self.done: Set[str] = set()
+        self.drop: Set[str] = set(drop)
+
+        if resume:
+            # appending after a partial line would glue the next record onto it
+            trim_partial_line(self.jsonl_path)
+            for rec in iter_jsonl(self.jsonl_path):
+                self.done.add(rec.get("vhdl", ""))
+            self.done.difference_update(invalidate)
+            self.done.difference_update(self.drop)
+            # rebuild the CSV from the JSONL so it matches what survived
+            self._rewrite_csv()
+        else:
+            self.jsonl_path.write_text("", encoding="utf-8")
+            with self.csv_path.open("w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(CSV_HEADER)
+
+        # paths with an older record in the JSONL; re-running one means the
+        # incremental CSV holds a stale row and is rebuilt at finalize()
+        self._seen_before: Set[str] = set(invalidate) if resume else set()
+        self._rewritten = False
+        self._jsonl = self.jsonl_path.open("a", encoding="utf-8")
+        self._csv_file = self.csv_path.open("a", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._csv_file)
+
+    def is_done(self, vhdl_path) -> bool:
+        return str(vhdl_path) in self.done
+
+    def append(self, entry: Dict[str, Any]):
+        if entry.get("vhdl", "") in self._seen_before:
+            self._rewritten = True
+        # JSONL first: it is the source of truth for --resume
+        self._jsonl.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._jsonl.flush()
+        self._csv.writerow(csv_row(entry))
+        self._csv_file.flush()
+        if self.store is not None:
+            self.store.record(entry)
+        self.done.add(entry.get("vhdl", ""))
+
+    def close(self):
+        for f in (self._jsonl, self._csv_file):
+            if not f.closed:
+                f.close()
+
+    def _latest(self) -> Iterator[Dict[str, Any]]:
+        """Stream the JSONL keeping only the last record per VHDL path."""
+        last: Dict[str, int] = {}
+        for i, rec in enumerate(iter_jsonl(self.jsonl_path)):
+            last[rec.get("vhdl", "")] = i
+        for i, rec in enumerate(iter_jsonl(self.jsonl_path)):
+            key = rec.get("vhdl", "")
+            if last.get(key) == i and key not in self.drop:
+                yield rec
+
+    def finalize(self):
+        """Close the streams and compact the JSONL into summary.json."""
+        self.close()
+        tmp = self.json_path.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            # same layout as json.dumps(list, indent=2), one entry at a time
+            first = True
+            for rec in self._latest():
+                body = json.dumps(rec, indent=2).replace("\n", "\n  ")
+                f.write(("[\n  " if first else ",\n  ") + body)
+                first = False
+            f.write("[]" if first else "\n]")
+        os.replace(tmp, self.json_path)
+        if self.drop or self._rewritten:
+            self._rewrite_csv()
+        if self.store is not None:
+            self.store.finish_run()
+            self.store.export_history(self.results_dir / "history.json")
+
+    def _rewrite_csv(self):
+        tmp = self.csv_path.with_suffix(".csv.tmp")
+        with tmp.open("w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(CSV_HEADER)
+            for rec in self._latest():
+                w.writerow(csv_row(rec))
+        os.replace(tmp, self.csv_path)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+SQLite results store with run history (next to the summary.json/csv exports).
+
+summary.json only holds the latest run; the store keeps every run so questions
+like "when did this design start failing" or "which step got slower" are
+indexed queries instead of diffs of old JSON files:
+
+    runs        one row per run_task04.py invocation
+    designs     one row per VHDL path
+    results     per (run, design): overall status and the full summary entry
+    steps       per (run, design, step): OK / FAIL / SKIP
+    timings     per (run, design, phase): seconds (tool steps and "total")
+    resources   per (run, design, phase): peak RSS and CPU seconds of the tools
+    properties  per (run, design, assert): PASS / FAIL / UNKNOWN from sby
+
+The database is in WAL mode (dashboard/CLI readers never block the writer)
+and each design is written in one transaction by SummarySink.append(), so an
+interrupted run leaves only whole designs behind. history.json is a compact
+export of the last runs per design for the dashboard.
+
+Usage:
+  python3 task04/results_store.py results/results.sqlite runs
+  python3 task04/results_store.py results/results.sqlite history teste_clock
+  python3 task04/results_store.py results/results.sqlite failing
+  python3 task04/results_store.py results/results.sqlite slower --step sby --factor 1.5
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import socket
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from results_sink import STEPS, step_status
+
+HISTORY_RUNS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    host        TEXT,
+    argv        TEXT,
+    designs     INTEGER NOT NULL DEFAULT 0,
+    failed      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started_at);
+CREATE TABLE IF NOT EXISTS designs (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    vhdl TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS designs_name ON designs(name);
+CREATE TABLE IF NOT EXISTS results (
+    run_id    INTEGER NOT NULL,
+    design_id INTEGER NOT NULL,
+    status    TEXT NOT NULL,       -- OK | FAIL
+    entry     TEXT NOT NULL,       -- JSON summary entry
+    PRIMARY KEY (run_id, design_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_design ON results(design_id, run_id);
+CREATE INDEX IF NOT EXISTS results_status ON results(status, run_id);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id    INTEGER NOT NULL,
+    design_id INTEGER NOT NULL,
+    step      TEXT NOT NULL,
+    status    TEXT NOT NULL,       -- OK | FAIL | SKIP
+    PRIMARY KEY (run_id, design_id, step)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS steps_status ON steps(step, status, run_id);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id    INTEGER NOT NULL,
+    design_id INTEGER NOT NULL,
+    phase     TEXT NOT NULL,       -- step name or "total"
+    seconds   REAL NOT NULL,
+    PRIMARY KEY (run_id, design_id, phase)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS timings_phase ON timings(phase, design_id, run_id);
+CREATE TABLE IF NOT EXISTS resources (
+    run_id      INTEGER NOT NULL,
+    design_id   INTEGER NOT NULL,
+    phase       TEXT NOT NULL,     -- step name or "total"
+    peak_mb     REAL NOT NULL,
+    cpu_seconds REAL NOT NULL,
+    PRIMARY KEY (run_id, design_id, phase)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resources_phase ON resources(phase, run_id);
+CREATE TABLE IF NOT EXISTS properties (
+    run_id    INTEGER NOT NULL,
+    design_id INTEGER NOT NULL,
+    kind      TEXT NOT NULL,
+    expr      TEXT NOT NULL,
+    status    TEXT NOT NULL,       -- PASS | FAIL | UNKNOWN
+    PRIMARY KEY (run_id, design_id, kind, expr)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS properties_status ON properties(status, run_id);
+"""
+
+def design_status(entry: Dict[str, Any]) -> str:
+    return "FAIL" if any(step_status(entry, s) == "FAIL" for s in entry.get("steps", {})) else "OK"
+
+def _failed_key(entry: Dict[str, Any], asserts: List[Dict[str, Any]]) -> Optional[str]:
+    """Key of the assert a failing sby step (or corpus regression) names, if any."""
+    norm = lambda e: re.sub(r'\s+', "", e or "")
+    keys = {norm(a.get("expr")): f"assert:{(a.get('expr') or '').strip()}" for a in asserts}
+    cex = (entry.get("counterexample") or {}).get("assert")
+    if cex:
+        return keys.get(norm(cex))
+    reg = (entry.get("corpus") or {}).get("regression") or {}
+    check = reg.get("check")
+    if isinstance(check, int) and 0 < -check <= len(asserts):  # native_sim: -k = k-th spec assert
+        return f"assert:{(asserts[-check - 1].get('expr') or '').strip()}"
+    return keys.get(norm(reg.get("assert"))) if reg.get("assert") else None
+
+def property_status(entry: Dict[str, Any]) -> Dict[str, str]:
+    """{"assert:<expr>": status} from the sby step (and --incremental carry-over).
+
+    A failing run only proves the assert its counterexample names FAIL; the
+    others are UNKNOWN, as are re-run asserts the wrapper did not check.
+    """
+    try:
+        spec = json.loads(Path(entry.get("spec", "")).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    sby = entry.get("steps", {}).get("sby", {})
+    inc = entry.get("incremental") or {}
+    carried, unchecked = set(inc.get("carried", [])), set(inc.get("unchecked", []))
+    ran = not sby.get("skipped") and bool(sby.get("cmd") or sby.get("corpus_regression"))
+    asserts = spec.get("asserts", [])
+    failed = _failed_key(entry, asserts) if ran and not sby.get("ok") else None
+    out = {}
+    for a in asserts:
+        key = f"assert:{(a.get('expr') or '').strip()}"
+        if key in carried:
+            out[key] = "PASS"
+        elif key in unchecked:
+            out[key] = "UNKNOWN"
+        elif sby.get("ok"):
+            out[key] = "PASS"
+        else:
+            out[key] = "FAIL" if key == failed else "UNKNOWN"
+    return out
+
+class ResultsStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.run_id: Optional[int] = None
+
+    # -- writing -------------------------------------------------------------
+
+    def begin_run(self, argv: List[str]) -> int:
+        with self.db:
+            cur = self.db.execute("INSERT INTO runs(started_at, host, argv) VALUES (?, ?, ?)",
+                                  (time.time(), socket.gethostname(), json.dumps(argv)))
+        self.run_id = cur.lastrowid
+        return self.run_id
+
+    def _design_id(self, name: str, vhdl: str) -> int:
+        row = self.db.execute("SELECT id FROM designs WHERE vhdl=?", (vhdl,)).fetchone()
+        if row is not None:
+            return row[0]
+        return self.db.execute("INSERT INTO designs(name, vhdl) VALUES (?, ?)", (name, vhdl)).lastrowid
+
+    def record(self, entry: Dict[str, Any]):
+        """Write one design of the current run (a single transaction)."""
+        if self.run_id is None:
+            raise RuntimeError("begin_run() first")
+        run = self.run_id
+        status = design_status(entry)
+        with self.db:
+            d = self._design_id(entry.get("design", ""), entry.get("vhdl", ""))
+            self.db.execute("INSERT OR REPLACE INTO results(run_id, design_id, status, entry) VALUES (?, ?, ?, ?)",
+                            (run, d, status, json.dumps(entry, separators=(",", ":"))))
+            steps = entry.get("steps", {})
+            self.db.executemany("INSERT OR REPLACE INTO steps(run_id, design_id, step, status) VALUES (?, ?, ?, ?)",
+                                [(run, d, s, step_status(entry, s)) for s in steps])
+            times = [(run, d, s, st["seconds"]) for s, st in steps.items() if st.get("seconds") is not None]
+            if entry.get("seconds") is not None:
+                times.append((run, d, "total", entry["seconds"]))
+            self.db.executemany("INSERT OR REPLACE INTO timings(run_id, design_id, phase, seconds) VALUES (?, ?, ?, ?)",
+                                times)
+            usage = [(run, d, s, st["peak_mb"], st["cpu_seconds"]) for s, st in steps.items() if "peak_mb" in st]
+            if entry.get("resources"):
+                usage.append((run, d, "total", entry["resources"]["peak_mb"], entry["resources"]["cpu_seconds"]))
+            self.db.executemany("INSERT OR REPLACE INTO resources(run_id, design_id, phase, peak_mb, cpu_seconds) "
+                                "VALUES (?, ?, ?, ?, ?)", usage)
+            self.db.executemany("INSERT OR REPLACE INTO properties(run_id, design_id, kind, expr, status) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                                [(run, d, k.split(":", 1)[0], k.split(":", 1)[1], v)
+                                 for k, v in property_status(entry).items()])
+            self.db.execute("UPDATE runs SET designs = designs + 1, failed = failed + ? WHERE id=?",
+                            (int(status == "FAIL"), run))
+
+    def finish_run(self):
+        if self.run_id is not None:
+            with self.db:
+                self.db.execute("UPDATE runs SET finished_at=? WHERE id=?", (time.time(), self.run_id))
+
+    def close(self):
+        self.db.close()
+
+    # -- queries -------------------------------------------------------------
+
+    def runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self.db.execute("SELECT id, started_at, finished_at, host, designs, failed FROM runs "
+                               "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [{"run": r[0], "started_at": r[1], "finished_at": r[2], "host": r[3], "designs": r[4],
+                 "failed": r[5]} for r in rows]
+
+    def history(self, design: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Last runs of a design (by name or VHDL path), newest first, with step status and times."""
+        rows = self.db.execute(
+            "SELECT r.run_id, runs.started_at, r.status, r.design_id FROM results r "
+            "JOIN designs d ON d.id = r.design_id JOIN runs ON runs.id = r.run_id "
+            "WHERE d.name = ? OR d.vhdl = ? ORDER BY r.run_id DESC LIMIT ?", (design, design, limit)).fetchall()
+        out = []
+        for run, started, status, d in rows:
+            steps = dict(self.db.execute("SELECT step, status FROM steps WHERE run_id=? AND design_id=?",
+                                         (run, d)).fetchall())
+            times = dict(self.db.execute("SELECT phase, seconds FROM timings WHERE run_id=? AND design_id=?",
+                                         (run, d)).fetchall())
+            out.append({"run": run, "started_at": started, "status": status, "steps": steps, "seconds": times})
+        return out
+
+    def failing(self) -> List[Dict[str, Any]]:
+        """Designs failing in their latest run, with the first run of the current failing streak."""
+        rows = self.db.execute(
+            "SELECT d.name, d.vhdl, r.design_id, r.run_id FROM results r JOIN designs d ON d.id = r.design_id "
+            "WHERE r.run_id = (SELECT MAX(run_id) FROM results WHERE design_id = r.design_id) "
+            "AND r.status = 'FAIL' ORDER BY d.name").fetchall()
+        out = []
+        for name, vhdl, d, last in rows:
+            last_ok = self.db.execute("SELECT MAX(run_id) FROM results WHERE design_id=? AND status='OK'",
+                                      (d,)).fetchone()[0] or 0
+            since, started = self.db.execute(
+                "SELECT r.run_id, runs.started_at FROM results r JOIN runs ON runs.id = r.run_id "
+                "WHERE r.design_id=? AND r.run_id > ? ORDER BY r.run_id LIMIT 1", (d, last_ok)).fetchone()
+            steps = [s for (s,) in self.db.execute(
+                "SELECT step FROM steps WHERE run_id=? AND design_id=? AND status='FAIL'", (last, d))]
+            out.append({"design": name, "vhdl": vhdl, "failing_since_run": since, "failing_since": started,
+                        "last_ok_run": last_ok or None, "latest_run": last, "failed_steps": steps})
+        return out
+
+    def slower(self, step: str = "total", factor: float = 1.5, window: int = 5,
+               min_seconds: float = 0.05) -> List[Dict[str, Any]]:
+        """Designs whose latest `step` time is `factor`x the median of their previous `window` runs."""
+        rows = self.db.execute(
+            "SELECT d.name, t.design_id, t.run_id, t.seconds FROM timings t JOIN designs d ON d.id = t.design_id "
+            "WHERE t.phase = ? AND t.run_id = (SELECT MAX(run_id) FROM timings "
+            "WHERE phase = t.phase AND design_id = t.design_id)", (step,)).fetchall()
+        out = []
+        for name, d, run, secs in rows:
+            prev = [s for (s,) in self.db.execute(
+                "SELECT seconds FROM timings WHERE phase=? AND design_id=? AND run_id < ? "
+                "ORDER BY run_id DESC LIMIT ?", (step, d, run, window))]
+            if not prev:
+                continue
+            base = statistics.median(prev)
+            if secs >= min_seconds and secs > factor * max(base, 1e-9):
+                out.append({"design": name, "step": step, "run": run, "seconds": secs,
+                            "median_before": round(base, 3), "ratio": round(secs / max(base, 1e-9), 2)})
+        return sorted(out, key=lambda r: -r["ratio"])
+
+    def usage(self, runs: int = HISTORY_RUNS) -> Dict[str, Dict[str, float]]:
+        """{vhdl: {"peak_mb", "cores"}}: largest peak and CPU/wall ratio over the last `runs` runs."""
+        min_run = self.db.execute("SELECT COALESCE(MIN(id), 0) FROM (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                                  (runs,)).fetchone()[0]
+        rows = self.db.execute(
+            "SELECT d.vhdl, MAX(u.peak_mb), MAX(u.cpu_seconds / MAX(t.seconds, 0.001)) FROM resources u "
+            "JOIN designs d ON d.id = u.design_id "
+            "JOIN timings t ON t.run_id = u.run_id AND t.design_id = u.design_id AND t.phase = u.phase "
+            "WHERE u.phase = 'total' AND u.run_id >= ? GROUP BY u.design_id", (min_run,))
+        return {vhdl: {"peak_mb": peak, "cores": cores} for vhdl, peak, cores in rows}
+
+    def export_history(self, path: Path, runs: int = HISTORY_RUNS):
+        """Compact per-design history for the dashboard (last `runs` runs)."""
+        min_run = self.db.execute("SELECT COALESCE(MIN(id), 0) FROM (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                                  (runs,)).fetchone()[0]
+        hist: Dict[str, Dict[str, Any]] = {}
+        for name, run, status in self.db.execute(
+                "SELECT d.name, r.run_id, r.status FROM results r JOIN designs d ON d.id = r.design_id "
+                "WHERE r.run_id >= ? ORDER BY r.run_id", (min_run,)):
+            hist.setdefault(name, {"runs": []})["runs"].append([run, status])
+        for f in self.failing():
+            if f["design"] in hist:
+                hist[f["design"]]["failing_since_run"] = f["failing_since_run"]
+                hist[f["design"]]["failing_since"] = f["failing_since"]
+        tmp = Path(path).with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(hist, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+def main():
+    ap = argparse.ArgumentParser(description="Query the run_task04 results store.")
+    ap.add_argument("db", help="results/results.sqlite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("runs")
+    p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("history")
+    p.add_argument("design", help="Design name or VHDL path")
+    p.add_argument("--limit", type=int, default=20)
+    sub.add_parser("failing")
+    p = sub.add_parser("slower")
+    p.add_argument("--step", default="total", choices=STEPS + ["total"])
+    p.add_argument("--factor", type=float, default=1.5)
+    p.add_argument("--window", type=int, default=5)
+    args = ap.parse_args()
+
+    if not Path(args.db).exists():
+        raise SystemExit(f"No results store at {args.db}")
+    store = ResultsStore(Path(args.db))
+    try:
+        if args.cmd == "runs":
+            r = store.runs(args.limit)
+        elif args.cmd == "history":
+            r = store.history(args.design, args.limit)
+        elif args.cmd == "failing":
+            r = store.failing()
+        else:
+            r = store.slower(args.step, args.factor, args.window)
+    finally:
+        store.close()
+    print(json.dumps(r, indent=2))
+
+if __name__ == "__main__":
+    main()
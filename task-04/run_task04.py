@@ -6,7 +6,8 @@ This script does NOT assume tools are installed. It will:
 - detect VHDL files (recursively)
 - generate auxiliary specs (ports + @c2vhdl tags)
 - optionally run external tools (vhd2vl, yosys prep, sby, v2c, esbmc)
-- generate a summary.json / summary.csv
+- stream results to summary.jsonl / summary.csv as each design finishes,
+  then compact them into summary.json
 - optionally generate a common AST JSON (Objective 5) by merging VHDL tags + Yosys JSON
 
 Usage (basic):
@@ -14,24 +15,93 @@ Usage (basic):
 
 Optional:
   --run-yosys  (requires yosys)
-  --run-sby    (requires symbiyosys 'sby')
+  --run-sby    (requires symbiyosys 'sby'; a failing run's VCD is summarised
+               into results/traces/<design>.trace.json, see vcd_trace.py)
   --run-esbmc  (requires esbmc + v2c configured)
-  --gen-ast    (requires yosys for structural AST, but still works VHDL-only)
+  --gen-ast    (structural AST from Yosys JSON when available, else from the
+               Verilog netlist via the lightweight parser, else VHDL-only)
+  --resume     (skip designs already recorded in results/summary.jsonl)
+  --compositional (sby on a property wrapper; reuse proofs of unchanged designs
+               and black-box proven submodules, see compositional.py)
+  --incremental (implies --compositional; diff the AST against the last
+               verified version and re-run only the properties whose cone of
+               influence changed, carrying PASS forward for the rest)
+  --native-sim N (compile the v2c C model into a shared library and run N
+               random vectors natively before ESBMC, see native_sim.py;
+               compiler template: "cc" in tools.json)
+  --replay-corpus (replay the counterexamples of past failing sby/ESBMC runs,
+               kept in results/corpus/<design>.json, on the native model
+               before the formal steps; a regression skips them, see cex_corpus.py)
+  --yosys-pool N (run yosys_prep on N long-lived yosys processes instead of
+               one `yosys -p` launch per design)
+  --daemon SOCK (run on a resident ../pipeline_daemon.py that keeps imports,
+               tools.json, tool probes, parsed ASTs and yosys pools warm;
+               TASK04_DAEMON=SOCK does the same for every CLI)
+  --results-db F (SQLite run history, default results/results.sqlite; query it
+               with results_store.py; --no-store to skip)
+  --changed-only (like --resume, but re-run VHDL files added/modified since the
+               last run's results/vhdl_snapshot.json and drop deleted ones)
+
+Generated files (specs, harnesses, .sby, wrappers, ASTs) are only rewritten
+when their content changes. batch_gen.py renders specs, harnesses and sby
+wrappers for every entity of a tree (several per file) in one pass.
+
+Distributed (coordinator/worker over a shared SQLite queue file):
+  python3 run_task04.py --in inputs_vhdl --out . --queue q.sqlite --coordinator --local-workers 4
+  python3 run_task04.py --queue /shared/q.sqlite --worker     (on each build node)
+  Workers write artifacts under the coordinator's --out, so it must be shared.
+  Each job carries a memory/core demand estimated from the netlist stats and
+  past peaks; workers only lease jobs that fit their host's --mem-budget GB /
+  --core-budget (defaults: 90% of RAM, all cores) and requeue a job killed for
+  memory with a larger demand (see admission.py), so --local-workers can be
+  set to the core count without OOM kills.
 """
 
 from __future__ import annotations
 import argparse
-import csv
+import copy
 import json
+import os
 import shlex
 import shutil
+import socket
 import subprocess
+import sys
+import threading
+import time
+import traceback
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+# discovery.py is shared with the other entry points at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if __name__ == "__main__":
+    # thin client: hand the job to a resident daemon before the heavy imports
+    from pipeline_daemon import maybe_forward
+    maybe_forward("run_task04")
+from discovery import DEFAULT_IGNORE, walk, load_snapshot, save_snapshot, diff_snapshot, write_if_changed
 from ast_frontend.vhdl_light_parser import parse_vhdl_to_ast
 from ast_frontend.yosys_json_adapter import yosys_json_to_ast
+from ast_frontend.verilog_light_parser import verilog_to_ast
 from unify_ast import merge_ast  # common merge fn
+from results_sink import SummarySink, STEPS, iter_jsonl
+from results_store import ResultsStore
+from work_queue import SqliteQueue, Heartbeat
+from yosys_pool import YosysPool, script_from_cmd
+from proof_db import ProofDB
+import admission
+import compositional
+import native_sim
+import cex_corpus
+import vcd_trace
+from ast_frontend import ast_diff
+from ast_frontend.value_ranges import (ValueRange, bits_for, c_constraint, is_trivial, map_to_netlist,
+                                       input_assumes, internal_assumes, inject_assumes, width_of)
+from inicio_auto import parse_vhdl as parse_vhdl_info, generate_verification_wrapper
+
+# step selection forwarded to workers in each job
+STEP_FLAGS = ["run_yosys", "run_sby", "run_esbmc", "gen_ast", "compositional", "incremental", "native_sim",
+              "replay_corpus"]
 
 def find_existing_verilog(design: str, search_dir: Path) -> Optional[Path]:
     """Best-effort fallback: use pre-generated Verilog (e.g., elaborado_*.v).
@@ -45,7 +115,6 @@ def find_existing_verilog(design: str, search_dir: Path) -> Optional[Path]:
     candidates = [
         search_dir / f"{design}.v",
         search_dir / f"elaborado_{design}.v",
-        search_dir / "elaborado.v",
     ]
     for c in candidates:
         if c.exists():
@@ -61,21 +130,114 @@ def find_existing_verilog(design: str, search_dir: Path) -> Optional[Path]:
     return None
 
 
+# Caches kept across runs when a pipeline_daemon.py process hosts the pipeline
+# (None in a normal CLI run): tools.json, parsed ASTs and yosys pools.
+_RESIDENT: Optional[Dict[str, Any]] = None
+# `which` hits, keyed by (PATH, executable): the found path is only re-checked
+# with a stat; a miss is probed again, so a tool installed meanwhile is seen
+_WHICH: Dict[tuple, str] = {}
+
+def enable_resident_caches():
+    global _RESIDENT
+    release_resident_caches()
+    _RESIDENT = {"tools": {}, "ast": {}, "pools": {}, "hits": 0, "misses": 0}
+    _WHICH.clear()
+
+def release_resident_caches():
+    if _RESIDENT is not None:
+        for pool in _RESIDENT["pools"].values():
+            pool.close()
+        _RESIDENT["pools"].clear()
+
+def resident_stats() -> Dict[str, Any]:
+    if _RESIDENT is None:
+        return {}
+    return {"tools": len(_RESIDENT["tools"]), "asts": len(_RESIDENT["ast"]), "which": len(_WHICH),
+            "yosys_pools": sorted(_RESIDENT["pools"]), "hits": _RESIDENT["hits"], "misses": _RESIDENT["misses"]}
+
+def _file_key(path: Path) -> tuple:
+    st = path.stat()
+    return (str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+def cached_ast(kind: str, path: Path, build, *extra):
+    """build(path) through the resident cache (a deep copy: callers may mutate it)."""
+    if _RESIDENT is None:
+        return build(path)
+    key = (kind, _file_key(path)) + extra
+    hit = _RESIDENT["ast"].get(key)
+    if hit is None:
+        _RESIDENT["misses"] += 1
+        hit = _RESIDENT["ast"][key] = build(path)
+    else:
+        _RESIDENT["hits"] += 1
+    return copy.deepcopy(hit)
+
 def load_tools(tools_path: Path) -> Dict[str, str]:
     if not tools_path.exists():
         return {}
+    if _RESIDENT is not None:
+        key = _file_key(tools_path)
+        if key not in _RESIDENT["tools"]:
+            _RESIDENT["tools"][key] = json.loads(tools_path.read_text(encoding="utf-8", errors="replace"))
+        return dict(_RESIDENT["tools"][key])
     return json.loads(tools_path.read_text(encoding="utf-8", errors="replace"))
 
 def tool_available(cmd: str) -> bool:
     parts = shlex.split(cmd)
     if not parts:
         return False
-    return shutil.which(parts[0]) is not None
+    key = (os.environ.get("PATH", ""), parts[0])
+    hit = _WHICH.get(key)
+    if hit and os.access(hit, os.X_OK):
+        return True
+    found = shutil.which(parts[0])
+    if found:
+        _WHICH[key] = found
+    else:
+        _WHICH.pop(key, None)
+    return found is not None
+
+def acquire_pool(args) -> Optional[YosysPool]:
+    if not (args.yosys_pool > 0 and args.run_yosys and not args.coordinator):
+        return None
+    if _RESIDENT is None:
+        return YosysPool(args.yosys_pool)
+    pools = _RESIDENT["pools"]
+    if args.yosys_pool not in pools:
+        pools[args.yosys_pool] = YosysPool(args.yosys_pool)
+    return pools[args.yosys_pool]
+
+def release_pool(pool: Optional[YosysPool]):
+    if pool is not None and _RESIDENT is None:
+        pool.close()
 
 def sh(cmd: str, cwd: Optional[Path] = None) -> Dict[str, Any]:
-    p = subprocess.run(cmd, shell=True, cwd=str(cwd) if cwd else None,
-                       text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return {"ok": p.returncode == 0, "returncode": p.returncode, "stdout": p.stdout, "stderr": p.stderr}
+    """Run a tool command; also measures the peak RSS and CPU time of its process tree."""
+    t0 = time.perf_counter()
+    p = subprocess.Popen(cmd, shell=True, cwd=str(cwd) if cwd else None,
+                         text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # drain both pipes in threads and reap with wait4 (communicate() would discard the rusage)
+    outs = {}
+    readers = [threading.Thread(target=lambda k, f: outs.__setitem__(k, f.read()), args=(k, f), daemon=True)
+               for k, f in (("stdout", p.stdout), ("stderr", p.stderr))]
+    for t in readers:
+        t.start()
+    _, status, ru = os.wait4(p.pid, 0)
+    p.returncode = os.waitstatus_to_exitcode(status)
+    for t in readers:
+        t.join()
+    p.stdout.close()
+    p.stderr.close()
+    return {"ok": p.returncode == 0, "returncode": p.returncode, "stdout": outs["stdout"], "stderr": outs["stderr"],
+            "seconds": round(time.perf_counter() - t0, 3),
+            "peak_mb": round(ru.ru_maxrss / 1024, 1), "cpu_seconds": round(ru.ru_utime + ru.ru_stime, 3)}
+
+def usage(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Step-dict fields from a sh() result: measured peak/CPU, and "oom" when it ran out of memory."""
+    u = {k: r[k] for k in ("peak_mb", "cpu_seconds") if k in r}
+    if admission.is_oom(r):
+        u["oom"] = True
+    return u
 
 def ensure_dirs(out_root: Path):
     for p in ["specs", "generated/verilog", "generated/verilog_prep", "generated/yosys_json",
@@ -83,9 +245,21 @@ def ensure_dirs(out_root: Path):
               "results", "results/ast"]:
         (out_root / p).mkdir(parents=True, exist_ok=True)
 
+def netlist_ast(design: str, yosys_json: Path, verilog_prep: Path, verilog_out: Path):
+    """(structural AST, Verilog file parsed): the Yosys JSON when present, else the
+    Verilog netlist we already have through the lightweight parser; (None, None) without either."""
+    if yosys_json.exists():
+        return yosys_json_to_ast(yosys_json, design_name=design), None
+    src_v = verilog_prep if verilog_prep.exists() else (verilog_out if verilog_out.exists() else None)
+    if src_v is None:
+        return None, None
+    return cached_ast("verilog", src_v, lambda p: verilog_to_ast(p, design_name=design), design), src_v
+
 def extract_spec_from_ast(vhdl_ast) -> Dict[str, Any]:
-    ports_in = [p.__dict__ for p in vhdl_ast.ports if p.direction == "in"]
-    ports_out = [p.__dict__ for p in vhdl_ast.ports if p.direction == "out"]
+    def port_dict(p):
+        return {k: v for k, v in p.__dict__.items() if not (k == "bits" and v is None)}
+    ports_in = [port_dict(p) for p in vhdl_ast.ports if p.direction == "in"]
+    ports_out = [port_dict(p) for p in vhdl_ast.ports if p.direction == "out"]
     assumes = [pr.__dict__ for pr in vhdl_ast.properties if pr.kind == "assume"]
     asserts = [pr.__dict__ for pr in vhdl_ast.properties if pr.kind == "assert"]
     return {
@@ -95,18 +269,32 @@ def extract_spec_from_ast(vhdl_ast) -> Dict[str, Any]:
         "assumes": assumes,
         "asserts": asserts,
         "has_clock": bool((vhdl_ast.stats or {}).get("has_clock", False)),
+        "ranges": [r.__dict__ for r in vhdl_ast.ranges or []],
     }
 
-def generate_harness_c(spec: Dict[str, Any], out_c: Path):
+def generate_harness_c(spec: Dict[str, Any], out_c: Path, y_ast=None):
+    """Writes render_harness_c() to out_c (left untouched when identical)."""
+    write_if_changed(out_c, render_harness_c(spec, y_ast))
+
+def render_harness_c(spec: Dict[str, Any], y_ast=None) -> str:
     """
     Generates a minimal ESBMC harness template.
     IMPORTANT: You MUST adjust the entry-point call to match your V2C output.
+
+    Input ports with a VHDL value range get a real __VERIFIER_assume; output
+    and internal-signal ranges (mapped through the netlist when y_ast is given)
+    are listed as template lines, like the @c2vhdl tags.
     """
     design = spec["design_name"]
     inputs = spec["ports"]["inputs"]
     outputs = spec["ports"]["outputs"]
     assumes = spec.get("assumes", [])
     asserts = spec.get("asserts", [])
+    ranges = [ValueRange(**r) for r in spec.get("ranges", [])]
+    port_ranges = {r.signal: r for r in ranges if r.port}
+    internal = [r for r in ranges if not r.port]
+    if y_ast is not None:
+        internal = map_to_netlist(internal, y_ast)
 
     def c_type(bits: int) -> str:
         if bits <= 1: return "unsigned char"
@@ -146,6 +334,28 @@ def generate_harness_c(spec: Dict[str, Any], out_c: Path):
         bits = int(p.get("width", 1))
         lines.append(f"  {c_type(bits)} {p['name']} = 0;")
     lines.append("")
+    range_lines = []
+    for p in inputs:
+        r = port_ranges.get(p["name"])
+        bits = int(p.get("width", 1))
+        if r is not None and not is_trivial(r, bits):
+            range_lines.append(f"  __VERIFIER_assume({c_constraint(r, p['name'], bits)});")
+    for p in outputs:
+        r = port_ranges.get(p["name"])
+        bits = int(p.get("width", 1))
+        if r is not None and not is_trivial(r, bits):
+            range_lines.append(f"  // RANGE (output): assert({c_constraint(r, p['name'], bits)});")
+    for r in internal:
+        name = r.netlist_wire or r.signal
+        bits = width_of(y_ast, name) if r.netlist_wire else bits_for(r.lo, r.hi)
+        if is_trivial(r, bits):
+            continue
+        range_lines.append(f"  // RANGE (internal {r.signal} -> {name}): "
+                           f"__VERIFIER_assume({c_constraint(r, name, bits)});")
+    if range_lines:
+        lines.append("  // Faixas VHDL (integer range / enum) perdidas na tradução")
+        lines += range_lines
+        lines.append("")
     lines.append("  // Assumptions extraídas do VHDL")
     for a in assumes:
         expr = (a.get("expr") or "").strip()
@@ -162,114 +372,324 @@ def generate_harness_c(spec: Dict[str, Any], out_c: Path):
             lines.append(f"  // ASSERT: {expr}")
     lines.append("  return 0;")
     lines.append("}")
-    out_c.write_text("\n".join(lines), encoding="utf-8")
+    return "\n".join(lines)
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--in", dest="inp", required=True, help="Input folder (VHDL files)")
-    ap.add_argument("--out", dest="out", required=True, help="Output root (task04 folder)")
-    ap.add_argument("--tools", dest="tools", default=None, help="tools.json path (optional)")
-    ap.add_argument("--run-yosys", action="store_true")
-    ap.add_argument("--run-sby", action="store_true")
-    ap.add_argument("--run-esbmc", action="store_true")
-    ap.add_argument("--gen-ast", action="store_true")
-    args = ap.parse_args()
+def record_counterexample(spec: Dict[str, Any], sby_file: Path, stdout: str, sources, y_ast,
+                          out: Path, entry: Dict[str, Any], clock: str = ""):
+    """Summarise the VCD of a failing sby run into results/traces/<design>.trace.json.
 
-    inp = Path(args.inp)
-    out = Path(args.out)
-    ensure_dirs(out)
+    Only the failing assert's signals and the inputs in its cone of influence
+    are kept, and the trace is cut at the first step where the assert fails.
+    """
+    vcd = vcd_trace.find_trace(sby_file, stdout)
+    if vcd is None:
+        return
+    expr = vcd_trace.failed_assert(stdout, sources)
+    signals = ast_diff.cone_inputs(y_ast, expr) if y_ast is not None and expr else None
+    if signals is None:  # unknown cone: keep every input
+        signals = [p["name"] for p in spec["ports"]["inputs"]]
+    trace = vcd_trace.summarize(vcd, expr, signals, clock or native_sim.clock_port(spec))
+    trace_path = out / "results" / "traces" / f"{spec['design_name']}.trace.json"
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+    trace_path.write_text(json.dumps(trace), encoding="utf-8")
+    entry["counterexample"] = {"trace": str(trace_path), "fail_step": trace["fail_step"], "assert": expr}
+    return trace
 
-    tools_path = Path(args.tools) if args.tools else (out / "tools.json")
-    tools = load_tools(tools_path)
+def corpus_dir(args, out: Path) -> Path:
+    return Path(args.corpus) if getattr(args, "corpus", None) else out / "results" / "corpus"
 
-    vhdl_files = sorted([p for p in inp.rglob("*.vhd")] + [p for p in inp.rglob("*.vhdl")])
-    if not vhdl_files:
-        raise SystemExit(f"No VHDL found under: {inp}")
+def harvest_counterexample(case: Optional[Dict[str, Any]], corpus: "cex_corpus.Corpus", vf: Path,
+                           entry: Dict[str, Any]):
+    """Keep a new counterexample's input sequence for replay by later runs."""
+    if case is None:
+        return
+    if corpus.add(case, str(vf)):
+        entry.setdefault("corpus", {})["added"] = case["id"]
+        entry["notes"].append(f"corpus: counterexample {case['id']} added ({case['source']}, "
+                              f"{len(case['vectors'])} step(s))")
 
-    summary = []
-    for vf in vhdl_files:
-        vhdl_ast = parse_vhdl_to_ast(vf)
-        spec = extract_spec_from_ast(vhdl_ast)
-
-        verilog_dir = out / "inputs_verilog"
-
-        spec_path = out / "specs" / f"{spec['design_name']}.json"
-        spec_path.write_text(json.dumps(spec, indent=2), encoding="utf-8")
-
-        entry = {
-            "design": spec["design_name"],
-            "vhdl": str(vf),
-            "spec": str(spec_path),
-            "steps": {},
-            "notes": [],
-            "generated": {},
-        }
-
-        # VHD2VL
-        verilog_out = out / "generated" / "verilog" / f"{spec['design_name']}.v"
-        if "vhd2vl" in tools:
-            cmd = tools["vhd2vl"].format(in_vhdl=vf, out_verilog=verilog_out)
-            if tool_available(cmd):
-                r = sh(cmd)
-                (out/"logs"/"translate"/f"{spec['design_name']}_vhd2vl.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
-                entry["steps"]["vhd2vl"] = {"ok": r["ok"], "cmd": cmd}
-            else:
-                entry["steps"]["vhd2vl"] = {"ok": False, "cmd": cmd, "skipped": True}
-                entry["notes"].append("vhd2vl not found in PATH (configure/install)")
+def run_v2c(spec: Dict[str, Any], in_verilog: Path, c_model: Path, out: Path, tools: Dict[str, str],
+            entry: Dict[str, Any]):
+    if "v2c" in tools:
+        cmd = tools["v2c"].format(in_verilog=in_verilog, out_c=c_model)
+        if tool_available(cmd):
+            r = sh(cmd)
+            (out/"logs"/"translate"/f"{spec['design_name']}_v2c.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
+            entry["steps"]["v2c"] = {"ok": r["ok"], "cmd": cmd, "seconds": r["seconds"], **usage(r)}
+        else:
+            entry["steps"]["v2c"] = {"ok": False, "cmd": cmd, "skipped": True}
+            entry["notes"].append("v2c not found in PATH (configure/install)")
+    else:
+        entry["steps"]["v2c"] = {"ok": False, "cmd": "", "skipped": True}
+        entry["notes"].append("v2c not configured in tools.json")
+
+def replay_corpus(spec: Dict[str, Any], corpus: "cex_corpus.Corpus", in_verilog: Path, out: Path,
+                  tools: Dict[str, str], entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Replay the corpus on the native model; returns the regression, if any.
+
+    Runs v2c ahead of the formal steps (the ESBMC block then reuses the model).
+    Without a C model or compiler the corpus is not replayed and the formal
+    steps run as usual.
+    """
+    c_model = out / "generated" / "c" / f"{spec['design_name']}.c"
+    run_v2c(spec, in_verilog, c_model, out, tools, entry)
+    info = {"cases": len(corpus.cases)}
+    entry["corpus"] = info
+    cc = tools.get("cc", native_sim.DEFAULT_CC)
+    if not (entry["steps"]["v2c"]["ok"] and c_model.exists()):
+        entry["notes"].append("corpus: not replayed (no C model from v2c)")
+        return None
+    if not tool_available(cc):
+        entry["notes"].append("corpus: not replayed (C compiler not found, configure \"cc\" in tools.json)")
+        return None
+    c = native_sim.compile_model(c_model, spec, out / "generated" / "native" / spec["design_name"] / "replay", cc)
+    if not c["ok"]:
+        entry["notes"].append(f"corpus: not replayed ({(c.get('error') or '').strip().splitlines()[-1:]})")
+        return None
+    r = cex_corpus.replay(c["model"], c["inputs"], corpus.cases)
+    info.update(r)
+    if r["ok"]:
+        return None
+    g = r["regression"]
+    entry["notes"].append(f"corpus: regression, counterexample {g['id']} ({g['source']}) fails again "
+                          f"at step {g['step']}; formal steps skipped")
+    return g
+
+def run_sby_compositional(vf: Path, spec: Dict[str, Any], y_ast, design_v: Path, out: Path,
+                          tools: Dict[str, str], entry: Dict[str, Any], proof_db_path: Path,
+                          incremental: bool = False, corpus: Optional["cex_corpus.Corpus"] = None):
+    """sby step with proof reuse, black-boxed proven submodules and (optionally)
+    property-level re-verification of the asserts whose cone changed."""
+    design = spec["design_name"]
+    db = ProofDB(proof_db_path)
+    try:
+        p = compositional.plan(y_ast, spec, out, db)
+        entry["compositional"] = {"key": p["key"], "blackboxes": [m for m, _ in p["blackboxes"]]}
+        sigs = ast_diff.signatures(y_ast, spec.get("assumes", []), spec.get("asserts", []),
+                                   env=[s for s in compositional.spec_props(spec) if s.startswith("range:")]) \
+            if incremental else None
+        if db.lookup(p["key"]):
+            entry["steps"]["sby"] = {"ok": True, "cmd": "", "reused_proof": p["key"]}
+            entry["notes"].append("sby: proof reused (same structure and properties)")
+            if sigs is not None:
+                db.save_verified(design, sigs, {k: "PASS" for k in sigs["properties"]})
+            return
+
+        rerun = None
+        if incremental:
+            last = db.last_verified(design) or {"signatures": None, "status": {}}
+            d = ast_diff.diff(last["signatures"], sigs)
+            carried = {k: "PASS" for k in d["unchanged"] if last["status"].get(k) == "PASS"}
+            rerun = [k for k in sigs["properties"] if k not in carried]
+            entry["incremental"] = {"carried": sorted(carried), "rerun": rerun, "changed": d["changed"],
+                                    "added": d["added"], "removed": d["removed"],
+                                    "cells_changed": d["cells_changed"]}
+            if not rerun:
+                entry["steps"]["sby"] = {"ok": True, "cmd": "", "carried": len(carried)}
+                entry["notes"].append("sby: no property cone changed, PASS carried forward")
+                db.save_verified(design, sigs, carried)
+                db.record(p["key"], design, p["struct_hash"], spec.get("assumes", []) + spec.get("asserts", []),
+                          design=str(vf))
+                return
+
+        gen = out / "generated" / "compositional" / design
+        gen.mkdir(parents=True, exist_ok=True)
+        stubs = []
+        for module, _ in p["blackboxes"]:
+            stub = gen / f"{module}_blackbox.v"
+            write_if_changed(stub, compositional.blackbox_stub(y_ast.library[module],
+                                                               compositional.load_spec(out, module)))
+            stubs.append((module, stub))
+        info = parse_vhdl_info(str(vf))
+        info["entity_name"] = info["entity_name"] or design
+        # the wrapper checks exactly the properties the proof is recorded for
+        info["assumes"] = [a["expr"] for a in spec.get("assumes", [])]
+        info["asserts"] = [a["expr"] for a in spec.get("asserts", [])]
+        unchecked = []
+        if rerun is not None:
+            info["asserts"] = [a for a in info["asserts"] if f"assert:{a.strip()}" in rerun]
+            # a re-run key the wrapper does not assert must not get a vacuous PASS
+            checked = {f"assert:{a.strip()}" for a in info["asserts"]}
+            unchecked = [k for k in rerun if k not in checked]
+            if unchecked:
+                entry["incremental"]["unchecked"] = unchecked
+                entry["notes"].append(f"sby: {len(unchecked)} re-run propert(ies) not in the wrapper, left UNKNOWN")
+        # internal-signal ranges: assumed inside the design copy, mapped to netlist wires
+        ranged = internal_assumes(spec.get("ranges", []), y_ast)
+        if ranged:
+            ranged_v = gen / f"{design}_ranges.v"
+            write_if_changed(ranged_v, inject_assumes(design_v.read_text(encoding="utf-8", errors="replace"),
+                                                      y_ast.design_name, ranged))
+            design_v = ranged_v
+            entry["range_assumes"] = ranged
+        wrapper_sv = gen / f"verif_{design}.sv"
+        wrapper_top = generate_verification_wrapper(info, str(wrapper_sv))
+        sby_file = gen / f"{design}.sby"
+        write_if_changed(sby_file, compositional.sby_text(design_v, wrapper_sv, wrapper_top, stubs, info["has_clock"]))
+
+        cmd = tools["sby"].format(sby_file=sby_file)
+        if not tool_available(cmd):
+            entry["steps"]["sby"] = {"ok": False, "cmd": cmd, "skipped": True}
+            entry["notes"].append("sby not found in PATH (configure/install)")
+            return
+        r = sh(cmd, cwd=sby_file.parent)
+        (out/"logs"/"sby"/f"{design}.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
+        entry["steps"]["sby"] = {"ok": r["ok"], "cmd": cmd, "sby": str(sby_file), "seconds": r["seconds"],
+                                 **usage(r)}
+        if not r["ok"]:
+            trace = record_counterexample(spec, sby_file, r["stdout"], [wrapper_sv, design_v], y_ast, out, entry,
+                                          info["clock_port"])
+            if trace is not None and corpus is not None:
+                harvest_counterexample(cex_corpus.from_trace(trace, [p["name"] for p in spec["ports"]["inputs"]]),
+                                       corpus, vf, entry)
+        if rerun is not None:
+            # one sby run covers all re-run asserts: on failure none of them is carried
+            status = dict(carried)
+            status.update({k: "UNKNOWN" if k in unchecked else "PASS" if r["ok"] else "FAIL" for k in rerun})
+            db.save_verified(design, sigs, status)
+        if r["ok"] and not unchecked:
+            db.record(p["key"], design, p["struct_hash"], spec.get("assumes", []) + spec.get("asserts", []),
+                      design=str(vf))
+    finally:
+        db.close()
+
+def run_design(vf: Path, out: Path, tools: Dict[str, str], args,
+               pool: Optional[YosysPool] = None) -> Dict[str, Any]:
+    """Run the step chain for one VHDL file and return its summary entry."""
+    t0 = time.perf_counter()
+    entry = _run_steps(vf, out, tools, args, pool)
+    entry["seconds"] = round(time.perf_counter() - t0, 3)
+    measured = [st for st in entry["steps"].values() if "peak_mb" in st]
+    if measured:
+        entry["resources"] = {"peak_mb": max(st["peak_mb"] for st in measured),
+                              "cpu_seconds": round(sum(st["cpu_seconds"] for st in measured), 3)}
+        if any(st.get("oom") for st in measured):
+            entry["resources"]["oom"] = True
+    return entry
+
+def _run_steps(vf: Path, out: Path, tools: Dict[str, str], args,
+               pool: Optional[YosysPool]) -> Dict[str, Any]:
+    vhdl_ast = cached_ast("vhdl", vf, parse_vhdl_to_ast)
+    spec = extract_spec_from_ast(vhdl_ast)
+
+    verilog_dir = out / "inputs_verilog"
+
+    spec_path = out / "specs" / f"{spec['design_name']}.json"
+    write_if_changed(spec_path, json.dumps(spec, indent=2))
+
+    entry = {
+        "design": spec["design_name"],
+        "vhdl": str(vf),
+        "spec": str(spec_path),
+        "steps": {},
+        "notes": [],
+        "generated": {},
+    }
+
+    # VHD2VL
+    verilog_out = out / "generated" / "verilog" / f"{spec['design_name']}.v"
+    if "vhd2vl" in tools:
+        cmd = tools["vhd2vl"].format(in_vhdl=vf, out_verilog=verilog_out)
+        if tool_available(cmd):
+            r = sh(cmd)
+            (out/"logs"/"translate"/f"{spec['design_name']}_vhd2vl.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
+            entry["steps"]["vhd2vl"] = {"ok": r["ok"], "cmd": cmd, "seconds": r["seconds"], **usage(r)}
         else:
-            entry["steps"]["vhd2vl"] = {"ok": False, "cmd": "", "skipped": True}
-            entry["notes"].append("vhd2vl not configured in tools.json")
+            entry["steps"]["vhd2vl"] = {"ok": False, "cmd": cmd, "skipped": True}
+            entry["notes"].append("vhd2vl not found in PATH (configure/install)")
+    else:
+        entry["steps"]["vhd2vl"] = {"ok": False, "cmd": "", "skipped": True}
+        entry["notes"].append("vhd2vl not configured in tools.json")
 
-        # Fallback: use pre-generated Verilog if VHD2VL was skipped/failed
-        if not verilog_out.exists():
-            src_v = find_existing_verilog(spec["design_name"], verilog_dir)
+    # Fallback: use pre-generated Verilog if VHD2VL was skipped/failed
+    if not verilog_out.exists():
+        src_v = None
+        for d in [verilog_dir] + [Path(v) for v in (getattr(args, "verilog_dir", None) or [])]:
+            src_v = find_existing_verilog(spec["design_name"], d)
             if src_v is not None:
-                shutil.copyfile(src_v, verilog_out)
-                entry["notes"].append(f"Used existing Verilog fallback: {src_v}")
-                # Mark vhd2vl as effectively ok for downstream steps
-                st = entry["steps"].get("vhd2vl", {})
-                st.update({"ok": True, "skipped": False, "fallback": True, "src": str(src_v)})
-                entry["steps"]["vhd2vl"] = st
-            else:
-                entry["notes"].append("No existing Verilog found for fallback (put elaborado_*.v in task04/inputs_verilog).")
+                break
+        if src_v is not None:
+            shutil.copyfile(src_v, verilog_out)
+            entry["notes"].append(f"Used existing Verilog fallback: {src_v}")
+            # Mark vhd2vl as effectively ok for downstream steps
+            st = entry["steps"].get("vhd2vl", {})
+            st.update({"ok": True, "skipped": False, "fallback": True, "src": str(src_v)})
+            entry["steps"]["vhd2vl"] = st
+        else:
+            entry["notes"].append("No existing Verilog found for fallback (put elaborado_*.v in task04/inputs_verilog).")
 
-        entry["generated"]["verilog"] = str(verilog_out) if verilog_out.exists() else ""
+    entry["generated"]["verilog"] = str(verilog_out) if verilog_out.exists() else ""
 
-        # Yosys prep + json
-        verilog_prep = out / "generated" / "verilog_prep" / f"{spec['design_name']}_prep.v"
-        yosys_json = out / "generated" / "yosys_json" / f"{spec['design_name']}.json"
-        if args.run_yosys and "yosys_prep" in tools:
-            cmd = tools["yosys_prep"].format(in_verilog=verilog_out, out_verilog_prep=verilog_prep, out_yosys_json=yosys_json, top=spec["design_name"])
-            if tool_available(cmd):
-                r = sh(cmd)
-                (out/"logs"/"translate"/f"{spec['design_name']}_yosys.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
-                entry["steps"]["yosys_prep"] = {"ok": r["ok"], "cmd": cmd}
-            else:
-                entry["steps"]["yosys_prep"] = {"ok": False, "cmd": cmd, "skipped": True}
-                entry["notes"].append("yosys not found in PATH (configure/install)")
+    # Yosys prep + json
+    verilog_prep = out / "generated" / "verilog_prep" / f"{spec['design_name']}_prep.v"
+    yosys_json = out / "generated" / "yosys_json" / f"{spec['design_name']}.json"
+    if args.run_yosys and "yosys_prep" in tools:
+        cmd = tools["yosys_prep"].format(in_verilog=verilog_out, out_verilog_prep=verilog_prep, out_yosys_json=yosys_json, top=spec["design_name"])
+        if tool_available(cmd):
+            script = script_from_cmd(cmd) if pool is not None else None
+            t0 = time.perf_counter()
+            r = pool.run(script) if script else sh(cmd)
+            (out/"logs"/"translate"/f"{spec['design_name']}_yosys.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
+            entry["steps"]["yosys_prep"] = {"ok": r["ok"], "cmd": cmd, "seconds": round(time.perf_counter() - t0, 3),
+                                            **usage(r)}
+            if script:
+                entry["steps"]["yosys_prep"]["pooled"] = True
         else:
-            entry["steps"]["yosys_prep"] = {"ok": False, "cmd": "", "skipped": True}
-            if args.run_yosys:
-                entry["notes"].append("yosys_prep not configured in tools.json")
-        entry["generated"]["verilog_prep"] = str(verilog_prep) if verilog_prep.exists() else ""
-        entry["generated"]["yosys_json"] = str(yosys_json) if yosys_json.exists() else ""
-
-        # Objective 5: common AST
-        if args.gen_ast:
-            if yosys_json.exists():
-                y_ast = yosys_json_to_ast(yosys_json, design_name=spec["design_name"])
-                out_ast = merge_ast(vhdl_ast, y_ast)
-            else:
-                out_ast = vhdl_ast
-                entry["notes"].append("AST generated from VHDL only (no yosys json).")
-            ast_path = out / "results" / "ast" / f"{spec['design_name']}.ast.json"
-            ast_path.write_text(json.dumps(out_ast.to_dict(), indent=2), encoding="utf-8")
-            entry["generated"]["common_ast"] = str(ast_path)
-
-        # SymbiYosys (optional)
-        if args.run_sby and "sby" in tools:
-            sby_file = out / "generated" / f"{spec['design_name']}.sby"
-            sby_file.write_text(f"""[options]
+            entry["steps"]["yosys_prep"] = {"ok": False, "cmd": cmd, "skipped": True}
+            entry["notes"].append("yosys not found in PATH (configure/install)")
+    else:
+        entry["steps"]["yosys_prep"] = {"ok": False, "cmd": "", "skipped": True}
+        if args.run_yosys:
+            entry["notes"].append("yosys_prep not configured in tools.json")
+    entry["generated"]["verilog_prep"] = str(verilog_prep) if verilog_prep.exists() else ""
+    entry["generated"]["yosys_json"] = str(yosys_json) if yosys_json.exists() else ""
+
+    # Structural statistics (cell histogram, register bits, depth, cost)
+    y_ast, src_v = netlist_ast(spec["design_name"], yosys_json, verilog_prep, verilog_out)
+    if src_v is not None:
+        entry["notes"].append(f"Structural AST from lightweight Verilog parser: {src_v}")
+    if y_ast is not None:
+        entry["netlist_stats"] = y_ast.stats.get("netlist", {})
+
+    # Objective 5: common AST
+    if args.gen_ast:
+        if y_ast is not None:
+            out_ast = merge_ast(vhdl_ast, y_ast)
+        else:
+            out_ast = vhdl_ast
+            entry["notes"].append("AST generated from VHDL only (no yosys json or Verilog).")
+        ast_path = out / "results" / "ast" / f"{spec['design_name']}.ast.json"
+        write_if_changed(ast_path, json.dumps(out_ast.to_dict(), indent=2))
+        entry["generated"]["common_ast"] = str(ast_path)
+
+    # Counterexample corpus: past failures replayed natively before the formal steps
+    corpus = cex_corpus.Corpus(corpus_dir(args, out), spec["design_name"])
+    regression = None
+    if getattr(args, "replay_corpus", False) and corpus.cases and (args.run_sby or args.run_esbmc):
+        regression = replay_corpus(spec, corpus, verilog_prep if verilog_prep.exists() else verilog_out,
+                                   out, tools, entry)
+
+    # SymbiYosys (optional)
+    if regression is not None and args.run_sby:
+        entry["steps"]["sby"] = {"ok": False, "cmd": "", "corpus_regression": regression["id"]}
+    elif args.run_sby and "sby" in tools and getattr(args, "compositional", False) and y_ast is not None:
+        run_sby_compositional(vf, spec, y_ast, verilog_prep if verilog_prep.exists() else verilog_out,
+                              out, tools, entry, Path(args.proof_db) if args.proof_db else out / "results" / "proofs.sqlite",
+                              incremental=getattr(args, "incremental", False), corpus=corpus)
+    elif args.run_sby and "sby" in tools:
+        sby_v, formal = verilog_prep if verilog_prep.exists() else verilog_out, ""
+        # VHDL value ranges, assumed in a copy of the top module (no wrapper on this path)
+        ranged = input_assumes(spec.get("ranges", []), spec["ports"]["inputs"])
+        if y_ast is not None:
+            ranged += internal_assumes(spec.get("ranges", []), y_ast)
+        if ranged and sby_v.exists():
+            ranged_v = out / "generated" / f"{spec['design_name']}_ranges.v"
+            write_if_changed(ranged_v, inject_assumes(sby_v.read_text(encoding="utf-8", errors="replace"),
+                                                      spec["design_name"], ranged))
+            sby_v, formal = ranged_v, "-formal "  # assume() needs the formal extensions
+            entry["range_assumes"] = ranged
+        sby_file = out / "generated" / f"{spec['design_name']}.sby"
+        write_if_changed(sby_file, f"""[options]
 mode bmc
 depth 20
 
@@ -277,80 +697,353 @@ depth 20
 smtbmc z3
 
 [script]
-read_verilog {verilog_prep if verilog_prep.exists() else verilog_out}
+read_verilog {formal}{sby_v}
 prep -top {spec['design_name']}
 
 [files]
-{verilog_prep if verilog_prep.exists() else verilog_out}
-""", encoding="utf-8")
-            cmd = tools["sby"].format(sby_file=sby_file)
-            if tool_available(cmd):
-                r = sh(cmd, cwd=sby_file.parent)
-                (out/"logs"/"sby"/f"{spec['design_name']}.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
-                entry["steps"]["sby"] = {"ok": r["ok"], "cmd": cmd, "sby": str(sby_file)}
-            else:
-                entry["steps"]["sby"] = {"ok": False, "cmd": cmd, "skipped": True}
-                entry["notes"].append("sby not found in PATH (configure/install)")
+{sby_v}
+""")
+        cmd = tools["sby"].format(sby_file=sby_file)
+        if tool_available(cmd):
+            r = sh(cmd, cwd=sby_file.parent)
+            (out/"logs"/"sby"/f"{spec['design_name']}.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
+            entry["steps"]["sby"] = {"ok": r["ok"], "cmd": cmd, "sby": str(sby_file), "seconds": r["seconds"],
+                                     **usage(r)}
+            if not r["ok"]:
+                trace = record_counterexample(spec, sby_file, r["stdout"], [sby_v, verilog_prep, verilog_out], y_ast, out,
+                                             entry)
+                if trace is not None:
+                    harvest_counterexample(cex_corpus.from_trace(trace, [p["name"] for p in spec["ports"]["inputs"]]),
+                                           corpus, vf, entry)
         else:
-            entry["steps"]["sby"] = {"ok": False, "cmd": "", "skipped": True}
-            if args.run_sby:
-                entry["notes"].append("sby not configured in tools.json")
-
-        # V2C + ESBMC (optional) – generates harness template even if tools missing
-        if args.run_esbmc:
-            harness_out = out / "generated" / "harness" / f"{spec['design_name']}_harness.c"
-            generate_harness_c(spec, harness_out)
-            entry["generated"]["harness_c"] = str(harness_out)
-
-            c_model = out / "generated" / "c" / f"{spec['design_name']}.c"
-            if "v2c" in tools:
-                cmd = tools["v2c"].format(in_verilog=(verilog_prep if verilog_prep.exists() else verilog_out), out_c=c_model)
-                if tool_available(cmd):
-                    r = sh(cmd)
-                    (out/"logs"/"translate"/f"{spec['design_name']}_v2c.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
-                    entry["steps"]["v2c"] = {"ok": r["ok"], "cmd": cmd}
-                else:
-                    entry["steps"]["v2c"] = {"ok": False, "cmd": cmd, "skipped": True}
-                    entry["notes"].append("v2c not found in PATH (configure/install)")
+            entry["steps"]["sby"] = {"ok": False, "cmd": cmd, "skipped": True}
+            entry["notes"].append("sby not found in PATH (configure/install)")
+    else:
+        entry["steps"]["sby"] = {"ok": False, "cmd": "", "skipped": True}
+        if args.run_sby:
+            entry["notes"].append("sby not configured in tools.json")
+
+    # V2C + ESBMC (optional) – generates harness template even if tools missing
+    if args.run_esbmc:
+        harness_out = out / "generated" / "harness" / f"{spec['design_name']}_harness.c"
+        generate_harness_c(spec, harness_out, y_ast)
+        entry["generated"]["harness_c"] = str(harness_out)
+
+        c_model = out / "generated" / "c" / f"{spec['design_name']}.c"
+        if "v2c" not in entry["steps"]:  # not already run for the corpus replay
+            run_v2c(spec, verilog_prep if verilog_prep.exists() else verilog_out, c_model, out, tools, entry)
+
+        if regression is not None:
+            entry["steps"]["esbmc"] = {"ok": False, "cmd": "", "corpus_regression": regression["id"]}
+            return entry
+
+        if getattr(args, "native_sim", 0) and c_model.exists():
+            cc = tools.get("cc", native_sim.DEFAULT_CC)
+            if tool_available(cc):
+                r = native_sim.simulate(c_model, spec, out / "generated" / "native" / spec["design_name"],
+                                        args.native_sim, cc)
+                entry["native_sim"] = {k: v for k, v in r.items() if k != "library"}
+                if r.get("violations"):
+                    entry["notes"].append(f"native_sim: {r['violations']} assert violations "
+                                          f"(first at vector {r['first_violation']['cycle']})")
             else:
-                entry["steps"]["v2c"] = {"ok": False, "cmd": "", "skipped": True}
-                entry["notes"].append("v2c not configured in tools.json")
-
-            if "esbmc" in tools:
-                cmd = tools["esbmc"].format(in_c=harness_out)
-                if tool_available(cmd):
-                    r = sh(cmd)
-                    (out/"logs"/"esbmc"/f"{spec['design_name']}.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
-                    entry["steps"]["esbmc"] = {"ok": r["ok"], "cmd": cmd}
-                else:
-                    entry["steps"]["esbmc"] = {"ok": False, "cmd": cmd, "skipped": True}
-                    entry["notes"].append("esbmc not found in PATH (configure/install)")
+                entry["notes"].append("native_sim: C compiler not found (configure \"cc\" in tools.json)")
+
+        if "esbmc" in tools:
+            cmd = tools["esbmc"].format(in_c=harness_out)
+            if tool_available(cmd):
+                r = sh(cmd)
+                (out/"logs"/"esbmc"/f"{spec['design_name']}.log").write_text(r["stdout"]+"\n"+r["stderr"], encoding="utf-8")
+                entry["steps"]["esbmc"] = {"ok": r["ok"], "cmd": cmd, "seconds": r["seconds"], **usage(r)}
+                if not r["ok"]:
+                    harvest_counterexample(cex_corpus.from_esbmc(r["stdout"], [p for p in spec["ports"]["inputs"]
+                                                                          if p["name"] != native_sim.clock_port(spec)]),
+                                           corpus, vf, entry)
             else:
-                entry["steps"]["esbmc"] = {"ok": False, "cmd": "", "skipped": True}
-                entry["notes"].append("esbmc not configured in tools.json")
+                entry["steps"]["esbmc"] = {"ok": False, "cmd": cmd, "skipped": True}
+                entry["notes"].append("esbmc not found in PATH (configure/install)")
         else:
-            entry["steps"]["v2c"] = {"ok": False, "cmd": "", "skipped": True}
             entry["steps"]["esbmc"] = {"ok": False, "cmd": "", "skipped": True}
+            entry["notes"].append("esbmc not configured in tools.json")
+    else:
+        entry["steps"].setdefault("v2c", {"ok": False, "cmd": "", "skipped": True})
+        entry["steps"]["esbmc"] = {"ok": False, "cmd": "", "skipped": True}
+
+    return entry
+
+def failed_entry(payload: Dict[str, Any], error: str) -> Dict[str, Any]:
+    return {
+        "design": Path(payload["vhdl"]).stem,
+        "vhdl": payload["vhdl"],
+        "spec": "",
+        "steps": {s: {"ok": False, "cmd": ""} for s in STEPS},
+        "notes": [f"worker failed: {error}"],
+        "generated": {},
+    }
+
+def run_worker(args):
+    """Pull design jobs from the queue until it stays empty for --idle-timeout seconds."""
+    q = SqliteQueue(Path(args.queue))
+    host = socket.gethostname()
+    worker = args.worker_id or f"{host}-{os.getpid()}"
+    idle_since = time.time()
+    home = os.getcwd()
+    pool = YosysPool(args.yosys_pool) if args.yosys_pool > 0 else None
+    budget = admission.host_budget(args.mem_budget, args.core_budget)
+    pick = None if args.no_admission else \
+        (lambda queued, running: admission.pick(queued, running, budget, admission.available_mb()))
+    free = None if args.no_admission else \
+        (lambda running: admission.free(running, budget, admission.available_mb()))
+    backoff = 0.0
+    while True:
+        job = q.lease(worker, args.lease_ttl, host, pick, free)
+        if job is None:
+            if q.counts().get("queued"):
+                idle_since = time.time()  # waiting for admission, not idle
+            elif args.idle_timeout is not None and time.time() - idle_since > args.idle_timeout:
+                break
+            time.sleep(args.poll)
+            continue
+        job_id, payload = job
+        print(f"[{worker}] job {job_id}: {payload['vhdl']}")
+        with Heartbeat(q, job_id, worker, args.lease_ttl) as hb:
+            try:
+                os.chdir(payload.get("cwd") or home)
+                out = Path(payload["out"])
+                ensure_dirs(out)
+                entry = run_design(Path(payload["vhdl"]), out, payload["tools"],
+                                   argparse.Namespace(**payload["steps"]), pool)
+            except Exception:
+                entry = None
+                err = traceback.format_exc()
+            finally:
+                os.chdir(home)
+        if hb.lost:
+            print(f"[{worker}] lease on job {job_id} lost; result dropped")
+        elif entry is not None and (entry.get("resources") or {}).get("oom"):
+            demand = admission.oom_demand(payload.get("demand") or {}, entry["resources"]["peak_mb"], budget)
+            if q.requeue(job_id, worker, demand, "out of memory", args.max_attempts):
+                print(f"[{worker}] job {job_id} ran out of memory; requeued with {demand['mem_mb']} MB")
+            else:
+                q.complete(job_id, worker, entry)
+            backoff = min(admission.OOM_BACKOFF_MAX, 2 * backoff or admission.OOM_BACKOFF)
+            time.sleep(backoff)
+        elif entry is not None:
+            q.complete(job_id, worker, entry)
+            backoff = 0.0
+        else:
+            q.fail(job_id, worker, err)
+        idle_since = time.time()
+    if pool is not None:
+        pool.close()
+    q.close()
+
+def vhdl_size(vf: Path) -> int:
+    try:
+        return vf.stat().st_size
+    except OSError:
+        return 0
+
+def estimated_cost(vf: Path, prior: Dict[str, Dict[str, Any]]) -> int:
+    """Solver cost from the previous run's netlist stats, else the VHDL size as a proxy."""
+    cost = (prior.get(str(vf)) or {}).get("stats", {}).get("est_solver_cost")
+    return cost if cost is not None else vhdl_size(vf)
+
+def prior_usage(out: Path, store: Optional[ResultsStore]) -> Dict[str, Dict[str, Any]]:
+    """{vhdl: {"stats": netlist stats, "measured": {"peak_mb", "cores", "oom"}}} from past runs.
+
+    Netlist stats come from the previous summary.jsonl (read before the sink
+    truncates it); measured peaks are the largest of that run and of the
+    results store history.
+    """
+    prior: Dict[str, Dict[str, Any]] = {}
+    for rec in iter_jsonl(out / "results" / "summary.jsonl"):
+        res = rec.get("resources") or {}
+        measured = {}
+        if res.get("peak_mb"):
+            measured = {"peak_mb": res["peak_mb"], "cores": res["cpu_seconds"] / max(rec.get("seconds") or 0, 1e-3)}
+            if res.get("oom"):
+                measured["oom"] = True
+        prior[rec.get("vhdl", "")] = {"stats": rec.get("netlist_stats") or {}, "measured": measured}
+    if store is not None:
+        for vhdl, m in store.usage().items():
+            p = prior.setdefault(vhdl, {"stats": {}, "measured": {}})["measured"]
+            for k, v in m.items():
+                p[k] = max(p.get(k) or 0, v)
+    return prior
+
+def run_coordinator(args, vhdl_files, out: Path, tools: Dict[str, str], sink: SummarySink,
+                    prior: Dict[str, Dict[str, Any]]):
+    """Enqueue one job per design (with its resource demand), requeue expired leases and collect the entries."""
+    q = SqliteQueue(Path(args.queue))
+    c = q.counts()
+    if c.get("queued") or c.get("leased"):
+        q.close()
+        raise SystemExit(f"Queue {args.queue} still has {c.get('queued', 0)} queued and {c.get('leased', 0)} "
+                         "leased job(s) of another run; wait for it or use another --queue")
+    q.reset()
+    steps = {k: getattr(args, k) for k in STEP_FLAGS}  # bools, and the --native-sim vector count
+    steps["verilog_dir"] = list(args.verilog_dir)
+    steps["proof_db"] = str(Path(args.proof_db).resolve()) if args.proof_db else None
+    steps["corpus"] = str(Path(args.corpus).resolve()) if args.corpus else None
+    todo = [vf for vf in vhdl_files if not sink.is_done(vf)]
+    # largest estimated jobs first so the tail of the run is short ones
+    order = sorted(range(len(todo)), key=lambda i: -estimated_cost(todo[i], prior))
+    q.enqueue({"seq": i, "vhdl": str(todo[i]), "out": str(out), "cwd": os.getcwd(),
+               "tools": tools, "steps": steps,
+               "demand": admission.estimate(steps, tools, (prior.get(str(todo[i])) or {}).get("stats"),
+                                            (prior.get(str(todo[i])) or {}).get("measured"), vhdl_size(todo[i]))}
+              for i in order)
+
+    budget_args = ["--max-attempts", str(args.max_attempts)]
+    if args.mem_budget is not None:
+        budget_args += ["--mem-budget", str(args.mem_budget)]
+    if args.core_budget is not None:
+        budget_args += ["--core-budget", str(args.core_budget)]
+    if args.no_admission:
+        budget_args.append("--no-admission")
+    procs = [subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "--worker",
+                               "--queue", str(Path(args.queue).resolve()),
+                               "--worker-id", f"local-{i}", "--lease-ttl", str(args.lease_ttl),
+                               "--yosys-pool", str(args.yosys_pool)] + budget_args,
+                              cwd=os.getcwd())
+             for i in range(args.local_workers)]
+    seen = 0  # completion number of the last job collected
+
+    def collect():
+        # entries reach the sink as jobs finish, so an interrupted run keeps them for --resume
+        nonlocal seen
+        for seq, payload, state, result, error in q.finished(seen):
+            seen = max(seen, seq)
+            sink.append(result if state == "done" else failed_entry(payload, (error or state).strip().splitlines()[-1]))
+
+    drained = False
+    try:
+        while True:
+            n = q.requeue_expired(args.max_attempts)
+            if n:
+                print(f"Requeued {n} job(s) with expired lease")
+            c = q.counts()
+            collect()
+            if not c.get("queued") and not c.get("leased"):
+                drained = True
+                break
+            time.sleep(args.poll)
+    finally:
+        # local workers poll forever; stop them once the queue is drained
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+        if not drained:
+            q.reset()  # interrupted: drop this run's unfinished jobs so the queue can be reused
+        q.close()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--in", dest="inp", default=None, help="Input folder (VHDL files)")
+    ap.add_argument("--out", dest="out", default=None, help="Output root (task04 folder)")
+    ap.add_argument("--tools", dest="tools", default=None, help="tools.json path (optional)")
+    ap.add_argument("--run-yosys", action="store_true")
+    ap.add_argument("--run-sby", action="store_true")
+    ap.add_argument("--run-esbmc", action="store_true")
+    ap.add_argument("--gen-ast", action="store_true")
+    ap.add_argument("--resume", action="store_true", help="Skip designs already in results/summary.jsonl")
+    ap.add_argument("--changed-only", action="store_true", help="Only re-run VHDL files changed since the last snapshot")
+    ap.add_argument("--ignore", action="append", default=[], help="Extra fnmatch pattern to skip during discovery")
+    ap.add_argument("--verilog-dir", action="append", default=[],
+                    help="Extra folder with pre-generated Verilog (e.g. ../Novo_repo/verilog_out_ass)")
+    ap.add_argument("--queue", default=None, help="SQLite queue file for coordinator/worker mode")
+    ap.add_argument("--coordinator", action="store_true", help="Enqueue designs and collect results from workers")
+    ap.add_argument("--worker", action="store_true", help="Run design jobs from --queue")
+    ap.add_argument("--worker-id", default=None)
+    ap.add_argument("--local-workers", type=int, default=0, help="Coordinator: spawn N workers on this host")
+    ap.add_argument("--lease-ttl", type=float, default=60.0, help="Seconds before a silent worker's job is requeued")
+    ap.add_argument("--max-attempts", type=int, default=3)
+    ap.add_argument("--idle-timeout", type=float, default=None, help="Worker: exit after N idle seconds")
+    ap.add_argument("--poll", type=float, default=0.5)
+    ap.add_argument("--mem-budget", type=float, default=None, metavar="GB",
+                    help="Worker: memory its host may give to admitted jobs (default: 90%% of RAM)")
+    ap.add_argument("--core-budget", type=int, default=None, help="Worker: cores of its host for jobs (default: all)")
+    ap.add_argument("--no-admission", action="store_true", help="Worker: lease jobs in order, ignoring their demand")
+    ap.add_argument("--compositional", action="store_true", help="Reuse proofs and black-box proven submodules in sby")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Re-run only properties whose cone of influence changed (implies --compositional)")
+    ap.add_argument("--native-sim", type=int, default=0, metavar="N",
+                    help="Run N random vectors on the natively compiled v2c model (0 = off)")
+    ap.add_argument("--replay-corpus", action="store_true",
+                    help="Replay past counterexamples natively before the formal steps")
+    ap.add_argument("--corpus", default=None, help="Counterexample corpus folder (default: <out>/results/corpus)")
+    ap.add_argument("--proof-db", default=None, help="Proof database (default: <out>/results/proofs.sqlite)")
+    ap.add_argument("--yosys-pool", type=int, default=0, help="Number of persistent yosys processes (0 = off)")
+    ap.add_argument("--results-db", default=None, help="Run history store (default: <out>/results/results.sqlite)")
+    ap.add_argument("--no-store", action="store_true", help="Only write summary.json/csv, no run history")
+    ap.add_argument("--daemon", default=None, metavar="SOCKET",
+                    help="Run on a resident pipeline_daemon.py (falls back to a local run)")
+    args = ap.parse_args()
+    if args.incremental:
+        args.compositional = True
+
+    if (args.coordinator or args.worker) and not args.queue:
+        ap.error("--coordinator/--worker require --queue")
+    if args.worker:
+        run_worker(args)
+        return
+    if not args.inp or not args.out:
+        ap.error("--in and --out are required")
+
+    inp = Path(args.inp)
+    out = Path(args.out)
+    ensure_dirs(out)
+
+    tools_path = Path(args.tools) if args.tools else (out / "tools.json")
+    tools = load_tools(tools_path)
+
+    found = walk([inp], (".vhd", ".vhdl"), ignore=tuple(DEFAULT_IGNORE) + tuple(args.ignore))
+    if not found:
+        raise SystemExit(f"No VHDL found under: {inp}")
+    vhdl_files = [Path(fi.path) for fi in found]
+
+    store = None
+    if not args.no_store:
+        store = ResultsStore(Path(args.results_db) if args.results_db else out / "results" / "results.sqlite")
+    # costs and peaks of past runs, read before the sink truncates the JSONL
+    prior = prior_usage(out, store) if args.coordinator else {}
+    if store is not None:
+        store.begin_run(sys.argv[1:])
+
+    snapshot_path = out / "results" / "vhdl_snapshot.json"
+    if args.changed_only:
+        changes = diff_snapshot(load_snapshot(snapshot_path), found)
+        print(f"Discovery: {len(changes.added)} added, {len(changes.modified)} modified, "
+              f"{len(changes.removed)} removed, {len(changes.unchanged)} unchanged")
+        sink = SummarySink(out / "results", resume=True, invalidate=changes.changed, drop=changes.removed,
+                           store=store)
+    else:
+        sink = SummarySink(out / "results", resume=args.resume, store=store)
+    if args.resume and sink.done:
+        print(f"Resuming: {len(sink.done)} design(s) already finished")
+    pool = acquire_pool(args)
+    try:
+        if args.coordinator:
+            run_coordinator(args, vhdl_files, out, tools, sink, prior)
+        else:
+            for vf in vhdl_files:
+                if sink.is_done(vf):
+                    continue
+                sink.append(run_design(vf, out, tools, args, pool))
+    finally:
+        sink.close()
+        release_pool(pool)
+    try:
+        sink.finalize()
+    finally:
+        if store is not None:
+            store.close()
+    save_snapshot(snapshot_path, found)
 
-        summary.append(entry)
-
-    (out/"results"/"summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
-
-    csv_path = out/"results"/"summary.csv"
-    with csv_path.open("w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["design", "vhd2vl", "yosys_prep", "sby", "v2c", "esbmc", "notes"])
-        steps = ["vhd2vl", "yosys_prep", "sby", "v2c", "esbmc"]
-        for e in summary:
-            def status(step):
-                st = e["steps"].get(step, {})
-                if st.get("skipped"):
-                    return "SKIP"
-                return "OK" if st.get("ok") else "FAIL"
-            w.writerow([e["design"]] + [status(s) for s in steps] + [" | ".join(e.get("notes", []))])
-
-    print(f"Wrote: {out/'results'/'summary.json'}")
-    print(f"Wrote: {csv_path}")
+    print(f"Wrote: {sink.json_path}")
+    print(f"Wrote: {sink.csv_path}")
 
 if __name__ == "__main__":
     main()
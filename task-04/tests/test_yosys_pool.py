@@ -0,0 +1,90 @@
+"""YosysSession/YosysPool against a stub `yosys -Q` (no real yosys needed)."""
+
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from yosys_pool import YosysPool, YosysSession
+
+# Reads commands from stdin like `yosys -Q` with a non-tty stdin: every
+# command's output follows a "yosys> " prompt printed without a newline.
+STUB = textwrap.dedent("""\
+    import sys, time
+    for line in sys.stdin:
+        cmd = line.strip()
+        sys.stdout.write("yosys> ")
+        if cmd == "exit":
+            break
+        if cmd.startswith("log "):
+            print(cmd[4:])
+        elif cmd == "fail":
+            print("ERROR: stub failure")
+        elif cmd == "crash":
+            sys.exit(3)
+        elif cmd == "hang":
+            time.sleep(60)
+        elif cmd and cmd != "design -reset":
+            print("ran " + cmd)
+        sys.stdout.flush()
+    """)
+
+class YosysPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bin = Path(self.tmp.name) / "yosys"
+        self.bin.write_text(f"#!{sys.executable}\n" + STUB, encoding="utf-8")
+        os.chmod(self.bin, 0o755)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_marker_after_prompt(self):
+        s = YosysSession(str(self.bin))
+        try:
+            r = s.run("read_verilog a.v\nprep -top a")
+            self.assertTrue(r["ok"])
+            self.assertIn("ran read_verilog a.v", r["stdout"])
+            self.assertIn("ran prep -top a", r["stdout"])
+            self.assertNotIn("__YOSYS_POOL_DONE_", r["stdout"])
+            # the session is reused and the next job gets only its own output
+            r = s.run("write_json a.json")
+            self.assertTrue(r["ok"])
+            self.assertNotIn("prep", r["stdout"])
+        finally:
+            s.close()
+
+    def test_error_and_crash(self):
+        s = YosysSession(str(self.bin))
+        try:
+            self.assertFalse(s.run("fail")["ok"])
+            r = s.run("crash")
+            self.assertFalse(r["ok"])
+            self.assertEqual(r["returncode"], 3)
+            self.assertTrue(s.run("prep")["ok"])  # restarted
+        finally:
+            s.close()
+
+    def test_read_timeout_restarts(self):
+        s = YosysSession(str(self.bin), read_timeout=0.5)
+        try:
+            r = s.run("hang")
+            self.assertFalse(r["ok"])
+            self.assertTrue(r.get("timeout"))
+            self.assertTrue(s.run("prep")["ok"])
+        finally:
+            s.close()
+
+    def test_pool_batch(self):
+        with YosysPool(2, yosys_bin=str(self.bin)) as pool:
+            res = pool.run_batch({k: f"prep -top {k}" for k in "abcd"})
+        self.assertEqual(sorted(res), list("abcd"))
+        for k, r in res.items():
+            self.assertTrue(r["ok"])
+            self.assertIn(f"ran prep -top {k}", r["stdout"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,21 +6,35 @@ Usage:
   python3 task04/unify_ast.py --vhdl path/to/design.vhd --out out.ast.json
   python3 task04/unify_ast.py --yosys-json path/to/design.json --out out.ast.json
   python3 task04/unify_ast.py --vhdl design.vhd --yosys-json design.json --out out.ast.json
+  python3 task04/unify_ast.py --vhdl design.vhd --verilog elaborado.v --out out.ast.json
 
 Merging rules:
-- structural view (cells/wires/port widths) prefers Yosys JSON when available
+- structural view (cells/wires/port widths) prefers Yosys JSON when available,
+  else a Verilog netlist read by the lightweight parser (--verilog)
 - property tags (assume/assert) come from VHDL
+- VHDL value ranges (integer range / enum) are bound to the structural view:
+  internal signals are kept only when a wire of the same name survived
 - notes/stats are merged
+- a hierarchical structural view (module library + hierarchy) is kept as-is
 """
 
 from __future__ import annotations
 import argparse
 import json
+import sys
 from pathlib import Path
 
+if __name__ == "__main__":
+    # thin client of a resident pipeline_daemon.py (repo root), when one is configured
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from pipeline_daemon import maybe_forward
+    maybe_forward("unify_ast")
+
 from ast_frontend.vhdl_light_parser import parse_vhdl_to_ast
 from ast_frontend.yosys_json_adapter import yosys_json_to_ast
+from ast_frontend.verilog_light_parser import verilog_to_ast
 from ast_frontend.common_ast import new_module_ast
+from ast_frontend.value_ranges import map_to_netlist
 
 def merge_ast(vhdl_ast, yosys_ast):
     out = new_module_ast(yosys_ast.design_name or vhdl_ast.design_name)
@@ -41,8 +55,15 @@ def merge_ast(vhdl_ast, yosys_ast):
     out.wires = yosys_ast.wires or []
     out.cells = yosys_ast.cells or []
 
+    # Hierarchy (schema v2): module library + instance counts, from yosys
+    if yosys_ast.library:
+        out.schema = yosys_ast.schema
+        out.library = yosys_ast.library
+        out.hierarchy = yosys_ast.hierarchy
+
     # Properties: from vhdl
     out.properties = vhdl_ast.properties or []
+    out.ranges = map_to_netlist(vhdl_ast.ranges or [], yosys_ast)
 
     # Stats/notes
     out.stats = {}
@@ -55,6 +76,7 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--vhdl", type=str, default=None)
     ap.add_argument("--yosys-json", type=str, default=None)
+    ap.add_argument("--verilog", type=str, default=None)
     ap.add_argument("--out", type=str, required=True)
     ap.add_argument("--design-name", type=str, default=None)
     args = ap.parse_args()
@@ -66,6 +88,8 @@ def main():
         vhdl_ast = parse_vhdl_to_ast(Path(args.vhdl))
     if args.yosys_json:
         yosys_ast = yosys_json_to_ast(Path(args.yosys_json), design_name=args.design_name)
+    elif args.verilog:
+        yosys_ast = verilog_to_ast(Path(args.verilog), design_name=args.design_name)
 
     if vhdl_ast and yosys_ast:
         out_ast = merge_ast(vhdl_ast, yosys_ast)
@@ -74,7 +98,7 @@ def main():
     elif yosys_ast:
         out_ast = yosys_ast
     else:
-        raise SystemExit("Provide --vhdl and/or --yosys-json")
+        raise SystemExit("Provide --vhdl and/or --yosys-json/--verilog")
 
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
     Path(args.out).write_text(json.dumps(out_ast.to_dict(), indent=2), encoding="utf-8")
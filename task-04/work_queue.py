@@ -0,0 +1,241 @@
+"""
+Work queue for distributed TASK 04 runs (coordinator/worker mode).
+
+The coordinator enqueues one job per design (VHDL path + tools config + step
+selection); workers lease jobs, run the normal step chain and push the summary
+entry back. A leased job carries a deadline that the worker keeps extending
+with heartbeats; if a worker dies the lease expires and the coordinator puts
+the job back in the queue.
+
+Backends only need the small interface used by run_task04.py:
+    enqueue(payloads), lease(worker, ttl), heartbeat(job_id, worker, ttl),
+    complete(job_id, worker, result), fail(job_id, worker, error),
+    requeue_expired(max_attempts), counts(), finished(after), results()
+
+Jobs may carry a resource demand ({"mem_mb", "cores"} in the payload, see
+admission.py). lease() with a `pick` callback only hands out the job that
+callback chooses given the jobs already leased on the worker's host (a
+`free` callback narrows the candidates in SQL first), and requeue() puts a
+job that ran out of memory back with a larger demand.
+
+SqliteQueue keeps everything in one SQLite file, which is enough for several
+workers on one host or on nodes sharing a filesystem. Artifacts are written by
+the workers under the job's output root, so that root must be shared too.
+"""
+
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    payload     TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'queued',   -- queued | leased | done | failed
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT,
+    mem_mb      INTEGER NOT NULL DEFAULT 0,
+    cores       INTEGER NOT NULL DEFAULT 1,
+    host        TEXT,
+    held_since  REAL,                             -- first passed over for a smaller job
+    done_seq    INTEGER                           -- order in which jobs reached done/failed
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, id);
+CREATE INDEX IF NOT EXISTS jobs_host ON jobs(host, state);
+CREATE INDEX IF NOT EXISTS jobs_size ON jobs(state, mem_mb DESC, id);
+CREATE INDEX IF NOT EXISTS jobs_done ON jobs(done_seq);
+"""
+
+# next completion number; jobs finish out of id order, so finished() pages on this
+NEXT_SEQ = "(SELECT COALESCE(MAX(done_seq), 0) + 1 FROM jobs)"
+
+PICK_LIMIT = 64  # fitting jobs offered to pick() per lease, besides the head
+
+class SqliteQueue:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit mode; write transactions are opened explicitly
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                                  check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        cols = {r[1] for r in self.db.execute("PRAGMA table_info(jobs)")}
+        if cols and "done_seq" not in cols:
+            self.db.execute("DROP TABLE jobs")  # queue file from an older version; jobs are per run
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self.db.execute(sql, params)
+
+    def _demands(self, where: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        rows = self.db.execute(f"SELECT id, mem_mb, cores, held_since FROM jobs WHERE {where}", params)
+        return [{"id": i, "mem_mb": m, "cores": c, "held_since": h} for i, m, c, h in rows]
+
+    def reset(self):
+        self._write("DELETE FROM jobs")
+
+    def enqueue(self, payloads: Iterable[Dict[str, Any]]):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany("INSERT INTO jobs(payload, mem_mb, cores) VALUES (?, ?, ?)",
+                                [(json.dumps(p), (p.get("demand") or {}).get("mem_mb", 0),
+                                  (p.get("demand") or {}).get("cores", 1)) for p in payloads])
+            self.db.execute("COMMIT")
+
+    def lease(self, worker: str, ttl: float, host: Optional[str] = None,
+              pick: Optional[Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], Optional[int]]] = None,
+              free: Optional[Callable[[List[Dict[str, Any]]], Dict[str, int]]] = None
+              ) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Atomically take a queued job; None if the queue is empty (or `pick` admits none).
+
+        Without `pick` this is the oldest queued job. With it, pick(queued, running)
+        gets the queued jobs (largest memory demand first, then oldest) and those
+        leased on `host` as {"id", "mem_mb", "cores", "held_since"} dicts and
+        returns the id to take, or None to wait. free(running) returns the
+        {"mem_mb", "cores"} still free on the host; when given, `queued` is only
+        the head job plus the first PICK_LIMIT jobs that fit.
+        """
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                if pick is None:
+                    row = self.db.execute(
+                        "SELECT id FROM jobs WHERE state='queued' ORDER BY id LIMIT 1").fetchone()
+                    job_id = row[0] if row else None
+                else:
+                    running = self._demands("state='leased' AND host=?", (host,))
+                    if free is None:
+                        queued = self._demands("state='queued' ORDER BY mem_mb DESC, id")
+                    else:
+                        f = free(running)
+                        queued = self._demands("state='queued' ORDER BY mem_mb DESC, id LIMIT 1")
+                        queued += [j for j in self._demands(
+                            "state='queued' AND mem_mb <= ? AND cores <= ? ORDER BY mem_mb DESC, id LIMIT ?",
+                            (f["mem_mb"], f["cores"], PICK_LIMIT)) if not queued or j["id"] != queued[0]["id"]]
+                    job_id = pick(queued, running)
+                    if queued and job_id != queued[0]["id"] and queued[0]["held_since"] is None:
+                        self.db.execute("UPDATE jobs SET held_since=? WHERE id=?", (time.time(), queued[0]["id"]))
+                if job_id is None:
+                    self.db.execute("COMMIT")
+                    return None
+                self.db.execute(
+                    "UPDATE jobs SET state='leased', worker=?, host=?, lease_until=?, attempts=attempts+1 WHERE id=?",
+                    (worker, host, time.time() + ttl, job_id))
+                payload = self.db.execute("SELECT payload FROM jobs WHERE id=?", (job_id,)).fetchone()[0]
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return job_id, json.loads(payload)
+
+    def heartbeat(self, job_id: int, worker: str, ttl: float) -> bool:
+        """Extend the lease; False means the job was taken away from this worker."""
+        cur = self._write(
+            "UPDATE jobs SET lease_until=? WHERE id=? AND worker=? AND state='leased'",
+            (time.time() + ttl, job_id, worker))
+        return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: Dict[str, Any]) -> bool:
+        cur = self._write(
+            f"UPDATE jobs SET state='done', result=?, lease_until=NULL, done_seq={NEXT_SEQ} "
+            "WHERE id=? AND worker=? AND state='leased'",
+            (json.dumps(result), job_id, worker))
+        return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str) -> bool:
+        cur = self._write(
+            f"UPDATE jobs SET state='failed', error=?, lease_until=NULL, done_seq={NEXT_SEQ} "
+            "WHERE id=? AND worker=? AND state='leased'",
+            (error, job_id, worker))
+        return cur.rowcount == 1
+
+    def requeue(self, job_id: int, worker: str, demand: Dict[str, int], error: str,
+                max_attempts: int = 3) -> bool:
+        """Put a leased job back with a new demand (e.g. after an OOM kill).
+
+        False (job untouched) once it was leased max_attempts times or when the
+        lease was lost; the worker then completes it with the result it has.
+        """
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute("SELECT attempts, payload FROM jobs WHERE id=? AND worker=? AND state='leased'",
+                                  (job_id, worker)).fetchone()
+            if row is None or row[0] >= max_attempts:
+                self.db.execute("COMMIT")
+                return False
+            payload = dict(json.loads(row[1]), demand=demand)
+            self.db.execute(
+                "UPDATE jobs SET state='queued', worker=NULL, host=NULL, lease_until=NULL, held_since=NULL, "
+                "payload=?, mem_mb=?, cores=?, error=? WHERE id=?",
+                (json.dumps(payload), demand["mem_mb"], demand["cores"], error, job_id))
+            self.db.execute("COMMIT")
+        return True
+
+    def requeue_expired(self, max_attempts: int = 3) -> int:
+        """Put jobs whose lease expired back in the queue (or fail them after max_attempts)."""
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                f"UPDATE jobs SET state='failed', error='lease expired too many times', done_seq={NEXT_SEQ} "
+                "WHERE state='leased' AND lease_until < ? AND attempts >= ?", (now, max_attempts))
+            cur = self.db.execute(
+                "UPDATE jobs SET state='queued', worker=NULL, host=NULL, lease_until=NULL "
+                "WHERE state='leased' AND lease_until < ?", (now,))
+            self.db.execute("COMMIT")
+        return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {state: n for state, n in rows}
+
+    def finished(self, after: int = 0) -> List[Tuple[int, Dict[str, Any], str, Optional[Dict[str, Any]],
+                                                     Optional[str]]]:
+        """(seq, payload, state, result, error) of the jobs that finished after completion number `after`.
+
+        Pass the largest seq seen back in as `after` to get only the new ones.
+        """
+        rows = self.db.execute(
+            "SELECT done_seq, payload, state, result, error FROM jobs "
+            "WHERE state IN ('done', 'failed') AND done_seq > ? ORDER BY done_seq", (after,)).fetchall()
+        return [(n, json.loads(p), st, json.loads(r) if r else None, e) for n, p, st, r, e in rows]
+
+    def results(self) -> List[Tuple[Dict[str, Any], str, Optional[Dict[str, Any]], Optional[str]]]:
+        """(payload, state, result, error) for every job, in enqueue order."""
+        rows = self.db.execute("SELECT payload, state, result, error FROM jobs ORDER BY id").fetchall()
+        return [(json.loads(p), st, json.loads(r) if r else None, e) for p, st, r, e in rows]
+
+    def close(self):
+        self.db.close()
+
+class Heartbeat:
+    """Background thread that keeps a job lease alive while the worker runs it."""
+
+    def __init__(self, queue: SqliteQueue, job_id: int, worker: str, ttl: float):
+        self.queue, self.job_id, self.worker, self.ttl = queue, job_id, worker, ttl
+        self.lost = False
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.ttl / 3):
+            if not self.queue.heartbeat(self.job_id, self.worker, self.ttl):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._t.join()
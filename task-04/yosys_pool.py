@@ -0,0 +1,163 @@
+"""
+Pool of long-lived Yosys processes driven over their interactive shell.
+
+Launching `yosys -p "..."` once per design pays process startup (and plugin /
+techlib loading) every time. A YosysSession keeps one `yosys -Q` process
+reading commands from stdin; each job is
+
+    design -reset
+    <the same commands the one-shot `-p` script would run>
+    log <sentinel>
+
+and the output up to the sentinel line is the job's log. The sentinel is
+matched at the end of a line (yosys may print its prompt in front of it) but
+never as the echo of the `log` command itself. The commands are the same as in
+the one-shot run, so write_verilog / write_json produce the same files. A job
+that prints "ERROR:" is reported as failed; if the process dies, or prints
+nothing for read_timeout seconds, it is killed and restarted for the next job.
+
+Usage:
+    pool = YosysPool(size=4, preload=["plugin -i ghdl"])
+    r = pool.run("read_verilog a.v; prep -top a; write_json a.json")
+    results = pool.run_batch({"a": script_a, "b": script_b})
+    pool.close()
+"""
+
+from __future__ import annotations
+import itertools
+import queue
+import re
+import shlex
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+READ_TIMEOUT = 600.0  # seconds without a line of output before a session is killed
+
+def script_from_cmd(cmd: str) -> Optional[str]:
+    """Extract the -p script from a `yosys -p "<script>"` command, else None."""
+    try:
+        parts = shlex.split(cmd)
+    except ValueError:
+        return None
+    if not parts or not parts[0].endswith("yosys") or "-p" not in parts:
+        return None
+    i = parts.index("-p")
+    if i + 1 >= len(parts) or len(parts) != i + 2:
+        # extra args (input files, -s, -l, ...) keep the one-shot behaviour
+        return None
+    return parts[i + 1]
+
+class YosysSession:
+    _ids = itertools.count()
+
+    def __init__(self, yosys_bin: str = "yosys", preload: Optional[List[str]] = None,
+                 read_timeout: Optional[float] = READ_TIMEOUT):
+        self.yosys_bin = yosys_bin
+        self.preload = list(preload or [])
+        self.read_timeout = read_timeout
+        self.proc: Optional[subprocess.Popen] = None
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.jobs = 0
+
+    def _start(self):
+        self.proc = subprocess.Popen([self.yosys_bin, "-Q"], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     text=True, bufsize=1)
+        # a reader thread per process, so reads can time out
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, args=(self.proc.stdout, self.lines), daemon=True).start()
+        for cmd in self.preload:
+            r = self._exec(cmd)
+            if not r["ok"]:
+                raise RuntimeError(f"yosys preload failed: {cmd}\n{r['stdout']}")
+
+    @staticmethod
+    def _read(stream, lines: "queue.Queue[Optional[str]]"):
+        for line in stream:
+            lines.put(line)
+        lines.put(None)  # EOF
+
+    def _exec(self, script: str) -> Dict[str, object]:
+        marker = f"__YOSYS_POOL_DONE_{next(self._ids)}__"
+        done = re.compile(r'(?<!log )' + marker + r'$')
+        out = []
+        try:
+            self.proc.stdin.write(f"{script}\nlog {marker}\n")
+            self.proc.stdin.flush()
+        except OSError:
+            pass  # process already gone; fall through to the EOF handling
+        while True:
+            try:
+                line = self.lines.get(timeout=self.read_timeout)
+            except queue.Empty:
+                self.proc.kill()
+                self.proc.wait()
+                self.proc = None
+                return {"ok": False, "returncode": None, "stdout": "".join(out), "timeout": True,
+                        "stderr": f"yosys printed nothing for {self.read_timeout} s; session killed"}
+            if line is None:
+                break
+            if done.search(line.rstrip()):
+                text = "".join(out)
+                return {"ok": "ERROR:" not in text, "returncode": 0, "stdout": text, "stderr": ""}
+            out.append(line)
+        # EOF: yosys exited (fatal error or crash)
+        rc = self.proc.wait()
+        self.proc = None
+        return {"ok": False, "returncode": rc, "stdout": "".join(out), "stderr": ""}
+
+    def run(self, script: str) -> Dict[str, object]:
+        if self.proc is None or self.proc.poll() is not None:
+            self._start()
+        self.jobs += 1
+        return self._exec(f"design -reset\n{script}")
+
+    def close(self):
+        if self.proc is not None and self.proc.poll() is None:
+            try:
+                self.proc.stdin.write("exit\n")
+                self.proc.stdin.close()
+                self.proc.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+        self.proc = None
+
+class YosysPool:
+    def __init__(self, size: int = 1, yosys_bin: str = "yosys", preload: Optional[List[str]] = None,
+                 read_timeout: Optional[float] = READ_TIMEOUT):
+        self.size = max(1, size)
+        self._idle: "queue.Queue[YosysSession]" = queue.Queue()
+        self._all = [YosysSession(yosys_bin, preload, read_timeout) for _ in range(self.size)]
+        for s in self._all:
+            self._idle.put(s)
+
+    @staticmethod
+    def available(yosys_bin: str = "yosys") -> bool:
+        return shutil.which(yosys_bin) is not None
+
+    def run(self, script: str) -> Dict[str, object]:
+        """Run one script on the next idle session (blocks while all are busy)."""
+        s = self._idle.get()
+        try:
+            return s.run(script)
+        finally:
+            self._idle.put(s)
+
+    def run_batch(self, scripts: Dict[str, str]) -> Dict[str, Dict[str, object]]:
+        """Run {key: script} across all sessions; returns {key: result}."""
+        with ThreadPoolExecutor(max_workers=self.size) as ex:
+            futs = {k: ex.submit(self.run, sc) for k, sc in scripts.items()}
+            return {k: f.result() for k, f in futs.items()}
+
+    def close(self):
+        for s in self._all:
+            s.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Streaming VCD counterexample reader and trace reducer.
+
+SBY/smtbmc counterexamples of deep BMC runs can be gigabytes of VCD. This
+module never loads a trace: it reads the header, keeps the current value of
+the few signals that matter (the failing assert's signals plus the inputs in
+its cone) and walks the value changes line by line. The assert expression is
+evaluated at every sample (each rising clock edge, or each timestamp for
+combinational designs) and reading stops at the first sample where it is
+false, so only the shortest failing prefix is ever read.
+
+The result is a compact JSON trace:
+    {"vcd": ..., "assert": ..., "fail_step": k, "steps": k + 1,
+     "clock": name,                   # sampling clock ("" if none), not in signals
+     "signals":  {name: {"width": w, "init": v, "changes": [[step, v], ...]}},
+     "constant": {name: v},           # cone signals that never toggle
+     "toggle_counts": {name: n},      # toggling inputs, fewest toggles first
+     "dropped_signals": N}            # VCD variables outside the cone
+
+Values are ints, None for x/z. When the assert cannot be evaluated (syntax
+outside the small Verilog subset below, or a signal missing from the VCD) the
+whole trace is read and the last sample is reported as the failing step.
+
+The trace is reduced, not minimised: it keeps every cone input up to the
+failing step. Dropping inputs would need the design re-simulated (see
+cex_corpus / native_sim); toggle_counts only says which inputs to look at first.
+
+Expression subset: identifiers, bit selects, sized/unsized literals, unary
+! ~ - +, binary * / % + - << >> < <= > >= == != & ^ | && ||, ?:, $past().
+Widths follow the Verilog context rules for unsigned operands.
+
+Usage:
+  python3 vcd_trace.py trace.vcd --assert "count < 10" [--signal rst ...] [--clock clk] [--out trace.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# ----------------------------------------------------------------------------
+# VCD reading
+
+def _tokens(f) -> Iterator[str]:
+    for line in f:
+        yield from line.split()
+
+def read_header(tokens: Iterator[str]) -> Tuple[str, Dict[str, Tuple[str, int]]]:
+    """Consume the header; returns (timescale, {id code: (dotted path, width)})."""
+    scope: List[str] = []
+    vars_: Dict[str, Tuple[str, int]] = {}
+    timescale = ""
+    for tok in tokens:
+        if tok == "$scope":
+            _kind, name = next(tokens), next(tokens)
+            scope.append(name)
+            next(tokens)  # $end
+        elif tok == "$upscope":
+            scope.pop()
+            next(tokens)
+        elif tok == "$var":
+            _kind, width, code, ref = next(tokens), next(tokens), next(tokens), next(tokens)
+            tok = next(tokens)
+            while tok != "$end":  # optional [msb:lsb]
+                tok = next(tokens)
+            vars_.setdefault(code, (".".join(scope + [ref]), int(width)))
+        elif tok == "$timescale":
+            parts = []
+            for tok in tokens:
+                if tok == "$end":
+                    break
+                parts.append(tok)
+            timescale = "".join(parts)
+        elif tok == "$enddefinitions":
+            next(tokens)
+            break
+        elif tok.startswith("$"):
+            for tok in tokens:  # $date, $version, $comment ...
+                if tok == "$end":
+                    break
+    return timescale, vars_
+
+def _value(v: str) -> Optional[int]:
+    try:
+        return int(v, 2)
+    except ValueError:
+        return None  # x / z bits
+
+def iter_changes(tokens: Iterator[str], wanted) -> Iterator[Tuple[Optional[str], Any]]:
+    """Yield (None, time) at each timestamp and (id, value) for wanted ids only."""
+    for tok in tokens:
+        c = tok[0]
+        if c == "#":
+            yield None, int(tok[1:])
+        elif c in "01xXzZ":
+            code = tok[1:]
+            if code in wanted:
+                yield code, _value(c)
+        elif c in "bB":
+            code = next(tokens)
+            if code in wanted:
+                yield code, _value(tok[1:])
+        elif c in "rR":
+            next(tokens)  # real values are not used in properties
+        # $dumpvars / $dumpon / $end ... carry no value themselves
+
+# ----------------------------------------------------------------------------
+# Expression evaluation
+
+TOKEN_RE = re.compile(r"\s*(?:(\d*'[sS]?[bBoOdDhH][0-9a-fA-FxXzZ_]+)|(\d+)|(\$?[A-Za-z_][\w.]*)|"
+                      r"(&&|\|\||==|!=|<=|>=|<<|>>|[-+*/%<>!~&|^?:()\[\]]))")
+BINARY = [("||",), ("&&",), ("|",), ("^",), ("&",), ("==", "!="), ("<", "<=", ">", ">="),
+          ("<<", ">>"), ("+", "-"), ("*", "/", "%")]
+ARITH = {"+", "-", "*", "/", "%", "&", "|", "^"}
+
+def parse_expr(text: str):
+    toks = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"cannot parse near {text[pos:pos + 10]!r}")
+        pos = m.end()
+        if m.group(1):
+            size, base, digits = re.match(r"(\d*)'[sS]?([bBoOdDhH])(.*)", m.group(1)).groups()
+            digits = digits.replace("_", "")
+            val = None if re.search(r"[xXzZ]", digits) else int(digits, {"b": 2, "o": 8, "d": 10, "h": 16}[base.lower()])
+            toks.append(("num", val, int(size) if size else 32))
+        elif m.group(2):
+            toks.append(("num", int(m.group(2)), 32))
+        elif m.group(3):
+            toks.append(("id", m.group(3)))
+        else:
+            toks.append(("op", m.group(4)))
+    i = 0
+
+    def peek():
+        return toks[i] if i < len(toks) else ("end",)
+
+    def take(op=None):
+        nonlocal i
+        t = peek()
+        if op is not None and t != ("op", op):
+            raise ValueError(f"expected {op!r}")
+        i += 1
+        return t
+
+    def primary():
+        t = take()
+        if t[0] == "num":
+            return t
+        if t == ("op", "("):
+            e = ternary()
+            take(")")
+            return e
+        if t[0] == "op" and t[1] in ("!", "~", "-", "+"):
+            return ("un", t[1], primary())
+        if t[0] == "id":
+            if t[1].startswith("$"):
+                take("(")
+                arg = ternary()
+                take(")")
+                if t[1] != "$past":
+                    raise ValueError(f"unsupported {t[1]}")
+                return ("past", arg)
+            node = ("id", t[1])
+            if peek() == ("op", "["):
+                take("[")
+                idx = take()
+                take("]")
+                if idx[0] != "num":
+                    raise ValueError("only constant bit selects")
+                node = ("bit", node, idx[1])
+            return node
+        raise ValueError(f"unexpected {t}")
+
+    def binary(level):
+        if level == len(BINARY):
+            return primary()
+        left = binary(level + 1)
+        while peek()[0] == "op" and peek()[1] in BINARY[level]:
+            op = take()[1]
+            left = ("bin", op, left, binary(level + 1))
+        return left
+
+    def ternary():
+        cond = binary(0)
+        if peek() == ("op", "?"):
+            take("?")
+            a = ternary()
+            take(":")
+            return ("tern", cond, a, ternary())
+        return cond
+
+    tree = ternary()
+    if i != len(toks):
+        raise ValueError("trailing tokens")
+    return tree
+
+def has_past(tree) -> bool:
+    if tree[0] == "past":
+        return True
+    if tree[0] in ("un", "bit"):
+        return has_past(tree[-1] if tree[0] == "un" else tree[1])
+    if tree[0] in ("bin", "tern"):
+        return any(has_past(c) for c in (tree[2:] if tree[0] == "bin" else tree[1:]))
+    return False
+
+def identifiers(tree) -> List[str]:
+    out: List[str] = []
+
+    def walk(n):
+        if n[0] == "id":
+            if n[1] not in out:
+                out.append(n[1])
+        elif n[0] in ("un", "past"):
+            walk(n[-1])
+        elif n[0] == "bit":
+            walk(n[1])
+        elif n[0] in ("bin", "tern"):
+            for c in n[2:] if n[0] == "bin" else n[1:]:
+                walk(c)
+    walk(tree)
+    return out
+
+def _width(n, widths: Dict[str, int]) -> int:
+    k = n[0]
+    if k == "num":
+        return n[2]
+    if k == "id":
+        return widths.get(n[1], 1)
+    if k == "bit":
+        return 1
+    if k == "past":
+        return _width(n[1], widths)
+    if k == "un":
+        return 1 if n[1] == "!" else _width(n[2], widths)
+    if k == "tern":
+        return max(_width(n[2], widths), _width(n[3], widths))
+    op = n[1]
+    if op in ARITH:
+        return max(_width(n[2], widths), _width(n[3], widths))
+    if op in ("<<", ">>"):
+        return _width(n[2], widths)
+    return 1
+
+def evaluate(n, cur: Dict[str, Optional[int]], prev: Dict[str, Optional[int]],
+             widths: Dict[str, int], ctx: int = 1) -> Optional[int]:
+    """Value of the tree at the current sample (None when an operand is x/z)."""
+    k = n[0]
+    if k == "num":
+        return n[1]
+    if k == "id":
+        return cur.get(n[1])
+    if k == "bit":
+        v = evaluate(n[1], cur, prev, widths)
+        return None if v is None else (v >> n[2]) & 1
+    if k == "past":
+        return evaluate(n[1], prev, prev, widths, ctx)
+    w = max(ctx, _width(n, widths))
+    mask = (1 << w) - 1
+    if k == "un":
+        op = n[1]
+        if op == "!":
+            v = evaluate(n[2], cur, prev, widths)
+            return None if v is None else int(v == 0)
+        v = evaluate(n[2], cur, prev, widths, w)
+        if v is None:
+            return None
+        return (~v & mask) if op == "~" else ((-v & mask) if op == "-" else v)
+    if k == "tern":
+        c = evaluate(n[1], cur, prev, widths)
+        if c is None:
+            return None
+        return evaluate(n[2] if c else n[3], cur, prev, widths, w)
+    op = n[1]
+    if op in ("&&", "||"):
+        a = evaluate(n[2], cur, prev, widths)
+        b = evaluate(n[3], cur, prev, widths)
+        if a is None or b is None:
+            return None
+        return int(bool(a) and bool(b)) if op == "&&" else int(bool(a) or bool(b))
+    if op in ("==", "!=", "<", "<=", ">", ">="):
+        cw = max(_width(n[2], widths), _width(n[3], widths))
+        a = evaluate(n[2], cur, prev, widths, cw)
+        b = evaluate(n[3], cur, prev, widths, cw)
+        if a is None or b is None:
+            return None
+        return int({"==": a == b, "!=": a != b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op])
+    if op in ("<<", ">>"):
+        a = evaluate(n[2], cur, prev, widths, w)
+        b = evaluate(n[3], cur, prev, widths)
+        if a is None or b is None:
+            return None
+        return ((a << b) & mask) if op == "<<" else (a >> b)
+    a = evaluate(n[2], cur, prev, widths, w)
+    b = evaluate(n[3], cur, prev, widths, w)
+    if a is None or b is None:
+        return None
+    if op in ("/", "%") and b == 0:
+        return None
+    r = {"+": a + b, "-": a - b, "*": a * b, "/": a // b if b else 0, "%": a % b if b else 0,
+         "&": a & b, "|": a | b, "^": a ^ b}[op]
+    return r & mask
+
+# ----------------------------------------------------------------------------
+# Counterexample summary
+
+def _resolve(vars_: Dict[str, Tuple[str, int]], names: List[str]) -> Dict[str, Tuple[str, int]]:
+    """{name: (id code, width)}, preferring the shallowest scope for each leaf name."""
+    best: Dict[str, Tuple[int, str, int]] = {}
+    wanted = {n.lower(): n for n in names}
+    for code, (path, width) in vars_.items():
+        leaf = path.rsplit(".", 1)[-1].lower()
+        if leaf in wanted:
+            depth = path.count(".")
+            if leaf not in best or depth < best[leaf][0]:
+                best[leaf] = (depth, code, width)
+    return {wanted[k]: (c, w) for k, (_, c, w) in best.items()}
+
+def summarize(vcd_path: Path, assert_expr: str = "", signals: Optional[List[str]] = None,
+              clock: str = "") -> Dict[str, Any]:
+    """Stream a VCD and return the reduced counterexample (see module docstring)."""
+    tree, notes = None, []
+    if assert_expr:
+        try:
+            tree = parse_expr(assert_expr)
+        except ValueError as e:
+            notes.append(f"assert not evaluated: {e}")
+    names = identifiers(tree) if tree is not None else []
+    # $past() has nothing to look at on the first sample
+    first = 1 if tree is not None and has_past(tree) else 0
+    for s in (signals or []) + ([clock] if clock else []):
+        if s and s not in names:
+            names.append(s)
+
+    with open(vcd_path, "r", encoding="utf-8", errors="replace") as f:
+        tokens = _tokens(f)
+        timescale, vars_ = read_header(tokens)
+        sel = _resolve(vars_, names)
+        missing = [n for n in names if n not in sel]
+        if tree is not None and any(n in missing for n in identifiers(tree)):
+            notes.append("assert not evaluated: signal(s) missing from VCD: " + ", ".join(missing))
+            tree = None
+        by_code = {code: name for name, (code, _) in sel.items()}
+        widths = {name: w for name, (_, w) in sel.items()}
+        clk = clock if clock in sel else ""
+
+        cur: Dict[str, Optional[int]] = {n: None for n in sel}
+        prev = dict(cur)
+        last = dict(cur)  # value at the previous sample, for change lists
+        init: Dict[str, Optional[int]] = {}
+        changes: Dict[str, List[List[Any]]] = {n: [] for n in sel}
+        step, fail_step, fail_time, t = -1, None, None, None
+        clk_prev = 0
+
+        def sample():
+            nonlocal step, prev
+            step += 1
+            for n in sel:
+                v = cur[n]
+                if step == 0:
+                    init[n] = v
+                elif v != last[n]:
+                    changes[n].append([step, v])
+                last[n] = v
+            failed = tree is not None and step >= first and evaluate(tree, cur, prev, widths) == 0
+            prev = dict(cur)
+            return failed
+
+        def sample_point() -> bool:
+            # clocked: sample on each rising edge of the clock; else every timestamp
+            nonlocal clk_prev
+            if not clk:
+                return True
+            edge = clk_prev == 0 and cur[clk] == 1
+            clk_prev = cur[clk] or 0
+            return edge
+
+        for code, val in iter_changes(tokens, by_code):
+            if code is None:
+                if t is not None and sample_point() and sample():
+                    fail_step, fail_time = step, t
+                    break
+                t = val
+            else:
+                cur[by_code[code]] = val
+        else:
+            if t is not None and sample_point() and sample():
+                fail_step, fail_time = step, t
+            if fail_step is None:
+                fail_step, fail_time = step, t
+                if tree is not None:
+                    notes.append("assert held on every sample (failure may need the solver's own step semantics)")
+
+    # the clock is implicit in the step numbering
+    constant = {n: init.get(n) for n in sel if not changes[n] and n != clk}
+    counts = {n: len(changes[n]) for n in sel if changes[n] and n != clk}
+    return {
+        "vcd": str(vcd_path),
+        "timescale": timescale,
+        "clock": clk,
+        "assert": assert_expr,
+        "evaluated": tree is not None,
+        "fail_step": fail_step,
+        "fail_time": fail_time,
+        "steps": (fail_step or 0) + 1,
+        "signals": {n: {"width": widths[n], "init": init.get(n), "changes": changes[n]}
+                    for n in sel if changes[n] and n != clk},
+        "constant": constant,
+        "toggle_counts": dict(sorted(counts.items(), key=lambda kv: (kv[1], kv[0]))),
+        "dropped_signals": len(vars_) - len(sel),
+        "notes": notes,
+    }
+
+# ----------------------------------------------------------------------------
+# SBY output helpers
+
+TRACE_RE = re.compile(r'Writing trace to (?:VCD file: )?(\S+\.vcd)')
+ASSERT_FAIL_RE = re.compile(r'Assert(?:ion)? failed in [^:]+: (?:\S*/)?([^\s:/]+):(\d+)')
+ASSERT_LINE_RE = re.compile(r'\bassert\s*\((.*)\)\s*;')
+
+def find_trace(sby_file: Path, stdout: str) -> Optional[Path]:
+    """VCD written by sby for this run (paths in the log are relative to the work dir)."""
+    m = TRACE_RE.search(stdout)
+    if not m:
+        return None
+    rel = Path(m.group(1))
+    for base in (sby_file.parent / sby_file.stem, sby_file.parent, Path(".")):
+        p = rel if rel.is_absolute() else base / rel
+        if p.exists():
+            return p
+    return None
+
+def failed_assert(stdout: str, sources: List[Path]) -> str:
+    """Expression of the first failing assert, looked up in the wrapper sources."""
+    m = ASSERT_FAIL_RE.search(stdout)
+    if not m:
+        return ""
+    fname, line = m.group(1), int(m.group(2))
+    for src in sources:
+        if src.name == fname and src.exists():
+            lines = src.read_text(encoding="utf-8", errors="replace").splitlines()
+            if 0 < line <= len(lines):
+                am = ASSERT_LINE_RE.search(lines[line - 1])
+                if am:
+                    return am.group(1).strip()
+    return ""
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarise a VCD counterexample into a compact JSON trace.")
+    ap.add_argument("vcd")
+    ap.add_argument("--assert", dest="assert_expr", default="", help="Failing assert expression")
+    ap.add_argument("--signal", action="append", default=[], help="Extra signal to keep (repeatable)")
+    ap.add_argument("--clock", default="", help="Clock signal: sample on its rising edges")
+    ap.add_argument("--out", default=None, help="Output JSON (default: stdout)")
+    args = ap.parse_args()
+
+    r = summarize(Path(args.vcd), args.assert_expr, args.signal, args.clock)
+    text = json.dumps(r, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+        print(f"Wrote: {args.out}")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()